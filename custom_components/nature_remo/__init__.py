@@ -1,21 +1,108 @@
 """The nature_remo integration."""
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Mapping
+import datetime
 import logging
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
 from .api import RemoAPI
-from .const import DOMAIN, NetworkError
+from .const import (
+    CONF_APPLIANCE_INTERVAL,
+    CONF_CONCURRENCY,
+    CONF_ECHONET_HOST,
+    CONF_EXPORT_TELEMETRY,
+    CONF_GATEWAY,
+    CONF_GATEWAY_URL,
+    CONF_IMPORT_STATISTICS,
+    CONF_LOOP_WATCHDOG,
+    CONF_METER_INTERVAL,
+    CONF_REQUEST_TIMEOUT,
+    CONF_RETRIES,
+    CONF_SENSOR_INTERVAL,
+    CONF_SIGNAL_INTERVAL,
+    DOMAIN,
+    EPC_ITEM_VALUE_MAP,
+    EPC_ITEMS,
+    GATEWAY_URL,
+    LOOP_STALL_THRESHOLD,
+    PERFORMANCE_DEFAULTS,
+    Appliances,
+    NetworkError,
+    SensorData,
+)
+from .coordinator import (
+    ApplianceCoordinator,
+    LocalMeterCoordinator,
+    SensorCoordinator,
+)
+from .echonet import EchonetClient
+from .energy_statistics import EnergyStatistics
+from .exporter import TelemetryExporter
+from .gateway import async_setup_gateway
+from .index import SignalIndex
+from .light_inference import light_levels_store
+from .outbox import CommandOutbox, outbox_store
+from .services import async_setup_services
+from .snapshot import async_setup_websocket
+from .watchdog import LoopWatchdog
 
 _LOGGER = logging.getLogger(__name__)
-# List the platforms that you want to support.
-# For your initial PR, limit it to 1 platform.
-PLATFORMS: list[Platform] = [Platform.LIGHT, Platform.SELECT, Platform.SENSOR]
-SUBPLATFORMS: list[Platform] = [Platform.BUTTON, Platform.CLIMATE]
+# Platforms that must be set up before the given platform, because the
+# latter reads what the former stores in hass.data.
+PLATFORM_DEPENDENCIES: dict[Platform, set[Platform]] = {
+    # climate reads temperature and humidity sensors from "sensors"
+    Platform.CLIMATE: {Platform.SENSOR},
+    # button reads "signal_entities" and "signal_appliances"
+    Platform.BUTTON: {Platform.SELECT},
+}
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+def required_platforms(
+    appliances: Appliances, sensor_data: dict[str, SensorData]
+) -> set[Platform]:
+    """Find the platforms having at least one entity to set up"""
+    platforms = set()
+    if sensor_data or appliances.power_energy_meter:
+        platforms.add(Platform.SENSOR)
+    if appliances.light:
+        platforms.add(Platform.LIGHT)
+    if appliances.light or appliances.others:
+        platforms |= {Platform.SELECT, Platform.BUTTON}
+    if appliances.ac:
+        platforms.add(Platform.CLIMATE)
+    # pull in dependencies even if they have no entity of their own
+    for platform in list(platforms):
+        platforms |= PLATFORM_DEPENDENCIES.get(platform, set())
+    return platforms
+
+
+def setup_waves(platforms: set[Platform]) -> list[list[Platform]]:
+    """Order platforms into waves that only depend on earlier waves"""
+    waves, done = [], set()
+    while remaining := platforms - done:
+        wave = sorted(
+            p for p in remaining if PLATFORM_DEPENDENCIES.get(p, set()) <= done
+        )
+        waves.append(wave)
+        done.update(wave)
+    return waves
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the integration-wide services."""
+    async_setup_services(hass)
+    async_setup_websocket(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -23,23 +110,188 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     hass.data.setdefault(DOMAIN, {})
     api = RemoAPI(entry.data["token"])
+    if gateway_url := entry.options.get(CONF_GATEWAY_URL):
+        # poll and command through another instance instead of the cloud
+        api.base_url = f"{gateway_url.rstrip('/')}{GATEWAY_URL}/"
+    if entry.options.get(CONF_GATEWAY):
+        # before the first fetch, so that the responses are cached from the start
+        async_setup_gateway(hass, api)
     try:
-        hass.data[DOMAIN][entry.entry_id] = {
-            "api": api,
-            "appliances": await api.fetch_appliance(),
-        }
+        appliances, (sensor_data, device_names) = await asyncio.gather(
+            api.fetch_appliance(), api.fetch_devices()
+        )
     except NetworkError as e:
         _LOGGER.exception("Setup failed due to network error")
         raise ConfigEntryNotReady from e
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    await hass.config_entries.async_forward_entry_setups(entry, SUBPLATFORMS)
+    waves = setup_waves(required_platforms(appliances, sensor_data))
+    api.outbox = CommandOutbox(hass, api, entry.entry_id)
+    await api.outbox.async_start()
+    entry.async_on_unload(api.outbox.async_stop)
+    appliance_coordinator = ApplianceCoordinator(hass, api, appliances)
+    hass.data[DOMAIN][entry.entry_id] = {
+        "api": api,
+        "appliances": appliances,
+        "sensor_data": sensor_data,
+        "device_names": device_names,
+        "signal_index": SignalIndex.from_appliances(appliances),
+        "sensor_coordinator": SensorCoordinator(hass, api, sensor_data),
+        "appliance_coordinator": appliance_coordinator,
+        "meter_coordinators": setup_local_meters(
+            hass, entry, appliances, appliance_coordinator
+        ),
+        "platform_waves": waves,
+        "options": dict(entry.options),
+    }
+    await async_apply_performance_profile(hass.data[DOMAIN][entry.entry_id])
+    if entry.options.get(CONF_LOOP_WATCHDOG):
+        # before the platforms, so that entity listeners are timed too
+        setup_watchdog(hass, entry)
+    for wave in waves:
+        await hass.config_entries.async_forward_entry_setups(entry, wave)
+    if entry.options.get(CONF_EXPORT_TELEMETRY):
+        setup_exporter(hass, entry)
+    if entry.options.get(CONF_IMPORT_STATISTICS):
+        await setup_energy_statistics(hass, entry)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
 
+def setup_local_meters(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    appliances: Appliances,
+    appliance_coordinator: ApplianceCoordinator,
+) -> dict[str, LocalMeterCoordinator]:
+    """Create coordinators reading smart meters over ECHONET Lite"""
+    if not (host := entry.options.get(CONF_ECHONET_HOST)):
+        return {}
+    if not appliances.power_energy_meter:
+        _LOGGER.warning("ECHONET Lite host %s is set but no smart meter exists", host)
+        return {}
+    if len(appliances.power_energy_meter) > 1:
+        _LOGGER.warning(
+            "Multiple smart meters found; only the first one is read from %s", host
+        )
+    mac = appliances.power_energy_meter[0]["device"]["mac_address"]
+    coordinator = LocalMeterCoordinator(
+        hass, EchonetClient(host), mac, appliance_coordinator
+    )
+    entry.async_on_unload(coordinator.client.close)
+    return {mac: coordinator}
+
+
+def setup_watchdog(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Time coordinator updates and their listeners on the event loop"""
+    store = hass.data[DOMAIN][entry.entry_id]
+    watchdog = LoopWatchdog(hass, LOOP_STALL_THRESHOLD)
+    watchdog.start()
+    entry.async_on_unload(watchdog.stop)
+    store["watchdog"] = watchdog
+    coordinators = [store["sensor_coordinator"], store["appliance_coordinator"]]
+    for coordinator in coordinators + list(store["meter_coordinators"].values()):
+        coordinator.watchdog = watchdog
+
+
+def setup_exporter(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Export every coordinator snapshot to files in the config directory"""
+    store = hass.data[DOMAIN][entry.entry_id]
+    coordinators = {
+        "sensor": store["sensor_coordinator"],
+        "appliance": store["appliance_coordinator"],
+    }
+    for mac, coordinator in store["meter_coordinators"].items():
+        coordinators[f"meter {mac}"] = coordinator
+    exporter = TelemetryExporter(hass, coordinators)
+    exporter.async_start()
+    entry.async_on_unload(exporter.async_stop)
+
+
+async def setup_energy_statistics(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Import hourly statistics of every smart meter into the recorder"""
+    if "recorder" not in hass.config.components:
+        _LOGGER.warning("Energy statistics are not imported without the recorder")
+        return
+    store = hass.data[DOMAIN][entry.entry_id]
+    required_epcs = {
+        EPC_ITEM_VALUE_MAP[item]
+        for item in (
+            EPC_ITEMS.comsumed_energy,
+            EPC_ITEMS.energy_coefficient,
+            EPC_ITEMS.energy_unit,
+            EPC_ITEMS.energy_max_digits,
+        )
+    }
+    for properties in store["appliances"].power_energy_meter:
+        epcs = {p["epc"] for p in properties["smart_meter"]["echonetlite_properties"]}
+        if not required_epcs <= epcs:
+            continue
+        mac = properties["device"]["mac_address"]
+        statistics = EnergyStatistics(
+            hass,
+            store["meter_coordinators"].get(mac, store["appliance_coordinator"]),
+            mac,
+            store["device_names"].get(mac, mac),
+            properties,
+        )
+        await statistics.async_start()
+        entry.async_on_unload(statistics.async_stop)
+
+
+def performance_profile(options: Mapping[str, Any]) -> dict[str, Any]:
+    """Performance profile set in the options, with defaults filled in"""
+    return {key: options.get(key, value) for key, value in PERFORMANCE_DEFAULTS.items()}
+
+
+async def async_apply_performance_profile(store: dict) -> None:
+    """Apply the performance profile to the running API and coordinators"""
+    profile = performance_profile(store["options"])
+    api: RemoAPI = store["api"]
+    api.configure(
+        profile[CONF_REQUEST_TIMEOUT], profile[CONF_RETRIES], profile[CONF_CONCURRENCY]
+    )
+    api.scheduler.min_interval = profile[CONF_SIGNAL_INTERVAL]
+    intervals = [
+        (store["sensor_coordinator"], profile[CONF_SENSOR_INTERVAL]),
+        (store["appliance_coordinator"], profile[CONF_APPLIANCE_INTERVAL]),
+    ]
+    for coordinator in store["meter_coordinators"].values():
+        intervals.append((coordinator, profile[CONF_METER_INTERVAL]))
+    for coordinator, seconds in intervals:
+        interval = datetime.timedelta(seconds=seconds)
+        if coordinator.update_interval == interval:
+            continue
+        coordinator.update_interval = interval
+        if coordinator.demand:
+            # poll now so that the next poll is scheduled with the new interval
+            await coordinator.async_request_refresh()
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options, reloading the entry only when required."""
+    store = hass.data[DOMAIN][entry.entry_id]
+    old_options, store["options"] = store["options"], dict(entry.options)
+    changed = {
+        key
+        for key in old_options.keys() | entry.options.keys()
+        if old_options.get(key) != entry.options.get(key)
+    }
+    if changed <= PERFORMANCE_DEFAULTS.keys():
+        await async_apply_performance_profile(store)
+    else:
+        await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    if unload_ok := await hass.config_entries.async_unload_platforms(
-        entry, SUBPLATFORMS
-    ) and await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
-    return unload_ok
+    waves = hass.data[DOMAIN][entry.entry_id]["platform_waves"]
+    for wave in reversed(waves):
+        if not await hass.config_entries.async_unload_platforms(entry, wave):
+            return False
+    hass.data[DOMAIN].pop(entry.entry_id)
+    return True
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove what is stored for a deleted config entry."""
+    await outbox_store(hass, entry.entry_id).async_remove()
+    await light_levels_store(hass, entry.entry_id).async_remove()
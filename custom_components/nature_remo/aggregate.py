@@ -0,0 +1,68 @@
+"""File computing aggregates of sensor readings over groups of Remo devices"""
+from typing import Optional
+
+from .const import SensorData
+from .coordinator import SensorCoordinator
+
+# aggregate name: the SensorData field it is computed from
+AGGREGATE_FIELDS = {
+    "temperature_mean": "temperature",
+    "temperature_min": "temperature",
+    "temperature_max": "temperature",
+    "humidity_mean": "humidity",
+    "humidity_min": "humidity",
+    "humidity_max": "humidity",
+    "illuminance_total": "illuminance",
+}
+
+
+def aggregate(
+    data: dict[str, SensorData], macs: list[str]
+) -> dict[str, Optional[float]]:
+    """Compute every aggregate over the readings of given devices"""
+    readings: dict[str, list[float]] = {
+        "temperature": [],
+        "humidity": [],
+        "illuminance": [],
+    }
+    for mac in macs:
+        if (sensor_data := data.get(mac)) is None:
+            continue
+        for field, values in readings.items():
+            if (value := getattr(sensor_data, field)) is not None:
+                values.append(value)
+    result: dict[str, Optional[float]] = dict.fromkeys(AGGREGATE_FIELDS)
+    for field in ("temperature", "humidity"):
+        if values := readings[field]:
+            result[f"{field}_mean"] = round(sum(values) / len(values), 1)
+            result[f"{field}_min"] = min(values)
+            result[f"{field}_max"] = max(values)
+    if readings["illuminance"]:
+        result["illuminance_total"] = sum(readings["illuminance"])
+    return result
+
+
+class SensorAggregator:
+    """Class computing aggregates once per poll for all aggregate entities.
+
+    `groups` maps a group id, e.g. "home" or an area id, to the mac addresses
+    of the Remo devices in it.
+    """
+
+    def __init__(
+        self, coordinator: SensorCoordinator, groups: dict[str, list[str]]
+    ) -> None:
+        self.coordinator = coordinator
+        self.groups = groups
+        self.revision: Optional[int] = None
+        self.values: dict[str, dict[str, Optional[float]]] = {}
+
+    def get(self, group: str, name: str) -> Optional[float]:
+        """Aggregate of given group in the current coordinator data"""
+        if self.revision != self.coordinator.revision:
+            self.values = {
+                group_id: aggregate(self.coordinator.data, macs)
+                for group_id, macs in self.groups.items()
+            }
+            self.revision = self.coordinator.revision
+        return self.values[group][name]
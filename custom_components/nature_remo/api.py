@@ -1,31 +1,197 @@
 """File for communication with nature remo"""
 import asyncio
+import functools
 import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 import requests
 from requests.adapters import HTTPAdapter, Retry
 
 from .const import (
+    AC_CONFIRM_FRESHNESS,
+    BATCH_CONCURRENCY,
     HVAC_MODE_REVERSE_MAP,
     Api,
     Appliances,
     AuthError,
+    CommandRejected,
     NetworkError,
     SensorData,
 )
+from .latency import LatencyTracker, hedged
+from .profiler import profiled
+from .scheduler import TransmitScheduler
+from .trace import CLIMATE, PARSING, TRANSPORT, Payload, get_tracer
 from .util import debugger_is_active
 
+if TYPE_CHECKING:
+    from .outbox import CommandOutbox
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 _LOGGER = logging.getLogger(__name__)
+_TRANSPORT_TRACER = get_tracer(TRANSPORT)
+_PARSING_TRACER = get_tracer(PARSING)
+_CLIMATE_TRACER = get_tracer(CLIMATE)
+# endpoint of each kind of command
+COMMAND_APIS = {"ir": "sendir", "ac": "setac", "light": "setlight"}
 
 
-def blocking_get(session: requests.Session, url: str):
+def blocking_get(session: requests.Session, url: str, timeout: float = 5):
     """A blocking vesion of requests.get()"""
-    return session.get(url=url, timeout=5)
+    return session.get(url=url, timeout=timeout)
+
+
+def decode_json(response) -> Any:
+    """Decode a JSON response, with orjson if it is installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def keep_response(
+    responses: dict[str, Any],
+    key: str,
+    parse: Optional[Callable[[Any], Any]],
+    data: Any,
+) -> Any:
+    """Keep the decoded response before parsing it"""
+    responses[key] = data
+    return data if parse is None else parse(data)
+
 
+def blocking_fetch(
+    session: requests.Session,
+    url: str,
+    timeout: float,
+    parse: Optional[Callable[[Any], Any]],
+) -> tuple[Any, dict[str, float]]:
+    """GET url, then decode and parse the response in the same worker thread.
 
-def blocking_post(session: requests.Session, url: str, data: dict):
+    Returns the parsed data and the seconds spent in each stage.
+    """
+    started = time.perf_counter()
+    try:
+        response = blocking_get(session, url, timeout)
+    except Exception as err:
+        raise NetworkError from err
+    fetched = time.perf_counter()
+    if response.status_code == 401:
+        raise AuthError
+    if response.status_code != 200:
+        raise NetworkError(f"HTTP response status code {response.status_code}")
+    data = decode_json(response)
+    decoded = time.perf_counter()
+    _TRANSPORT_TRACER.debug("%s gives the following response: %s", url, Payload(data))
+    if parse is not None:
+        data = parse(data)
+    parsed = time.perf_counter()
+    return data, {
+        "request": fetched - started,
+        "decode": decoded - fetched,
+        "parse": parsed - decoded,
+    }
+
+
+def blocking_post(session: requests.Session, url: str, data: dict, timeout: float = 5):
     """A blocking vesion of requests.post()"""
-    return session.post(url=url, data=data, timeout=5)
+    return session.post(url=url, data=data, timeout=timeout)
+
+
+def build_ac_payload(ac) -> dict[str, str]:
+    """Build aircon_settings payload from AirConditioner object"""
+    return {
+        "button": "power-off" if ac.hvac_mode == "off" else "",
+        "air_direction": ac.mode_target_swingmodepair[ac.last_hvac_mode].v,
+        "air_direction_h": ac.mode_target_swingmodepair[ac.last_hvac_mode].h,
+        "operation_mode": HVAC_MODE_REVERSE_MAP[ac.last_hvac_mode],
+        "temperature": ac.data.modes[ac.last_hvac_mode].temps_str[
+            ac.mode_target_temp_idx[ac.last_hvac_mode]
+        ],
+        "air_volume": ac.mode_target_fan_mode[ac.last_hvac_mode],
+        "temperature_unit": "c",
+    }
+
+
+def settings_to_payload(settings: dict) -> dict[str, str]:
+    """Convert AC settings reported by the API to aircon_settings payload"""
+    return {
+        "button": "power-off" if settings.get("button") == "power-off" else "",
+        "air_direction": settings.get("dir", ""),
+        "air_direction_h": settings.get("dirh", ""),
+        "operation_mode": settings.get("mode", ""),
+        "temperature": settings.get("temp", ""),
+        "air_volume": settings.get("vol", ""),
+        "temperature_unit": "c",
+    }
+
+
+def parse_sensor_data(response: list[dict]) -> dict[str, SensorData]:
+    """Extract the newest sensor readings of each remo device"""
+    data = {}
+    for device_response in response:
+        if "newest_events" in device_response:
+            event = device_response["newest_events"]
+            temperature = event["te"]["val"] if "te" in event else None
+            humidity = event["hu"]["val"] if "hu" in event else None
+            illuminance = event["il"]["val"] if "il" in event else None
+            movement = event["mo"]["created_at"] if "mo" in event else None
+            mac = device_response["mac_address"]
+            data[mac] = SensorData(temperature, humidity, illuminance, movement)
+    return data
+
+
+def parse_device_names(response: list[dict]) -> dict[str, str]:
+    """Extract the name of each remo device"""
+    return {
+        device_response["mac_address"]: device_response["name"]
+        for device_response in response
+    }
+
+
+def parse_devices(response: list[dict]) -> tuple[dict[str, SensorData], dict[str, str]]:
+    """Extract both the sensor readings and the name of each remo device"""
+    return parse_sensor_data(response), parse_device_names(response)
+
+
+def classify_appliances(response: list[dict]) -> tuple[Appliances, dict[str, str]]:
+    """Classify appliances by type, dropping empty properties.
+
+    Also returns the mac address of the remo emitting each appliance and
+    signal id.
+    """
+    ac_list, light_list, electricity_meter_list, others_list = [], [], [], []
+    emitters = {}
+    for appliance_response in response:
+        properties = {k: v for k, v in appliance_response.items() if v}
+        if "device" in properties:
+            mac = properties["device"]["mac_address"]
+            emitters[properties["id"]] = mac
+            for signal in properties.get("signals", []):
+                emitters[signal["id"]] = mac
+        if "aircon" in properties:
+            ac_list.append(properties)
+        elif "light" in properties:
+            light_list.append(properties)
+        elif "smart_meter" in properties:
+            electricity_meter_list.append(properties)
+        elif "signals" in properties:
+            others_list.append(properties)
+    _PARSING_TRACER.debug(
+        "Classified %d ACs, %d lights, %d meters and %d other appliances",
+        len(ac_list),
+        len(light_list),
+        len(electricity_meter_list),
+        len(others_list),
+    )
+    return (
+        Appliances(ac_list, light_list, electricity_meter_list, others_list),
+        emitters,
+    )
 
 
 class RemoAPI:
@@ -44,33 +210,102 @@ class RemoAPI:
             "setlight": Api("1/appliances/{}/light", "post"),
         }
         self.session = requests.Session()
+        # read timeouts are not retried, GETs adapt their timeout instead
         self.session.mount(
-            "https://", HTTPAdapter(max_retries=Retry(total=3, backoff_factor=1))
+            "https://",
+            HTTPAdapter(max_retries=Retry(total=3, read=0, backoff_factor=1)),
         )
         self.session.headers.update({"Authorization": f"Bearer {self.token}"})
+        # seconds before a request times out
+        self.timeout = 5.0
+        # maximum number of commands sent at the same time by batch services
+        self.concurrency = BATCH_CONCURRENCY
+        self.scheduler = TransmitScheduler()
+        # mac address of the remo emitting each appliance or signal id
+        self.emitters: dict[str, str] = {}
+        # last aircon_settings payload sent to each AC
+        self.ac_last_sent: dict[str, dict[str, str]] = {}
+        # AC settings last confirmed by the API, and when they were confirmed
+        self.ac_confirmed: dict[str, tuple[dict[str, str], float]] = {}
+        # where commands go when the API is unreachable, set up with the entry
+        self.outbox: Optional[CommandOutbox] = None
+        # seconds spent in each stage of the last GET of each endpoint
+        self.timings: dict[str, dict[str, float]] = {}
+        # latency of the recent GETs of each endpoint
+        self.latency: dict[str, LatencyTracker] = {}
+        # last decoded response of each endpoint, kept when serving as gateway
+        self.responses: Optional[dict[str, Any]] = None
+
+    def configure(self, timeout: float, retries: int, concurrency: int) -> None:
+        """Set timeout, retry budget and concurrency of later requests"""
+        self.timeout = timeout
+        self.concurrency = concurrency
+        # replacing the attribute keeps requests in flight on the old policy
+        self.session.get_adapter(self.base_url).max_retries = Retry(
+            total=retries, read=0, backoff_factor=1
+        )
+
+    async def get(
+        self,
+        api: Api,
+        parse: Optional[Callable[[Any], Any]] = None,
+        hedge: bool = False,
+    ):
+        """An async vesion of requests.get()
 
-    async def get(self, api: Api):
-        """An async vesion of requests.get()"""
+        Decoding the response and `parse`, if given, run in the executor too.
+        The timeout follows the latency of recent requests to the endpoint. If
+        `hedge` is set, a second request is sent when the first one is slower
+        than 95% of them, and the first response wins.
+        """
         loop = asyncio.get_running_loop()
         url = self.base_url + api.url
         if debugger_is_active():
             try:
                 from .test import mock_responses
 
-                return mock_responses[api]
+                data = mock_responses[api]
+                return data if parse is None else parse(data)
             except ImportError:
                 pass
-        try:
-            response = await loop.run_in_executor(None, blocking_get, self.session, url)
-        except Exception as err:
-            raise NetworkError from err
+        if self.responses is not None:
+            parse = functools.partial(keep_response, self.responses, api.url, parse)
+        tracker = self.latency.setdefault(api.url, LatencyTracker())
+        timeout = tracker.timeout(self.timeout)
+
+        async def fetch() -> tuple[Any, dict[str, float]]:
+            tracker.requests += 1
+            started = time.perf_counter()
+
+            def record(future: asyncio.Future) -> None:
+                # also runs for a hedged request that lost, once it completes
+                if future.cancelled():
+                    return
+                if (err := future.exception()) is None:
+                    tracker.add(future.result()[1]["request"])
+                elif isinstance(err, NetworkError):
+                    # whatever urllib3 wrapped it in, a request failing after
+                    # the timeout is as slow as it
+                    if (elapsed := time.perf_counter() - started) >= timeout:
+                        tracker.add(elapsed)
+
+            future = loop.run_in_executor(
+                None, blocking_fetch, self.session, url, timeout, parse
+            )
+            future.add_done_callback(record)
+            return await asyncio.shield(future)
+
+        tracker.calls += 1
+        if hedge and (delay := tracker.hedge_delay()) is not None:
+            data, timings = await hedged(fetch, delay)
         else:
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 401:
-                raise AuthError
-            else:
-                raise NetworkError(f"HTTP response status code {response.status_code}")
+            data, timings = await fetch()
+        self.timings[api.url] = timings
+        _TRANSPORT_TRACER.debug("%s took %s", url, Payload(timings))
+        if self.outbox is not None and self.outbox.commands:
+            # the API is reachable again
+            self.outbox.async_schedule_drain()
+        return data
 
     async def post(self, api: Api, params: list[str], data: dict):
         """An async vesion of requests.post()"""
@@ -80,101 +315,112 @@ class RemoAPI:
             try:
                 from .test import mock_responses
 
-                _LOGGER.debug("Posting to %s with data %s", url, str(data))
+                _TRANSPORT_TRACER.debug(
+                    "Posting to %s with data %s", url, Payload(data)
+                )
                 return None
             except ImportError:
                 pass
         try:
-            response = await loop.run_in_executor(None, blocking_post, self.session, url, data)
+            _TRANSPORT_TRACER.debug("Posting to %s with data %s", url, Payload(data))
+            response = await loop.run_in_executor(
+                None, blocking_post, self.session, url, data, self.timeout
+            )
         except Exception as err:
             raise NetworkError from err
         else:
             if response.status_code == 200:
                 return response.json()
-            else:
-                raise NetworkError
+            if response.status_code == 401:
+                raise AuthError
+            if 400 <= response.status_code < 500:
+                # e.g. a deleted signal or an invalid AC payload
+                raise CommandRejected(
+                    f"HTTP response status code {response.status_code}"
+                )
+            raise NetworkError(f"HTTP response status code {response.status_code}")
 
+    @profiled
     async def fecth_sensor_data(self) -> dict[str, SensorData]:
         """Fetch sensor data from all remo devices"""
-        data = {}
-        response = await self.get(self.apis["devices"])
-        for device_response in response:
-            if "newest_events" in device_response:
-                event = device_response["newest_events"]
-                temperature = event["te"]["val"] if "te" in event else None
-                humidity = event["hu"]["val"] if "hu" in event else None
-                illuminance = event["il"]["val"] if "il" in event else None
-                movement = event["mo"]["created_at"] if "mo" in event else None
-                mac = device_response["mac_address"]
-                data[mac] = SensorData(temperature, humidity, illuminance, movement)
-        return data
+        return await self.get(self.apis["devices"], parse_sensor_data, hedge=True)
 
-    async def fetch_device_name(self) -> dict[str, str]:
-        """Fetch device name for all remo devices"""
-        data = {}
-        remote_api = self.apis["devices"]
-        response = await self.get(remote_api)
-        _LOGGER.debug(
-            f"{self.base_url}{remote_api.url} gives the following response: %s",
-            str(response),
-        )
-        for device_response in response:
-            mac = device_response["mac_address"]
-            name = device_response["name"]
-            data[mac] = name
-        return data
+    async def fetch_devices(self) -> tuple[dict[str, SensorData], dict[str, str]]:
+        """Fetch sensor data and device names with a single request"""
+        return await self.get(self.apis["devices"], parse_devices)
 
+    @profiled
     async def fetch_appliance(self) -> Appliances:
         """Fetch all registered appliances"""
-        ac_list, light_list, electricity_meter_list, others_list = [], [], [], []
-        remote_api = self.apis["appliances"]
-        response = await self.get(remote_api)
-        _LOGGER.debug(
-            f"{self.base_url}{remote_api.url} gives the following response: %s",
-            str(response),
+        appliances, emitters = await self.get(
+            self.apis["appliances"], classify_appliances, hedge=True
         )
-        for appliance_response in response:
-            properties = {k: v for k, v in appliance_response.items() if v}
-            if "aircon" in properties:
-                ac_list.append(properties)
-            elif "light" in properties:
-                light_list.append(properties)
-            elif "smart_meter" in properties:
-                electricity_meter_list.append(properties)
-            elif "signals" in properties:
-                others_list.append(properties)
-        return Appliances(ac_list, light_list, electricity_meter_list, others_list)
+        self.emitters.update(emitters)
+        for properties in appliances.ac:
+            if "settings" in properties:
+                self.confirm_ac_settings(properties["id"], properties["settings"])
+        return appliances
+
+    async def transmit_command(self, kind: str, target: str, data: dict):
+        """Send a command of given kind ("ir", "ac" or "light") to its target"""
+        response = await self.scheduler.transmit(
+            self.emitters.get(target),
+            functools.partial(self.post, self.apis[COMMAND_APIS[kind]], [target], data),
+        )
+        if kind == "ac" and response is not None:
+            self.confirm_ac_settings(target, response)
+        return response
+
+    async def send_command(self, kind: str, target: str, data: dict):
+        """Send a command, queueing it in the outbox if the API is unreachable"""
+        try:
+            response = await self.transmit_command(kind, target, data)
+        except NetworkError:
+            if self.outbox is None:
+                raise
+            self.outbox.enqueue(kind, target, data)
+            return None
+        if self.outbox is not None:
+            self.outbox.discard(kind, target, data)
+        return response
 
     async def send_ir_signal(self, signal_id: str):
         """Send ir signal"""
-        return await self.post(self.apis["sendir"], [signal_id], {})
-
-    async def send_ac_signal(self, ac):
-        """Control AC using information from AirConditioner object"""
-        data = {
-            "button": "power-off" if ac.hvac_mode == "off" else "",
-            "air_direction": ac.mode_target_swingmodepair[ac.last_hvac_mode].v,
-            "air_direction_h": ac.mode_target_swingmodepair[ac.last_hvac_mode].h,
-            "operation_mode": HVAC_MODE_REVERSE_MAP[ac.last_hvac_mode],
-            "temperature": ac.data.modes[ac.last_hvac_mode].temps_str[
-                ac.mode_target_temp_idx[ac.last_hvac_mode]
-            ],
-            "air_volume": ac.mode_target_fan_mode[ac.last_hvac_mode],
-            "temperature_unit": "c",
-        }
-        _LOGGER.debug(data)
-        return await self.post(self.apis["setac"], [ac.data.id], data)
+        return await self.send_command("ir", signal_id, {})
+
+    def confirm_ac_settings(self, ac_id: str, settings: dict) -> None:
+        """Record AC settings reported by the API"""
+        self.ac_confirmed[ac_id] = (settings_to_payload(settings), time.monotonic())
+
+    def is_confirmed(self, ac_id: str, data: dict[str, str]) -> bool:
+        """Check if the AC is known to be in the state of given payload"""
+        if (confirmed := self.ac_confirmed.get(ac_id)) is None:
+            return False
+        payload, confirmed_at = confirmed
+        fresh = time.monotonic() - confirmed_at <= AC_CONFIRM_FRESHNESS
+        return fresh and payload == data
+
+    async def send_ac_signal(self, ac, force: bool = False):
+        """Control AC using information from AirConditioner object.
+
+        The command is skipped if the AC is known to be in the requested state
+        already, unless `force` is set.
+        """
+        ac_id = ac.data.id
+        data = build_ac_payload(ac)
+        if not force and self.is_confirmed(ac_id, data):
+            _CLIMATE_TRACER.debug("Skipping AC command already in effect: %s", data)
+            return None
+        _CLIMATE_TRACER.debug("Sending AC command: %s", data)
+        self.ac_last_sent[ac_id] = data
+        return await self.send_command("ac", ac_id, data)
 
     async def send_light_signal(self, app_id: str, button: str):
         """Press button on given light"""
-        return await self.post(self.apis["setlight"], [app_id], {"button": button})
+        return await self.send_command("light", app_id, {"button": button})
 
     async def authenticate(self) -> bool:
         """Test if we can authenticate with the host"""
         remote_api = self.apis["user"]
         response = await self.get(remote_api)
-        _LOGGER.debug(
-            f"{self.base_url}{remote_api.url} gives the following response: %s",
-            str(response),
-        )
         return response is not None
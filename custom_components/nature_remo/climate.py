@@ -10,7 +10,12 @@ import voluptuous as vol
 
 import homeassistant.components.climate as Climate
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import SERVICE_TURN_OFF, SERVICE_TURN_ON, UnitOfTemperature
+from homeassistant.const import (
+    ATTR_TEMPERATURE,
+    SERVICE_TURN_OFF,
+    SERVICE_TURN_ON,
+    UnitOfTemperature,
+)
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity_platform, restore_state
 import homeassistant.helpers.config_validation as cv
@@ -23,15 +28,30 @@ from .const import (
     DOMAIN,
     HVAC_MODE_ACTION_MAP,
     HVAC_MODE_MAP,
+    SERVICE_CLEAR_LOCAL_SETPOINT,
+    SERVICE_RESEND,
+    SERVICE_SET_AC_STATE,
+    SERVICE_SET_LOCAL_SETPOINT,
     ACStatus,
+    InvalidACState,
     Appliances,
     ModeSpec,
+    SensorData,
     SwingModePair,
     UnexpectedAC,
 )
-from .sensor import ApplianceCoordinator, HumiditySensor, TemperatureSensor
+from .coordinator import ApplianceCoordinator
+from .profiler import profiled
+from .sensor import HumiditySensor, TemperatureSensor
+from .thermostat import CONTROLLED_MODES, HysteresisController
+from .trace import PARSING, Payload, get_tracer
 
 _LOGGER = logging.getLogger(__name__)
+_PARSING_TRACER = get_tracer(PARSING)
+ATTR_FORCE = "force"
+ATTR_SETPOINT = "setpoint"
+ATTR_HYSTERESIS = "hysteresis"
+ATTR_MAX_COMMANDS_PER_HOUR = "max_commands_per_hour"
 
 
 def extract_last_settings(settings: dict) -> ACStatus:
@@ -171,6 +191,15 @@ def extract_ac_properties(properties: dict, sensors: list) -> AC:
     )
 
 
+def nearest_temp_idx(modespec: ModeSpec, temperature: float) -> int:
+    """Index of the supported temperature closest to given temperature"""
+    new_temp = min(modespec.high_temp, max(modespec.low_temp, temperature))
+    return min(
+        range(len(modespec.temps_float)),
+        key=lambda i: abs(modespec.temps_float[i] - new_temp),
+    )
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
@@ -210,6 +239,43 @@ async def async_setup_entry(
         AirConditioner.async_set_swing_mode.__name__,
         [Climate.ClimateEntityFeature.SWING_MODE],
     )
+    platform.async_register_entity_service(
+        SERVICE_RESEND, {}, AirConditioner.async_resend.__name__
+    )
+    platform.async_register_entity_service(
+        SERVICE_SET_AC_STATE,
+        {
+            vol.Optional(Climate.const.ATTR_HVAC_MODE): vol.Coerce(
+                Climate.const.HVACMode
+            ),
+            vol.Optional(ATTR_TEMPERATURE): vol.Coerce(float),
+            vol.Optional(Climate.const.ATTR_FAN_MODE): cv.string,
+            vol.Optional(Climate.const.ATTR_SWING_MODE): cv.string,
+            vol.Optional(ATTR_FORCE, default=False): cv.boolean,
+        },
+        AirConditioner.async_set_ac_state.__name__,
+    )
+    platform.async_register_entity_service(
+        SERVICE_SET_LOCAL_SETPOINT,
+        {
+            vol.Required(ATTR_SETPOINT): vol.Coerce(float),
+            vol.Optional(
+                Climate.const.ATTR_HVAC_MODE, default=Climate.const.HVACMode.COOL
+            ): vol.In(CONTROLLED_MODES),
+            vol.Optional(ATTR_HYSTERESIS, default=0.5): vol.All(
+                vol.Coerce(float), vol.Range(min=0)
+            ),
+            vol.Optional(ATTR_MAX_COMMANDS_PER_HOUR, default=4): vol.All(
+                vol.Coerce(int), vol.Range(min=1)
+            ),
+        },
+        AirConditioner.async_set_local_setpoint.__name__,
+    )
+    platform.async_register_entity_service(
+        SERVICE_CLEAR_LOCAL_SETPOINT,
+        {},
+        AirConditioner.async_clear_local_setpoint.__name__,
+    )
     entities = []
     store = hass.data[DOMAIN][entry.entry_id]
     api: RemoAPI = store["api"]
@@ -241,6 +307,9 @@ class AirConditioner(
     mode_target_temp_idx: dict[str, int]
     mode_target_fan_mode: dict[str, str]
     mode_target_swingmodepair: dict[str, SwingModePair]
+    controller: Optional[HysteresisController] = None
+    # set while the controller is sending a command
+    _controlling = False
 
     @property
     def extra_restore_state_data(self) -> restore_state.ExtraStoredData:
@@ -250,9 +319,20 @@ class AirConditioner(
             "mode_target_swingmodepair": {
                 k: [v.v, v.h] for k, v in self.mode_target_swingmodepair.items()
             },
+            "controller": self.controller and self.controller.as_dict(),
         }
         return restore_state.RestoredExtraData(data)
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        if self.controller is None:
+            return None
+        return {
+            "local_setpoint": self.controller.setpoint,
+            "local_setpoint_mode": self.controller.hvac_mode,
+            "local_commands_last_hour": self.controller.commands_last_hour(),
+        }
+
     def recover_status_from_ac_status(self, status: ACStatus):
         """Recover status from ACStatus"""
         self.last_update_timestamp = status.timestamp
@@ -293,8 +373,8 @@ class AirConditioner(
         self, data: AC, api: RemoAPI, coordinator: ApplianceCoordinator
     ) -> None:
         # this step sets self.coordinator
-        _LOGGER.debug("parsed AC modes: %s", str(data.modes))
-        super().__init__(coordinator)
+        _PARSING_TRACER.debug("parsed AC modes: %s", Payload(data.modes))
+        super().__init__(coordinator, "ac")
         self.data = data
         self.api = api
         self._attr_name = data.name
@@ -328,6 +408,7 @@ class AirConditioner(
                 mode = data.last_status.mode
                 if (extra_data := task.result()) is not None:
                     extra_data = copy.deepcopy(extra_data.as_dict())
+                    extra_data.pop("controller", None)
                     for dic in extra_data.values():
                         dic.pop(mode, None)
                     self.mode_target_fan_mode.update(extra_data["mode_target_fan_mode"])
@@ -354,6 +435,39 @@ class AirConditioner(
             self._attr_max_temp = 0.0
             self.last_update_timestamp = datetime.datetime.now(datetime.UTC)
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        extra_data = await self.async_get_last_extra_data()
+        if extra_data is not None and (
+            settings := extra_data.as_dict().get("controller")
+        ):
+            self.controller = HysteresisController(**settings)
+        if (sensor := self.data.temperature_sensor) is not None:
+            context = "temperature"
+        elif (sensor := self.data.humidity_sensor) is not None:
+            context = "humidity"
+        else:
+            return
+        # the controller follows the readings, which another coordinator polls
+        self.async_on_remove(
+            sensor.coordinator.async_add_listener(self._handle_sensor_update, context)
+        )
+
+    @callback
+    def _handle_sensor_update(self) -> None:
+        """Take new readings of the Remo and hold the local setpoint with them"""
+        sensor = self.data.temperature_sensor or self.data.humidity_sensor
+        if not sensor.coordinator.last_update_success:
+            return
+        readings: SensorData = sensor.coordinator.data[sensor.mac]
+        if self.data.temperature_sensor is not None:
+            self._attr_current_temperature = readings.temperature
+        if self.data.humidity_sensor is not None:
+            self._attr_current_humidity = readings.humidity
+        self.async_write_ha_state()
+        if self.controller is not None:
+            self.hass.async_create_task(self.async_run_controller())
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
@@ -369,56 +483,118 @@ class AirConditioner(
             self._attr_current_humidity = self.data.humidity_sensor.native_value
         self.async_write_ha_state()
 
+    async def async_run_controller(self) -> None:
+        """Turn the AC on or off if the local setpoint is not held"""
+        if self._controlling:
+            # a refresh made by the running command scheduled this run
+            return
+        controller = self.controller
+        if controller.hvac_mode == Climate.const.HVACMode.DRY:
+            reading = self.current_humidity
+        else:
+            reading = self.current_temperature
+        target = controller.decide(reading)
+        if target is None or target == self.hvac_mode:
+            return
+        if not controller.has_budget():
+            _LOGGER.debug(
+                "%s skips switching to %s: no command budget", self.name, target
+            )
+            return
+        self._controlling = True
+        try:
+            if target in (Climate.const.HVACMode.OFF, Climate.const.HVACMode.DRY):
+                sent = await self.async_apply_ac_state(hvac_mode=target)
+            else:
+                # the AC's own target is the supported temperature closest to setpoint
+                sent = await self.async_apply_ac_state(
+                    hvac_mode=target, temperature=controller.setpoint
+                )
+        finally:
+            self._controlling = False
+        # skipped, failed and queued commands do not use up the budget
+        if sent:
+            controller.record_command()
+
+    async def async_set_local_setpoint(
+        self,
+        setpoint: float,
+        hvac_mode: Climate.const.HVACMode = Climate.const.HVACMode.COOL,
+        hysteresis: float = 0.5,
+        max_commands_per_hour: int = 4,
+    ) -> None:
+        """Hold a setpoint locally using the Remo's readings"""
+        if hvac_mode not in self.hvac_modes or hvac_mode not in CONTROLLED_MODES:
+            raise InvalidACState(f"{self.name} cannot hold a setpoint in {hvac_mode}")
+        self.controller = HysteresisController(
+            hvac_mode, setpoint, hysteresis, max_commands_per_hour
+        )
+        self.async_write_ha_state()
+        await self.async_run_controller()
+
+    async def async_clear_local_setpoint(self) -> None:
+        """Stop holding the local setpoint"""
+        self.controller = None
+        self.async_write_ha_state()
+
+    @profiled
     async def async_turn_on(self) -> None:
         await self.async_set_hvac_mode(self.last_hvac_mode)
 
-    async def async_turn_off(self) -> None:
+    def show_off_state(self) -> None:
+        """Set attributes of an AC that is off"""
         self._attr_hvac_mode = Climate.const.HVACMode.OFF
         self._attr_hvac_action = HVAC_MODE_ACTION_MAP[self.hvac_mode]
         self._attr_target_temperature = 0.0
         self._attr_min_temp = 0.0
         self._attr_max_temp = 0.0
+
+    def show_mode_state(self, hvac_mode: Climate.const.HVACMode) -> None:
+        """Set attributes of an AC running in given mode with its memorized targets"""
+        modespec: ModeSpec = self.data.modes[hvac_mode]
+        self.last_hvac_mode = self._attr_hvac_mode = hvac_mode
+        self._attr_hvac_action = HVAC_MODE_ACTION_MAP[hvac_mode]
+        self._attr_fan_modes = modespec.fan_modes
+        self._attr_target_temperature_low = modespec.low_temp
+        self._attr_target_temperature_high = modespec.high_temp
+        self._attr_target_temperature_step = modespec.step
+        self._attr_min_temp = min(modespec.temps_float)
+        self._attr_max_temp = max(modespec.temps_float)
+        self._attr_swing_modes = list(map(str, modespec.swingmodespairs))
+        self._attr_fan_mode = self.mode_target_fan_mode[hvac_mode]
+        self._attr_target_temperature = modespec.temps_float[
+            self.mode_target_temp_idx[hvac_mode]
+        ]
+        self._attr_swing_mode = str(self.mode_target_swingmodepair[hvac_mode])
+
+    @profiled
+    async def async_turn_off(self) -> None:
+        await self.coordinator.async_ensure_fresh()
+        self.show_off_state()
         await self.api.send_ac_signal(self)
         self.last_update_timestamp = datetime.datetime.now(datetime.timezone.utc)
         self.async_write_ha_state()
 
+    @profiled
     async def async_set_hvac_mode(self, hvac_mode: Climate.const.HVACMode) -> None:
+        await self.coordinator.async_ensure_fresh()
         if hvac_mode == Climate.const.HVACMode.OFF:
             await self.async_turn_off()
         elif hvac_mode != self.hvac_mode and hvac_mode in self.hvac_modes:
-            modespec: ModeSpec = self.data.modes[hvac_mode]
-            self.last_hvac_mode = self._attr_hvac_mode = hvac_mode
-            self._attr_hvac_action = HVAC_MODE_ACTION_MAP[hvac_mode]
-            self._attr_fan_modes = modespec.fan_modes
-            self._attr_target_temperature_low = modespec.low_temp
-            self._attr_target_temperature_high = modespec.high_temp
-            self._attr_target_temperature_step = modespec.step
-            self._attr_min_temp = min(modespec.temps_float)
-            self._attr_max_temp = max(modespec.temps_float)
-            self._attr_swing_modes = list(map(str, modespec.swingmodespairs))
-            self._attr_fan_mode = self.mode_target_fan_mode[hvac_mode]
-            self._attr_target_temperature = modespec.temps_float[
-                self.mode_target_temp_idx[hvac_mode]
-            ]
-            self._attr_swing_mode = str(self.mode_target_swingmodepair[hvac_mode])
+            self.show_mode_state(hvac_mode)
             await self.api.send_ac_signal(self)
             self.last_update_timestamp = datetime.datetime.now(datetime.timezone.utc)
             self.async_write_ha_state()
 
+    @profiled
     async def async_set_temperature(self, **kwargs: Any) -> None:
+        await self.coordinator.async_ensure_fresh()
         if self.hvac_mode == Climate.const.HVACMode.OFF:
             return
         temperature = kwargs["temperature"]
         cur_modespec: ModeSpec = self.data.modes[self.hvac_mode]
-        mode_min_temp, mode_max_temp = cur_modespec.low_temp, cur_modespec.high_temp
-        mode_temps_float = cur_modespec.temps_float
-        new_temp = min(mode_max_temp, max(mode_min_temp, temperature))
-        # mode_temps_str = cur_modespec.temps_str
-        new_temp_idx = min(
-            range(len(mode_temps_float)),
-            key=lambda i: abs(mode_temps_float[i] - new_temp),
-        )
-        new_temp = mode_temps_float[new_temp_idx]
+        new_temp_idx = nearest_temp_idx(cur_modespec, temperature)
+        new_temp = cur_modespec.temps_float[new_temp_idx]
         if new_temp != self.target_temperature:
             self._attr_target_temperature = new_temp
             self.mode_target_temp_idx[self.hvac_mode] = new_temp_idx
@@ -426,7 +602,9 @@ class AirConditioner(
             self.last_update_timestamp = datetime.datetime.now(datetime.timezone.utc)
             self.async_write_ha_state()
 
+    @profiled
     async def async_set_fan_mode(self, fan_mode: str) -> None:
+        await self.coordinator.async_ensure_fresh()
         if self.hvac_mode == Climate.const.HVACMode.OFF:
             return
         if fan_mode != self.fan_mode and fan_mode in self.fan_modes:
@@ -436,7 +614,9 @@ class AirConditioner(
             self.last_update_timestamp = datetime.datetime.now(datetime.timezone.utc)
             self.async_write_ha_state()
 
+    @profiled
     async def async_set_swing_mode(self, swing_mode: str) -> None:
+        await self.coordinator.async_ensure_fresh()
         if self.hvac_mode == Climate.const.HVACMode.OFF:
             return
         if swing_mode != self.swing_mode and swing_mode in self.swing_modes:
@@ -448,3 +628,77 @@ class AirConditioner(
             await self.api.send_ac_signal(self)
             self.last_update_timestamp = datetime.datetime.now(datetime.timezone.utc)
             self.async_write_ha_state()
+
+    async def async_resend(self) -> None:
+        """Send current settings again even if the AC should be in them already"""
+        await self.api.send_ac_signal(self, force=True)
+        self.last_update_timestamp = datetime.datetime.now(datetime.timezone.utc)
+
+    @profiled
+    async def async_set_ac_state(
+        self,
+        hvac_mode: Optional[Climate.const.HVACMode] = None,
+        temperature: Optional[float] = None,
+        fan_mode: Optional[str] = None,
+        swing_mode: Optional[str] = None,
+        force: bool = False,
+    ) -> None:
+        """Apply mode, temperature, fan and swing with a single command.
+
+        When the target mode is off, the other settings are memorized for the
+        mode the AC was last running in.
+        """
+        await self.async_apply_ac_state(
+            hvac_mode, temperature, fan_mode, swing_mode, force
+        )
+
+    async def async_apply_ac_state(
+        self,
+        hvac_mode: Optional[Climate.const.HVACMode] = None,
+        temperature: Optional[float] = None,
+        fan_mode: Optional[str] = None,
+        swing_mode: Optional[str] = None,
+        force: bool = False,
+    ) -> bool:
+        """Apply settings like `async_set_ac_state`, returning if a command was sent"""
+        # settings not given are kept from the current state, so it must be current
+        await self.coordinator.async_ensure_fresh()
+        mode = self.hvac_mode if hvac_mode is None else hvac_mode
+        if mode not in self.hvac_modes:
+            raise InvalidACState(f"{self.name} does not support mode {mode}")
+        settings_mode = (
+            self.last_hvac_mode if mode == Climate.const.HVACMode.OFF else mode
+        )
+        modespec: ModeSpec = self.data.modes[settings_mode]
+        if fan_mode is not None and fan_mode not in modespec.fan_modes:
+            raise InvalidACState(
+                f"{self.name} does not support fan mode {fan_mode} in {settings_mode}"
+            )
+        swingmodepair = None
+        if swing_mode is not None:
+            swingmodepair = next(
+                (p for p in modespec.swingmodespairs if str(p) == swing_mode), None
+            )
+            if swingmodepair is None:
+                raise InvalidACState(
+                    f"{self.name} does not support swing mode {swing_mode} "
+                    f"in {settings_mode}"
+                )
+        # every field is valid; apply them all at once
+        if temperature is not None:
+            self.mode_target_temp_idx[settings_mode] = nearest_temp_idx(
+                modespec, temperature
+            )
+        if fan_mode is not None:
+            self.mode_target_fan_mode[settings_mode] = fan_mode
+        if swingmodepair is not None:
+            self.mode_target_swingmodepair[settings_mode] = swingmodepair
+        if mode == Climate.const.HVACMode.OFF:
+            self.show_off_state()
+        else:
+            self.show_mode_state(mode)
+        response = await self.api.send_ac_signal(self, force=force)
+        self.last_update_timestamp = datetime.datetime.now(datetime.timezone.utc)
+        self.async_write_ha_state()
+        # None when the command was skipped as in effect or queued in the outbox
+        return response is not None
@@ -7,16 +7,46 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 
-from .const import DOMAIN, NetworkError, AuthError
+from .const import (
+    CONF_AGGREGATE_BY_AREA,
+    CONF_APPLIANCE_INTERVAL,
+    CONF_CONCURRENCY,
+    CONF_ECHONET_HOST,
+    CONF_EXPORT_TELEMETRY,
+    CONF_GATEWAY,
+    CONF_GATEWAY_URL,
+    CONF_IMPORT_STATISTICS,
+    CONF_INFER_LIGHT_STATE,
+    CONF_LOOP_WATCHDOG,
+    CONF_METER_INTERVAL,
+    CONF_REQUEST_TIMEOUT,
+    CONF_RETRIES,
+    CONF_SENSOR_INTERVAL,
+    CONF_SIGNAL_INTERVAL,
+    DOMAIN,
+    PERFORMANCE_DEFAULTS,
+    NetworkError,
+    AuthError,
+)
 from .api import RemoAPI
 
 _LOGGER = logging.getLogger(__name__)
 
 # adjust the data schema to the data that you need
 STEP_USER_DATA_SCHEMA = vol.Schema({vol.Required("token"): str})
+# type and allowed range of each performance profile option
+PROFILE_RANGES = {
+    CONF_SENSOR_INTERVAL: (int, 10, 3600),
+    CONF_APPLIANCE_INTERVAL: (int, 10, 3600),
+    CONF_METER_INTERVAL: (int, 1, 600),
+    CONF_REQUEST_TIMEOUT: (float, 1, 60),
+    CONF_RETRIES: (int, 0, 10),
+    CONF_SIGNAL_INTERVAL: (float, 0, 10),
+    CONF_CONCURRENCY: (int, 1, 32),
+}
 
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
@@ -55,3 +85,70 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Create the options flow."""
+        return OptionsFlowHandler(config_entry)
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle options for nature_remo."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        # not `config_entry`, which recent versions provide as a read-only
+        # property and versions before 2024.11 do not provide at all
+        self._config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._config_entry.options
+        fields = {
+            vol.Optional(
+                CONF_ECHONET_HOST,
+                description={"suggested_value": options.get(CONF_ECHONET_HOST)},
+            ): str,
+            vol.Optional(
+                CONF_EXPORT_TELEMETRY,
+                default=options.get(CONF_EXPORT_TELEMETRY, False),
+            ): bool,
+            vol.Optional(
+                CONF_IMPORT_STATISTICS,
+                default=options.get(CONF_IMPORT_STATISTICS, False),
+            ): bool,
+            vol.Optional(
+                CONF_AGGREGATE_BY_AREA,
+                default=options.get(CONF_AGGREGATE_BY_AREA, False),
+            ): bool,
+            vol.Optional(
+                CONF_LOOP_WATCHDOG,
+                default=options.get(CONF_LOOP_WATCHDOG, False),
+            ): bool,
+            vol.Optional(
+                CONF_INFER_LIGHT_STATE,
+                default=options.get(CONF_INFER_LIGHT_STATE, False),
+            ): bool,
+            vol.Optional(
+                CONF_GATEWAY,
+                default=options.get(CONF_GATEWAY, False),
+            ): bool,
+            vol.Optional(
+                CONF_GATEWAY_URL,
+                description={"suggested_value": options.get(CONF_GATEWAY_URL)},
+            ): str,
+        }
+        for key, (kind, minimum, maximum) in PROFILE_RANGES.items():
+            default = options.get(key, PERFORMANCE_DEFAULTS[key])
+            fields[vol.Optional(key, default=default)] = vol.All(
+                vol.Coerce(kind), vol.Range(min=minimum, max=maximum)
+            )
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(fields))
@@ -6,6 +6,97 @@ import homeassistant.components.climate as Climate
 from homeassistant.exceptions import HomeAssistantError
 
 DOMAIN = "nature_remo"
+# minimum gap in seconds between two signals sent through the same remo
+MIN_SIGNAL_INTERVAL = 0.5
+# seconds for which confirmed AC settings are trusted to skip repeated commands
+AC_CONFIRM_FRESHNESS = 600
+# maximum number of batch items applied at the same time
+BATCH_CONCURRENCY = 8
+
+# options
+CONF_ECHONET_HOST = "echonet_host"
+CONF_EXPORT_TELEMETRY = "export_telemetry"
+CONF_IMPORT_STATISTICS = "import_statistics"
+CONF_AGGREGATE_BY_AREA = "aggregate_by_area"
+CONF_LOOP_WATCHDOG = "loop_watchdog"
+CONF_GATEWAY = "gateway"
+CONF_GATEWAY_URL = "gateway_url"
+CONF_INFER_LIGHT_STATE = "infer_light_state"
+# performance profile options, applied without reloading the entry
+CONF_SENSOR_INTERVAL = "sensor_interval"
+CONF_APPLIANCE_INTERVAL = "appliance_interval"
+CONF_METER_INTERVAL = "meter_interval"
+CONF_REQUEST_TIMEOUT = "request_timeout"
+CONF_RETRIES = "retries"
+CONF_SIGNAL_INTERVAL = "signal_interval"
+CONF_CONCURRENCY = "concurrency"
+
+# local ECHONET Lite transport for smart meters
+ECHONET_PORT = 3610
+ECHONET_TIMEOUT = 2.0
+ECHONET_POLL_INTERVAL = 5
+# seconds between writing the top of a rolled over meter and its new value
+ROLLOVER_WRITE_DELAY = 1.0
+
+# telemetry export, relative to the config directory
+EXPORT_DIRECTORY = "nature_remo_telemetry"
+EXPORT_BATCH_SIZE = 500
+EXPORT_FLUSH_INTERVAL = 300
+
+# light state inferred from the illuminance sensor of the emitting Remo
+LIGHT_LEVELS_STORAGE_VERSION = 1
+# lux by which a toggle must change the reading to be learned from
+LIGHT_LUX_MIN_JUMP = 15
+# weight of a new reading in the learned on and off levels
+LIGHT_LEVEL_WEIGHT = 0.3
+# seconds after a toggle during which readings are not used for inference
+LIGHT_SETTLE_TIME = 180
+
+# timeouts and hedging of polls, adapted to the latency of recent requests
+LATENCY_WINDOW = 50
+LATENCY_MIN_SAMPLES = 10
+# timeout as a multiple of the 95th percentile, and its bounds in seconds
+LATENCY_TIMEOUT_FACTOR = 3
+LATENCY_MIN_TIMEOUT = 1.0
+LATENCY_MAX_TIMEOUT = 30.0
+
+# path under which a gateway serves the Nature API to other instances
+GATEWAY_URL = f"/api/{DOMAIN}/gateway"
+
+# seconds a callback may hold the event loop before the watchdog reports it
+LOOP_STALL_THRESHOLD = 0.1
+
+# default performance profile; intervals and timeouts are in seconds
+PERFORMANCE_DEFAULTS = {
+    CONF_SENSOR_INTERVAL: 60,
+    CONF_APPLIANCE_INTERVAL: 60,
+    CONF_METER_INTERVAL: ECHONET_POLL_INTERVAL,
+    CONF_REQUEST_TIMEOUT: 5,
+    CONF_RETRIES: 3,
+    CONF_SIGNAL_INTERVAL: MIN_SIGNAL_INTERVAL,
+    CONF_CONCURRENCY: BATCH_CONCURRENCY,
+}
+
+# outbox of commands that could not be sent
+OUTBOX_STORAGE_VERSION = 1
+# seconds after which a queued command is dropped instead of sent
+OUTBOX_DEADLINE = 1800
+# seconds between attempts to drain the outbox, and between drained commands
+OUTBOX_RETRY_INTERVAL = 30
+OUTBOX_DRAIN_GAP = 2.0
+
+SERVICE_APPLY_BATCH = "apply_batch"
+SERVICE_SEND_SIGNAL = "send_signal"
+SERVICE_PROFILE = "profile"
+SERVICE_RESEND = "resend"
+SERVICE_SET_AC_STATE = "set_ac_state"
+SERVICE_SET_LOCAL_SETPOINT = "set_local_setpoint"
+SERVICE_CLEAR_LOCAL_SETPOINT = "clear_local_setpoint"
+
+WS_TYPE_SNAPSHOT = f"{DOMAIN}/snapshot"
+EVENT_MOTION_DETECTED = f"{DOMAIN}_motion_detected"
+EVENT_AC_CHANGED = f"{DOMAIN}_ac_changed"
+EVENT_METER_ROLLOVER = f"{DOMAIN}_meter_rollover"
 
 
 class NetworkError(HomeAssistantError):
@@ -16,6 +107,10 @@ class AuthError(HomeAssistantError):
     """Error to indicate there is invalid auth."""
 
 
+class CommandRejected(HomeAssistantError):
+    """Error to indicate the API refused a command, so resending it is useless."""
+
+
 class NoSignalError(HomeAssistantError):
     """Error to indicate the appliance has no signal binded."""
 
@@ -24,6 +119,10 @@ class UnexpectedAC(HomeAssistantError):
     """Error to indicate the AC has an expected configuration."""
 
 
+class InvalidACState(HomeAssistantError):
+    """Error to indicate the requested AC state is not supported."""
+
+
 class UnexpectedLight(HomeAssistantError):
     """Error to indicate the light has an expected configuration."""
 
@@ -0,0 +1,201 @@
+"""File defining coordinators polling the Remo API"""
+from collections.abc import Callable
+import datetime
+import itertools
+import logging
+import time
+from typing import Any, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .api import RemoAPI
+from .const import ECHONET_POLL_INTERVAL, Appliances, SensorData
+from .echonet import EchonetClient
+from .events import ChangeEvent, ac_events, motion_events, rollover_events
+from .profiler import profiled
+from .watchdog import LoopWatchdog
+
+_LOGGER = logging.getLogger(__name__)
+# revisions are shared by all coordinators so that they can be compared
+_revisions = itertools.count(1)
+
+
+class DemandCoordinator(DataUpdateCoordinator):
+    """Coordinator polling only while some entity consumes its data.
+
+    Entities register with the data class they read (a field name of the
+    polled namedtuple) as listener context. The base class stops polling when
+    the last listener is removed, e.g. when every consuming entity is
+    disabled; here a refresh is also requested as soon as a listener comes
+    back to stale data, and commands needing current state refresh it first.
+    """
+
+    last_refreshed: Optional[float] = None
+    # bumped whenever polled data differs from the previous data
+    revision: int = 0
+    # times updates and listeners when the loop watchdog is enabled
+    watchdog: Optional[LoopWatchdog] = None
+
+    @property
+    def demand(self) -> set[str]:
+        """Data classes consumed by active listeners"""
+        return set(self.async_contexts())
+
+    def is_stale(self, max_age: Optional[float] = None) -> bool:
+        """Check if the data is older than `max_age` or the update interval"""
+        if self.last_refreshed is None:
+            return True
+        if max_age is None:
+            max_age = self.update_interval.total_seconds()
+        return time.monotonic() - self.last_refreshed > max_age
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for data updates, resuming polling if it was idle."""
+        resume = not self._listeners
+        if self.watchdog is not None:
+            update_callback = self.watchdog.wrap(update_callback)
+        remove_listener = super().async_add_listener(update_callback, context)
+        if resume and self.is_stale():
+            _LOGGER.debug("%s resumes polling with stale data", self.name)
+            self.hass.async_create_task(self.async_request_refresh())
+        return remove_listener
+
+    async def async_ensure_fresh(self, max_age: Optional[float] = None) -> None:
+        """Refresh now if the data is older than `max_age` or the update interval"""
+        if self.is_stale(max_age):
+            await self.async_refresh()
+
+    def diff(self, old: Any, new: Any) -> list[ChangeEvent]:
+        """Change events between two successive snapshots"""
+        return []
+
+    async def _async_update_data(self):
+        if self.watchdog is None:
+            return await self._async_poll()
+        return await self.watchdog.run(
+            f"{type(self).__name__}._async_update_data", self._async_poll()
+        )
+
+    async def _async_poll(self):
+        data = await super()._async_update_data()
+        self.last_refreshed = time.monotonic()
+        if data != self.data:
+            self.revision = next(_revisions)
+            if self.data is not None:
+                for event_type, event_data in self.diff(self.data, data):
+                    self.hass.bus.async_fire(event_type, event_data)
+        return data
+
+
+class SensorCoordinator(DemandCoordinator):
+    """Coordinator for polling Remo sensor data"""
+
+    def __init__(
+        self, hass: HomeAssistant, api: RemoAPI, data: dict[str, SensorData]
+    ) -> None:
+        self.api = api
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Remo API Coordinator for sensors",
+            update_interval=datetime.timedelta(seconds=60),
+            update_method=self.api.fecth_sensor_data,
+        )
+        self.data = data
+        self.last_refreshed = time.monotonic()
+        self.revision = next(_revisions)
+
+    def diff(
+        self, old: dict[str, SensorData], new: dict[str, SensorData]
+    ) -> list[ChangeEvent]:
+        return motion_events(old, new)
+
+    @profiled
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners."""
+        super().async_update_listeners()
+
+
+class ApplianceCoordinator(DemandCoordinator):
+    """Coordinator for polling appliance data"""
+
+    def __init__(self, hass: HomeAssistant, api: RemoAPI, data: Appliances) -> None:
+        self.api = api
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Remo API Coordinator for appliances",
+            update_interval=datetime.timedelta(seconds=60),
+            update_method=self.api.fetch_appliance,
+        )
+        self.data = data
+        self.local_meters: set[str] = set()
+        self.last_refreshed = time.monotonic()
+        self.revision = next(_revisions)
+
+    def diff(self, old: Appliances, new: Appliances) -> list[ChangeEvent]:
+        # meters read locally report their rollover from their own coordinator
+        rollovers = [
+            event
+            for event in rollover_events(old, new)
+            if event[1]["mac"] not in self.local_meters
+        ]
+        return ac_events(old, new, self.api.ac_last_sent) + rollovers
+
+    @profiled
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners."""
+        super().async_update_listeners()
+
+
+class LocalMeterCoordinator(DemandCoordinator):
+    """Coordinator polling a smart meter over the local network.
+
+    The data has the same shape as what `ApplianceCoordinator` provides, so
+    that meter entities do not care where their readings come from.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: EchonetClient,
+        mac: str,
+        cloud_coordinator: ApplianceCoordinator,
+    ) -> None:
+        self.client = client
+        self.mac = mac
+        self.cloud_coordinator = cloud_coordinator
+        cloud_coordinator.local_meters.add(mac)
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"ECHONET Lite Coordinator for {client.host}",
+            update_interval=datetime.timedelta(seconds=ECHONET_POLL_INTERVAL),
+            update_method=self.fetch_meter,
+        )
+
+    async def fetch_meter(self) -> Appliances:
+        """Read the meter and wrap it like an appliance snapshot"""
+        readings = {p["epc"]: p for p in await self.client.fetch_properties()}
+        # properties the meter did not answer keep their last cloud value
+        cloud_properties = next(
+            p
+            for p in self.cloud_coordinator.data.power_energy_meter
+            if p["device"]["mac_address"] == self.mac
+        )
+        for p in cloud_properties["smart_meter"]["echonetlite_properties"]:
+            readings.setdefault(p["epc"], p)
+        properties = {
+            "device": {"mac_address": self.mac},
+            "smart_meter": {"echonetlite_properties": list(readings.values())},
+        }
+        return Appliances([], [], [properties], [])
+
+    def diff(self, old: Appliances, new: Appliances) -> list[ChangeEvent]:
+        return rollover_events(old, new)
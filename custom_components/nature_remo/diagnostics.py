@@ -0,0 +1,33 @@
+"""Diagnostics support for nature_remo."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .api import RemoAPI
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    store = hass.data[DOMAIN][entry.entry_id]
+    api: RemoAPI = store["api"]
+    return {
+        "transmit_scheduler": api.scheduler.report(),
+        "fetch_timings": api.timings,
+        "fetch_latency": {
+            url: tracker.report(api.timeout) for url, tracker in api.latency.items()
+        },
+        "outbox": api.outbox.report() if api.outbox is not None else None,
+        "loop_watchdog": (
+            store["watchdog"].report() if store.get("watchdog") is not None else None
+        ),
+        "polling_demand": {
+            key: sorted(store[key].demand)
+            for key in ("sensor_coordinator", "appliance_coordinator")
+        },
+    }
@@ -0,0 +1,162 @@
+"""File for reading smart meters over ECHONET Lite on the local network"""
+import asyncio
+import itertools
+import logging
+import socket
+from typing import Optional
+
+from .const import (
+    ECHONET_PORT,
+    ECHONET_TIMEOUT,
+    EPC_ITEM_VALUE_MAP,
+    EPC_ITEMS,
+    NetworkError,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+EHD = b"\x10\x81"
+# controller object sending the request
+CONTROLLER_EOJ = b"\x05\xff\x01"
+# low-voltage smart electric energy meter
+SMART_METER_EOJ = b"\x02\x88\x01"
+ESV_GET = 0x62
+ESV_GET_RES = 0x72
+ESV_GET_SNA = 0x52
+# properties requested from the meter, in the same set the cloud API reports
+METER_EPCS = [
+    EPC_ITEM_VALUE_MAP[item]
+    for item in (
+        EPC_ITEMS.power,
+        EPC_ITEMS.comsumed_energy,
+        EPC_ITEMS.generated_energy,
+        EPC_ITEMS.energy_coefficient,
+        EPC_ITEMS.energy_unit,
+        EPC_ITEMS.energy_max_digits,
+    )
+]
+# instantaneous power can be negative when electricity is sold
+SIGNED_EPCS = {EPC_ITEM_VALUE_MAP[EPC_ITEMS.power]}
+
+
+def build_get_frame(tid: int, epcs: list[int]) -> bytes:
+    """Build an ECHONET Lite Get request"""
+    frame = bytearray(EHD)
+    frame += tid.to_bytes(2, "big")
+    frame += CONTROLLER_EOJ + SMART_METER_EOJ
+    frame += bytes([ESV_GET, len(epcs)])
+    for epc in epcs:
+        frame += bytes([epc, 0])
+    return bytes(frame)
+
+
+def parse_response(frame: bytes) -> tuple[int, bytes, list[dict]]:
+    """Parse a Get response into its TID, SEOJ and echonetlite_properties.
+
+    The properties are in the same shape as the cloud API reports them, so
+    they can be decoded by the same code.
+    """
+    if len(frame) < 12 or frame[:2] != EHD:
+        raise ValueError("not an ECHONET Lite frame")
+    tid, seoj = int.from_bytes(frame[2:4], "big"), bytes(frame[4:7])
+    if frame[10] not in (ESV_GET_RES, ESV_GET_SNA):
+        raise ValueError(f"unexpected ESV {frame[10]:#x}")
+    properties, pos = [], 12
+    for _ in range(frame[11]):
+        epc, pdc = frame[pos], frame[pos + 1]
+        edt = frame[pos + 2 : pos + 2 + pdc]
+        pos += 2 + pdc
+        if pdc == 0:
+            # the meter could not provide this property
+            continue
+        val = int.from_bytes(edt, "big", signed=epc in SIGNED_EPCS)
+        properties.append({"epc": epc, "val": str(val)})
+    return tid, seoj, properties
+
+
+class EchonetProtocol(asyncio.DatagramProtocol):
+    """Protocol matching responses to pending requests.
+
+    A response must come from the address the request was sent to, carry its
+    TID and be sent by the requested object, so that other nodes answering on
+    the same port, or replying to another controller, are ignored.
+    """
+
+    def __init__(self) -> None:
+        # keyed by the IP address and TID of the request
+        self.pending: dict[tuple[str, int], tuple[bytes, asyncio.Future]] = {}
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        try:
+            tid, seoj, properties = parse_response(data)
+        except (ValueError, IndexError):
+            _LOGGER.debug("Ignoring datagram from %s: %s", addr, data.hex())
+            return
+        key = (addr[0], tid)
+        if key not in self.pending or self.pending[key][0] != seoj:
+            _LOGGER.debug("Ignoring unexpected response from %s: %s", addr, data.hex())
+            return
+        _, future = self.pending.pop(key)
+        if not future.done():
+            future.set_result(properties)
+
+    def error_received(self, exc: Exception) -> None:
+        for _, future in self.pending.values():
+            if not future.done():
+                future.set_exception(exc)
+        self.pending.clear()
+
+
+class EchonetClient:
+    """Class querying a Remo E over ECHONET Lite (UDP)"""
+
+    def __init__(self, host: str, port: int = ECHONET_PORT) -> None:
+        self.host = host
+        self.port = port
+        self._tids = itertools.cycle(range(1, 0x10000))
+        # IP address of the host, which responses come from
+        self._address: Optional[str] = None
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._protocol: Optional[EchonetProtocol] = None
+
+    async def _ensure_endpoint(self) -> None:
+        if self._transport is not None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            info = await loop.getaddrinfo(
+                self.host, self.port, family=socket.AF_INET, type=socket.SOCK_DGRAM
+            )
+        except OSError as err:
+            raise NetworkError(f"Cannot resolve {self.host}") from err
+        self._address = info[0][4][0]
+        try:
+            # some nodes reply to the well-known port instead of the source port
+            self._transport, self._protocol = await loop.create_datagram_endpoint(
+                EchonetProtocol, local_addr=("0.0.0.0", ECHONET_PORT)
+            )
+        except OSError:
+            self._transport, self._protocol = await loop.create_datagram_endpoint(
+                EchonetProtocol, local_addr=("0.0.0.0", 0)
+            )
+
+    async def fetch_properties(self, epcs: list[int] = METER_EPCS) -> list[dict]:
+        """Read given properties from the meter"""
+        await self._ensure_endpoint()
+        tid = next(self._tids)
+        key = (self._address, tid)
+        future = asyncio.get_running_loop().create_future()
+        self._protocol.pending[key] = (SMART_METER_EOJ, future)
+        self._transport.sendto(build_get_frame(tid, epcs), (self._address, self.port))
+        try:
+            return await asyncio.wait_for(future, ECHONET_TIMEOUT)
+        except (asyncio.TimeoutError, OSError) as err:
+            raise NetworkError(f"No ECHONET Lite response from {self.host}") from err
+        finally:
+            self._protocol.pending.pop(key, None)
+
+    def close(self) -> None:
+        """Close the socket"""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = self._protocol = None
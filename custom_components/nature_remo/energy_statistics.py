@@ -0,0 +1,169 @@
+"""File aggregating smart meter readings into hourly energy statistics"""
+import datetime
+import logging
+from typing import TYPE_CHECKING, Any, Optional
+
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import (
+    DOMAIN,
+    ENERGY_UNIT_COEFFICIENT_MAP,
+    EPC_ITEM_VALUE_MAP,
+    EPC_ITEMS,
+)
+from .coordinator import DemandCoordinator
+
+# the recorder and its requirements are only imported once it is known to be
+# loaded, so that the integration works without it
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import (
+        StatisticData,
+        StatisticMetaData,
+    )
+
+_LOGGER = logging.getLogger(__name__)
+HOUR = datetime.timedelta(hours=1)
+
+
+def meter_value(properties: dict, epc_item: EPC_ITEMS) -> int:
+    """Raw value of given ECHONET Lite property of a smart meter"""
+    return next(
+        int(p["val"])
+        for p in properties["smart_meter"]["echonetlite_properties"]
+        if p["epc"] == EPC_ITEM_VALUE_MAP[epc_item]
+    )
+
+
+def energy_scale(properties: dict) -> tuple[float, float]:
+    """kWh per unit of the cumulative reading, and kWh at which it wraps"""
+    coefficient = float(
+        meter_value(properties, EPC_ITEMS.energy_coefficient)
+        * ENERGY_UNIT_COEFFICIENT_MAP[meter_value(properties, EPC_ITEMS.energy_unit)]
+    )
+    digits = meter_value(properties, EPC_ITEMS.energy_max_digits)
+    return coefficient, coefficient * 10**digits
+
+
+class HourlyEnergy:
+    """Class accumulating readings of a cumulative meter into hourly buckets.
+
+    `total` keeps growing across rollovers of the meter, so that it can be
+    used as the sum of long-term statistics. The energy consumed between two
+    readings in different hours is split across the hour boundaries in
+    proportion to time, i.e. as if consumed at a constant rate.
+    """
+
+    def __init__(
+        self, modulus: float, total: float = 0.0, last_value: Optional[float] = None
+    ) -> None:
+        self.modulus = modulus
+        self.total = total
+        self.last_value = last_value
+        self.last_moment: Optional[datetime.datetime] = None
+        self.hour: Optional[datetime.datetime] = None
+
+    def add(self, moment: datetime.datetime, value: float) -> list["StatisticData"]:
+        """Add a reading, returning the buckets it completes"""
+        hour = moment.replace(minute=0, second=0, microsecond=0)
+        delta = 0.0
+        if self.last_value is not None:
+            delta = value - self.last_value
+            if delta < 0:
+                # the meter rolled over since the last reading
+                delta += self.modulus
+        completed: list["StatisticData"] = []
+        if self.hour is not None and hour > self.hour:
+            span = (moment - self.last_moment).total_seconds()
+            boundary = self.hour + HOUR
+            while boundary <= hour:
+                share = delta * (boundary - self.last_moment).total_seconds() / span
+                completed.append(
+                    {
+                        "start": boundary - HOUR,
+                        "state": (self.last_value + share) % self.modulus,
+                        "sum": self.total + share,
+                    }
+                )
+                boundary += HOUR
+        if self.hour is None or hour > self.hour:
+            self.hour = hour
+        self.total += delta
+        self.last_value = value
+        self.last_moment = moment
+        return completed
+
+
+class EnergyStatistics:
+    """Class importing hourly statistics of a smart meter into the recorder"""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: DemandCoordinator,
+        mac: str,
+        name: str,
+        properties: dict,
+    ) -> None:
+        self.hass = hass
+        self.coordinator = coordinator
+        self.mac = mac
+        self.coefficient, modulus = energy_scale(properties)
+        self.buckets = HourlyEnergy(modulus)
+        self.metadata: "StatisticMetaData" = {
+            "has_mean": False,
+            "has_sum": True,
+            "name": f"{name} consumed energy",
+            "source": DOMAIN,
+            "statistic_id": f"{DOMAIN}:{slugify(f'energy_{mac}')}",
+            "unit_of_measurement": UnitOfEnergy.KILO_WATT_HOUR,
+        }
+        self._unsub: Optional[CALLBACK_TYPE] = None
+
+    async def async_start(self) -> None:
+        """Continue from the last imported hour and consume meter readings"""
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components.recorder import get_instance
+
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components.recorder.statistics import get_last_statistics
+
+        statistic_id = self.metadata["statistic_id"]
+        last: dict[str, list[dict[str, Any]]] = await get_instance(
+            self.hass
+        ).async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic_id, True, {"state", "sum"}
+        )
+        if last.get(statistic_id):
+            row = last[statistic_id][0]
+            self.buckets.total = row["sum"] or 0.0
+            self.buckets.last_value = row["state"]
+        self._unsub = self.coordinator.async_add_listener(
+            self._handle_update, "statistics"
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop consuming meter readings"""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _handle_update(self) -> None:
+        if not self.coordinator.last_update_success:
+            return
+        properties = next(
+            p
+            for p in self.coordinator.data.power_energy_meter
+            if p["device"]["mac_address"] == self.mac
+        )
+        value = self.coefficient * meter_value(properties, EPC_ITEMS.comsumed_energy)
+        if completed := self.buckets.add(dt_util.utcnow(), value):
+            # pylint: disable-next=import-outside-toplevel
+            from homeassistant.components.recorder.statistics import (
+                async_add_external_statistics,
+            )
+
+            async_add_external_statistics(self.hass, self.metadata, completed)
@@ -0,0 +1,88 @@
+"""File diffing successive coordinator snapshots into change events"""
+from typing import Any
+
+from .api import settings_to_payload
+from .const import (
+    EPC_ITEM_VALUE_MAP,
+    EPC_ITEMS,
+    EVENT_AC_CHANGED,
+    EVENT_METER_ROLLOVER,
+    EVENT_MOTION_DETECTED,
+    Appliances,
+    SensorData,
+)
+
+ChangeEvent = tuple[str, dict[str, Any]]
+
+
+def motion_events(
+    old: dict[str, SensorData], new: dict[str, SensorData]
+) -> list[ChangeEvent]:
+    """Events for every Remo reporting a motion newer than in `old`"""
+    events = []
+    for mac, data in new.items():
+        previous = old.get(mac)
+        if previous is None or data.movement in (None, previous.movement):
+            continue
+        events.append(
+            (
+                EVENT_MOTION_DETECTED,
+                {"mac": mac, "created_at": data.movement},
+            )
+        )
+    return events
+
+
+def ac_events(
+    old: Appliances, new: Appliances, last_sent: dict[str, dict[str, str]]
+) -> list[ChangeEvent]:
+    """Events for every AC whose settings were changed by someone else.
+
+    Settings equal to what this integration sent last are our own command
+    being reported back and do not fire an event.
+    """
+    old_settings = {ac["id"]: ac.get("settings") for ac in old.ac}
+    events = []
+    for ac in new.ac:
+        before, after = old_settings.get(ac["id"]), ac.get("settings")
+        if not before or not after:
+            continue
+        before, after = settings_to_payload(before), settings_to_payload(after)
+        if before == after or after == last_sent.get(ac["id"]):
+            continue
+        changes = {k: [before[k], after[k]] for k in after if before[k] != after[k]}
+        events.append(
+            (
+                EVENT_AC_CHANGED,
+                {
+                    "appliance_id": ac["id"],
+                    "changes": changes,
+                    "updated_at": ac["settings"].get("updated_at"),
+                },
+            )
+        )
+    return events
+
+
+def energy_readings(appliances: Appliances) -> dict[str, int]:
+    """Raw cumulative energy reading of each smart meter"""
+    epc = EPC_ITEM_VALUE_MAP[EPC_ITEMS.comsumed_energy]
+    return {
+        properties["device"]["mac_address"]: int(p["val"])
+        for properties in appliances.power_energy_meter
+        for p in properties["smart_meter"]["echonetlite_properties"]
+        if p["epc"] == epc
+    }
+
+
+def rollover_events(old: Appliances, new: Appliances) -> list[ChangeEvent]:
+    """Events for every smart meter whose cumulative energy went down"""
+    before = energy_readings(old)
+    return [
+        (
+            EVENT_METER_ROLLOVER,
+            {"mac": mac, "previous": before[mac], "current": current},
+        )
+        for mac, current in energy_readings(new).items()
+        if mac in before and current < before[mac]
+    ]
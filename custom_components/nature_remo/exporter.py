@@ -0,0 +1,119 @@
+"""File for exporting sensor and meter readings to compressed files"""
+import datetime
+import functools
+import gzip
+import json
+import logging
+import os
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import EXPORT_BATCH_SIZE, EXPORT_DIRECTORY, EXPORT_FLUSH_INTERVAL
+from .coordinator import DemandCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def sensor_rows(data: dict, timestamp: str) -> list[dict[str, Any]]:
+    """Rows of a SensorCoordinator snapshot"""
+    return [
+        {"ts": timestamp, "kind": "sensor", "mac": mac} | sensor_data._asdict()
+        for mac, sensor_data in data.items()
+    ]
+
+
+def appliance_rows(data, timestamp: str) -> list[dict[str, Any]]:
+    """Rows of an ApplianceCoordinator or LocalMeterCoordinator snapshot"""
+    rows = []
+    for properties in data.power_energy_meter:
+        row = {
+            "ts": timestamp,
+            "kind": "meter",
+            "mac": properties["device"]["mac_address"],
+        }
+        for p in properties["smart_meter"]["echonetlite_properties"]:
+            row[f"epc_{p['epc']:#x}"] = p["val"]
+        rows.append(row)
+    for properties in data.ac:
+        if "settings" in properties:
+            rows.append(
+                {"ts": timestamp, "kind": "ac", "id": properties["id"]}
+                | properties["settings"]
+            )
+    return rows
+
+
+def write_rows(directory: str, rows: list[dict[str, Any]]) -> None:
+    """Append rows to the gzipped NDJSON file of their day"""
+    os.makedirs(directory, exist_ok=True)
+    by_day: dict[str, list[str]] = {}
+    for row in rows:
+        by_day.setdefault(row["ts"][:10], []).append(json.dumps(row, default=str))
+    for day, lines in by_day.items():
+        # every append adds a gzip member; readers see one continuous stream
+        with gzip.open(os.path.join(directory, f"{day}.ndjson.gz"), "at") as file:
+            file.write("\n".join(lines) + "\n")
+
+
+class TelemetryExporter:
+    """Class buffering coordinator snapshots and writing them in batches"""
+
+    def __init__(
+        self, hass: HomeAssistant, coordinators: dict[str, DemandCoordinator]
+    ) -> None:
+        self.hass = hass
+        self.coordinators = coordinators
+        self.directory = hass.config.path(EXPORT_DIRECTORY)
+        self.buffer: list[dict[str, Any]] = []
+        self._unsubs: list[CALLBACK_TYPE] = []
+
+    @callback
+    def async_start(self) -> None:
+        """Start consuming coordinator updates"""
+        for source, coordinator in self.coordinators.items():
+            self._unsubs.append(
+                coordinator.async_add_listener(
+                    functools.partial(self._handle_update, source), "export"
+                )
+            )
+        self._unsubs.append(
+            async_track_time_interval(
+                self.hass,
+                self._async_flush_interval,
+                datetime.timedelta(seconds=EXPORT_FLUSH_INTERVAL),
+            )
+        )
+
+    @callback
+    def _handle_update(self, source: str) -> None:
+        coordinator = self.coordinators[source]
+        if not coordinator.last_update_success:
+            return
+        timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        if source == "sensor":
+            self.buffer.extend(sensor_rows(coordinator.data, timestamp))
+        else:
+            self.buffer.extend(appliance_rows(coordinator.data, timestamp))
+        if len(self.buffer) >= EXPORT_BATCH_SIZE:
+            self.hass.async_create_task(self.async_flush())
+
+    async def _async_flush_interval(self, now: datetime.datetime) -> None:
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Write buffered rows in the executor"""
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        try:
+            await self.hass.async_add_executor_job(write_rows, self.directory, rows)
+        except OSError:
+            _LOGGER.exception("Failed to export %d telemetry rows", len(rows))
+
+    async def async_stop(self) -> None:
+        """Stop consuming updates and write what is left"""
+        while self._unsubs:
+            self._unsubs.pop()()
+        await self.async_flush()
@@ -0,0 +1,125 @@
+"""File serving cached API responses to other Home Assistant instances.
+
+A gateway answers the same paths as the Nature API under `GATEWAY_URL`, so a
+consumer only has to point `RemoAPI.base_url` at it. GETs of devices and
+appliances are served from the snapshots its coordinators poll anyway, and
+commands are forwarded through its own transmit scheduler.
+
+Consumers authenticate with the same Nature token as the gateway's config
+entry rather than with a Home Assistant access token. Whoever holds that token
+can already read and control the same devices through the Nature API itself,
+and the gateway serves nothing but the Nature API for that token, so it grants
+no access the token does not. It also lets a consumer reach the gateway with
+the same client and headers as the Nature API.
+"""
+import hmac
+from http import HTTPStatus
+from typing import Any, Optional
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .api import RemoAPI
+from .const import DOMAIN, GATEWAY_URL, AuthError, CommandRejected, NetworkError
+from .coordinator import DemandCoordinator
+
+DATA_GATEWAY_VIEW = f"{DOMAIN}_gateway_view"
+# API served from the cache: store key of the coordinator polling it
+CACHED_APIS = {
+    "devices": "sensor_coordinator",
+    "appliances": "appliance_coordinator",
+}
+# command kind of each forwarded path, by its first and last segment
+COMMAND_PATHS = {
+    ("signals", "send"): "ir",
+    ("appliances", "aircon_settings"): "ac",
+    ("appliances", "light"): "light",
+}
+
+
+def find_store(hass: HomeAssistant, request: web.Request) -> Optional[dict]:
+    """Store of the gateway entry whose Nature token the request carries"""
+    authorization = request.headers.get("Authorization", "")
+    if not authorization.startswith("Bearer "):
+        return None
+    try:
+        # compare_digest only accepts ASCII str, so compare bytes instead
+        token = authorization[len("Bearer ") :].encode("ascii")
+    except UnicodeEncodeError:
+        return None
+    for store in hass.data.get(DOMAIN, {}).values():
+        api: RemoAPI = store["api"]
+        if api.responses is not None and hmac.compare_digest(api.token.encode(), token):
+            return store
+    return None
+
+
+class GatewayView(HomeAssistantView):
+    """View answering Nature API requests of consumer instances"""
+
+    url = f"{GATEWAY_URL}/{{path:.+}}"
+    name = f"api:{DOMAIN}:gateway"
+    # consumers present the Nature token instead, see the module docstring
+    requires_auth = False
+
+    async def get(self, request: web.Request, path: str) -> web.Response:
+        """Serve a cached snapshot, refreshing it if it is stale"""
+        hass: HomeAssistant = request.app["hass"]
+        if (store := find_store(hass, request)) is None:
+            return self.json_message("Unknown token", HTTPStatus.UNAUTHORIZED)
+        api: RemoAPI = store["api"]
+        try:
+            for name, key in CACHED_APIS.items():
+                if path != api.apis[name].url:
+                    continue
+                coordinator: DemandCoordinator = store[key]
+                await coordinator.async_ensure_fresh()
+                if path not in api.responses:
+                    # the coordinator could not refresh and nothing is cached
+                    await api.get(api.apis[name])
+                return self.json(api.responses[path])
+            if path == api.apis["user"].url:
+                return self.json(await api.get(api.apis["user"]))
+        except AuthError:
+            return self.json_message("Rejected by the API", HTTPStatus.UNAUTHORIZED)
+        except NetworkError as err:
+            return self.json_message(str(err), HTTPStatus.BAD_GATEWAY)
+        return self.json_message(f"{path} is not served", HTTPStatus.NOT_FOUND)
+
+    async def post(self, request: web.Request, path: str) -> web.Response:
+        """Forward a command through the transmit scheduler"""
+        hass: HomeAssistant = request.app["hass"]
+        if (store := find_store(hass, request)) is None:
+            return self.json_message("Unknown token", HTTPStatus.UNAUTHORIZED)
+        segments = path.split("/")
+        kind = None
+        if len(segments) == 4 and segments[0] == "1":
+            kind = COMMAND_PATHS.get((segments[1], segments[3]))
+        if kind is None:
+            return self.json_message(f"{path} is not served", HTTPStatus.NOT_FOUND)
+        api: RemoAPI = store["api"]
+        target, data = segments[2], dict(await request.post())
+        if kind == "ac":
+            # so that the change is not reported as made outside Home Assistant
+            api.ac_last_sent[target] = data
+        try:
+            response: Any = await api.transmit_command(kind, target, data)
+        except AuthError:
+            return self.json_message("Rejected by the API", HTTPStatus.UNAUTHORIZED)
+        except CommandRejected as err:
+            # not worth queueing on the consumer either
+            return self.json_message(str(err), HTTPStatus.BAD_REQUEST)
+        except NetworkError as err:
+            return self.json_message(str(err), HTTPStatus.BAD_GATEWAY)
+        return self.json(response if response is not None else {})
+
+
+@callback
+def async_setup_gateway(hass: HomeAssistant, api: RemoAPI) -> None:
+    """Keep responses of the API for consumers and serve them"""
+    api.responses = {}
+    if not hass.data.get(DATA_GATEWAY_VIEW):
+        hass.http.register_view(GatewayView)
+        hass.data[DATA_GATEWAY_VIEW] = True
@@ -0,0 +1,117 @@
+"""File for looking up signals by appliance and signal name"""
+import collections
+import logging
+from typing import Optional
+
+from .api import RemoAPI
+from .const import Appliance, Appliances, NoSignalError, Signal
+
+_LOGGER = logging.getLogger(__name__)
+
+IndexedSignal = collections.namedtuple(
+    "IndexedSignal", ("appliance_id", "appliance_name", "signal")
+)
+
+
+def extract_general_appliance(properties: dict) -> Appliance:
+    """Build general Appliance from given properties"""
+    app_id, app_name = properties["id"], properties["nickname"]
+    signals = []
+    for signal in properties.get("signals", []):
+        signal_id, signal_name = signal["id"], signal["name"]
+        signals.append(Signal(signal_id, signal_name))
+    if signals:
+        return Appliance(app_id, app_name, signals)
+    else:
+        raise NoSignalError
+
+
+def extract_light_appliance(properties: dict) -> Appliance:
+    """Build light Appliance from given properties"""
+    app_id, app_name = properties["id"], properties["nickname"]
+    light_signals = [button["name"] for button in properties["light"]["buttons"]]
+    ir_signals = []
+    for signal in properties.get("signals", []):
+        signal_id, signal_name = signal["id"], signal["name"]
+        ir_signals.append(Signal(signal_id, signal_name))
+    return Appliance(app_id, app_name, light_signals + ir_signals)
+
+
+def signal_name(signal: str | Signal) -> str:
+    """Name of an IR signal or a light button"""
+    return signal.name if isinstance(signal, Signal) else signal
+
+
+class SignalCatalog:
+    """Class holding the select options of one appliance.
+
+    A single catalog is shared by the select entity, the services and the
+    snapshot, so the option list exists once per appliance.
+    """
+
+    __slots__ = ("signals", "options", "positions")
+
+    def __init__(self, signals: list[str | Signal]) -> None:
+        self.signals = signals
+        self.options = [f"{i+1}. {signal_name(s)}" for i, s in enumerate(signals)]
+        self.positions = {option: i for i, option in enumerate(self.options)}
+
+    def signal(self, option: str) -> str | Signal:
+        """Signal of given option"""
+        return self.signals[self.positions[option]]
+
+
+class SignalIndex:
+    """Class indexing every signal of every appliance.
+
+    Light buttons are stored as plain strings and IR signals as `Signal`, the
+    same way `LightSignalEntity` holds them.
+    """
+
+    def __init__(self, appliances: list[Appliance]) -> None:
+        self.appliances = appliances
+        self.catalogs = {a.id: SignalCatalog(a.signals) for a in appliances}
+        self._by_name: dict[tuple[str, str], IndexedSignal] = {}
+        self._by_id: dict[str, IndexedSignal] = {}
+        for appliance in appliances:
+            for signal in appliance.signals:
+                entry = IndexedSignal(appliance.id, appliance.name, signal)
+                name = signal_name(signal).casefold()
+                # appliances can be referred to by either nickname or id
+                for key in (appliance.name.casefold(), appliance.id.casefold()):
+                    self._by_name.setdefault((key, name), entry)
+                if isinstance(signal, Signal):
+                    self._by_id[signal.id] = entry
+
+    @classmethod
+    def from_appliances(cls, appliances: Appliances) -> "SignalIndex":
+        """Build the index from an appliance snapshot"""
+        indexed = []
+        for properties in appliances.others:
+            try:
+                indexed.append(extract_general_appliance(properties))
+            except NoSignalError:
+                _LOGGER.debug("appliance %s has no signal", properties["nickname"])
+        for properties in appliances.light:
+            indexed.append(extract_light_appliance(properties))
+        return cls(indexed)
+
+    def lookup(
+        self,
+        appliance: Optional[str] = None,
+        signal: Optional[str] = None,
+        signal_id: Optional[str] = None,
+    ) -> Optional[IndexedSignal]:
+        """Find a signal by its id, or by appliance and signal name"""
+        if signal_id is not None:
+            return self._by_id.get(signal_id)
+        if appliance is None or signal is None:
+            return None
+        return self._by_name.get((appliance.casefold(), signal.casefold()))
+
+    @staticmethod
+    async def send(api: RemoAPI, entry: IndexedSignal):
+        """Send an indexed signal"""
+        if isinstance(entry.signal, Signal):
+            return await api.send_ir_signal(entry.signal.id)
+        return await api.send_light_signal(entry.appliance_id, entry.signal)
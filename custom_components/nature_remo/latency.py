@@ -0,0 +1,94 @@
+"""File adapting timeouts of API requests to their observed latency"""
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+import math
+from typing import Any, Optional, TypeVar
+
+from .const import (
+    LATENCY_MAX_TIMEOUT,
+    LATENCY_MIN_SAMPLES,
+    LATENCY_MIN_TIMEOUT,
+    LATENCY_TIMEOUT_FACTOR,
+    LATENCY_WINDOW,
+)
+
+_T = TypeVar("_T")
+
+
+class LatencyTracker:
+    """Class keeping the latency of the recent requests to one endpoint.
+
+    Until `LATENCY_MIN_SAMPLES` requests are seen, the configured timeout is
+    used and requests are not hedged. Requests failing after the timeout are
+    counted with how long they took, so that the timeout grows when the API
+    gets slower instead of failing every request. Hedged requests that lose
+    are counted too, once they complete, so that hedging does not leave only
+    the faster of two requests in the samples.
+    """
+
+    def __init__(self) -> None:
+        self.samples: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        # requests sent, including hedges, and calls they were sent for
+        self.requests = 0
+        self.calls = 0
+
+    def add(self, latency: float) -> None:
+        """Record the latency of a request"""
+        self.samples.append(latency)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency below which given fraction of the recent requests fall"""
+        if len(self.samples) < LATENCY_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+    def timeout(self, default: float) -> float:
+        """Timeout of the next request"""
+        if (p95 := self.percentile(0.95)) is None:
+            return default
+        return min(
+            max(p95 * LATENCY_TIMEOUT_FACTOR, LATENCY_MIN_TIMEOUT), LATENCY_MAX_TIMEOUT
+        )
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a second request is sent, if known yet"""
+        return self.percentile(0.95)
+
+    def report(self, default: float) -> dict[str, Any]:
+        """Summarize the latency and how often requests were hedged"""
+        return {
+            "samples": len(self.samples),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "timeout": self.timeout(default),
+            "hedged_requests": self.requests - self.calls,
+            "calls": self.calls,
+        }
+
+
+async def hedged(fetch: Callable[[], Awaitable[_T]], delay: float) -> _T:
+    """Await `fetch()`, sending a second one if the first is slower than `delay`.
+
+    The first of them to succeed wins and the other one is cancelled. A first
+    request failing before `delay` is not hedged.
+    """
+    tasks = [asyncio.ensure_future(fetch())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            tasks.append(asyncio.ensure_future(fetch()))
+        pending: set[asyncio.Future] = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if (error := task.exception()) is None:
+                    return task.result()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
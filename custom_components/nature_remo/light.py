@@ -1,14 +1,24 @@
+from collections.abc import Callable
 import logging
-from typing import Any
+import time
+from typing import Any, Optional
 
 from homeassistant.components.light import ColorMode, LightEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import SERVICE_TOGGLE, SERVICE_TURN_OFF, SERVICE_TURN_ON
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity_platform
 
 from .api import RemoAPI
-from .const import DOMAIN, Appliances, UnexpectedLight
+from .const import (
+    CONF_INFER_LIGHT_STATE,
+    DOMAIN,
+    LIGHT_SETTLE_TIME,
+    Appliances,
+    UnexpectedLight,
+)
+from .coordinator import SensorCoordinator
+from .light_inference import LuxThreshold, light_levels_store
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,6 +48,27 @@ async def async_setup_entry(
     entities = []
     api: RemoAPI = hass.data[DOMAIN][entry.entry_id]["api"]
     appliances: Appliances = hass.data[DOMAIN][entry.entry_id]["appliances"]
+    sensor_coordinator: SensorCoordinator = hass.data[DOMAIN][entry.entry_id][
+        "sensor_coordinator"
+    ]
+    thresholds: dict[str, LuxThreshold] = {}
+    if entry.options.get(CONF_INFER_LIGHT_STATE):
+        levels_store = light_levels_store(hass, entry.entry_id)
+        levels = await levels_store.async_load() or {}
+
+        @callback
+        def save_levels() -> None:
+            levels_store.async_delay_save(
+                lambda: {i: t.as_dict() for i, t in thresholds.items()}, 10
+            )
+
+        for properties in appliances.light:
+            mac = api.emitters.get(properties["id"])
+            sensor_data = sensor_coordinator.data.get(mac)
+            if sensor_data is not None and sensor_data.illuminance is not None:
+                thresholds[properties["id"]] = LuxThreshold(
+                    **levels.get(properties["id"], {})
+                )
     for properties in appliances.light:
         light_signals = properties["light"]["buttons"]
         one_button = None
@@ -52,19 +83,25 @@ async def async_setup_entry(
                 "Unexpected light configuration; please contact the project maintainer"
             )
             raise UnexpectedLight
-        entities.append(
-            RemoLight(properties["id"], properties["nickname"], one_button, api)
-        )
+        light = RemoLight(properties["id"], properties["nickname"], one_button, api)
+        if (threshold := thresholds.get(properties["id"])) is not None:
+            light.infer_from(sensor_coordinator, threshold, save_levels)
+        entities.append(light)
     async_add_entities(entities)
 
 
 class RemoLight(LightEntity):
-    """Light entity that only supports on/off"""
+    """Light entity that only supports on/off.
+
+    The state is what the last command should have set, unless it is inferred
+    from the illuminance measured by the Remo sending the commands.
+    """
 
     _attr_color_mode = ColorMode.ONOFF
     _attr_supported_color_modes = {ColorMode.ONOFF}
     _attr_has_entity_name = True
     _attr_is_on = False
+    _unrecorded_attributes = frozenset({"lux_threshold"})
 
     def __init__(
         self, light_id: str, name: str, one_button: bool, api: RemoAPI
@@ -74,6 +111,64 @@ class RemoLight(LightEntity):
         self._attr_name = name
         self._attr_unique_id = f"{name} @ {light_id}"
         self.one_button = one_button
+        self.coordinator: Optional[SensorCoordinator] = None
+        self.threshold: Optional[LuxThreshold] = None
+        self._save_levels: Optional[Callable[[], None]] = None
+        # reading before the last toggle, and when that toggle was sent
+        self._toggled: Optional[tuple[float, float]] = None
+
+    def infer_from(
+        self,
+        coordinator: SensorCoordinator,
+        threshold: LuxThreshold,
+        save_levels: Callable[[], None],
+    ) -> None:
+        """Infer the state from illuminance readings of the emitting Remo"""
+        self.coordinator = coordinator
+        self.threshold = threshold
+        self._save_levels = save_levels
+        self._attr_extra_state_attributes = {"lux_threshold": threshold.threshold}
+
+    @property
+    def illuminance(self) -> Optional[float]:
+        """Latest illuminance reading of the emitting Remo"""
+        sensor_data = self.coordinator.data.get(self.api.emitters.get(self.light_id))
+        return sensor_data.illuminance if sensor_data is not None else None
+
+    async def async_added_to_hass(self) -> None:
+        """Follow illuminance readings when the state is inferred"""
+        await super().async_added_to_hass()
+        if self.coordinator is None:
+            return
+        self.async_on_remove(
+            self.coordinator.async_add_listener(self._handle_illuminance, "illuminance")
+        )
+        self._handle_illuminance()
+
+    @callback
+    def _handle_illuminance(self) -> None:
+        if (reading := self.illuminance) is None:
+            return
+        if self._toggled is not None:
+            before, toggled_at = self._toggled
+            if self.threshold.learn(before, reading):
+                self._toggled = None
+                self._save_levels()
+                self._attr_extra_state_attributes = {
+                    "lux_threshold": self.threshold.threshold
+                }
+            elif time.monotonic() - toggled_at < LIGHT_SETTLE_TIME:
+                # the reading may predate the toggle
+                return
+            else:
+                self._toggled = None
+        inferred = self.threshold.infer(reading)
+        if inferred is not None and inferred != self._attr_is_on:
+            _LOGGER.debug(
+                "%s inferred to be %s", self.name, "on" if inferred else "off"
+            )
+            self._attr_is_on = inferred
+        self.async_write_ha_state()
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         if not self.is_on:
@@ -84,6 +179,8 @@ class RemoLight(LightEntity):
             await self.async_toggle(**kwargs)
 
     async def async_toggle(self, **kwargs: Any) -> None:
+        if self.coordinator is not None and (reading := self.illuminance) is not None:
+            self._toggled = (reading, time.monotonic())
         self._attr_is_on = not self._attr_is_on
         if self.one_button:
             await self.api.send_light_signal(self.light_id, "onoff")
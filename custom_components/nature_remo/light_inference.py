@@ -0,0 +1,70 @@
+"""File inferring the state of lights from the illuminance seen by their Remo"""
+from typing import Any, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    LIGHT_LEVEL_WEIGHT,
+    LIGHT_LEVELS_STORAGE_VERSION,
+    LIGHT_LUX_MIN_JUMP,
+)
+
+
+def light_levels_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Storage of the learned light levels of given config entry"""
+    return Store(
+        hass, LIGHT_LEVELS_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.light_levels"
+    )
+
+
+def blend(level: Optional[float], reading: float) -> float:
+    """Move a learned level towards a new reading"""
+    if level is None:
+        return reading
+    return level + LIGHT_LEVEL_WEIGHT * (reading - level)
+
+
+class LuxThreshold:
+    """Class learning the illuminance of a room with a light on and off.
+
+    Levels are only learned from toggles that change the reading by at least
+    `LIGHT_LUX_MIN_JUMP`: the brighter of the readings before and after is
+    taken as on and the darker one as off, whatever state was assumed, so a
+    wrong guess does not corrupt them. Readings far above the on level, e.g.
+    in daylight, tell nothing about the light and are not used.
+    """
+
+    def __init__(self, on: Optional[float] = None, off: Optional[float] = None):
+        self.on = on
+        self.off = off
+
+    @property
+    def threshold(self) -> Optional[float]:
+        """Illuminance separating on from off, once both levels are learned"""
+        if self.on is None or self.off is None:
+            return None
+        if self.on - self.off < LIGHT_LUX_MIN_JUMP:
+            return None
+        return (self.on + self.off) / 2
+
+    def learn(self, before: float, after: float) -> bool:
+        """Learn from the readings around a toggle, if it changed them"""
+        if abs(after - before) < LIGHT_LUX_MIN_JUMP:
+            return False
+        self.on = blend(self.on, max(before, after))
+        self.off = blend(self.off, min(before, after))
+        return True
+
+    def infer(self, reading: float) -> Optional[bool]:
+        """State of the light for given reading, if it can be told"""
+        if (threshold := self.threshold) is None:
+            return None
+        if reading > self.on + (self.on - self.off):
+            return None
+        return reading >= threshold
+
+    def as_dict(self) -> dict[str, Any]:
+        """Learned levels, as stored"""
+        return {"on": self.on, "off": self.off}
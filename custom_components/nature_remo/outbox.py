@@ -0,0 +1,189 @@
+"""File for keeping commands that could not be sent until they can be"""
+import asyncio
+import datetime
+import logging
+import time
+from typing import Any, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+
+from .api import RemoAPI
+from .const import (
+    DOMAIN,
+    OUTBOX_DEADLINE,
+    OUTBOX_DRAIN_GAP,
+    OUTBOX_RETRY_INTERVAL,
+    OUTBOX_STORAGE_VERSION,
+    CommandRejected,
+    NetworkError,
+)
+
+_LOGGER = logging.getLogger(__name__)
+# commands of these kinds carry the whole intended state of the appliance, so
+# a newer one replaces every older one queued for the same appliance
+COALESCED_KINDS = {"ac", "light"}
+# light buttons whose effect depends on the state they are pressed in
+TOGGLE_BUTTONS = {"onoff"}
+
+
+def supersedes(kind: str, data: dict) -> bool:
+    """Check if the command makes older commands to its target obsolete"""
+    return kind in COALESCED_KINDS and data.get("button") not in TOGGLE_BUTTONS
+
+
+def is_replaced_by(command: dict[str, Any], kind: str, target: str) -> bool:
+    """Check if a queued command is made obsolete by a newer superseding one.
+
+    Toggles are never replaced: dropping one changes the state the commands
+    after it leave the appliance in.
+    """
+    return (
+        command["kind"] == kind
+        and command["target"] == target
+        and command["data"].get("button") not in TOGGLE_BUTTONS
+    )
+
+
+def outbox_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Storage of the outbox of given config entry"""
+    return Store(hass, OUTBOX_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.outbox")
+
+
+def is_expired(command: dict[str, Any]) -> bool:
+    """Check if the command waited longer than the deadline"""
+    return time.time() - command["queued_at"] > OUTBOX_DEADLINE
+
+
+class CommandOutbox:
+    """Class queueing commands that failed to send.
+
+    The queue is stored on disk so that it survives restarts. It is drained
+    in order, one command every `OUTBOX_DRAIN_GAP` seconds, once the API can
+    be reached again; commands older than `OUTBOX_DEADLINE` are dropped.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: RemoAPI, entry_id: str) -> None:
+        self.hass = hass
+        self.api = api
+        self.store = outbox_store(hass, entry_id)
+        self.commands: list[dict[str, Any]] = []
+        self._draining = False
+        self._unsub: Optional[CALLBACK_TYPE] = None
+
+    async def async_start(self) -> None:
+        """Load commands queued before a restart and retry periodically"""
+        stored = await self.store.async_load() or {}
+        self.commands = [c for c in stored.get("commands", []) if not is_expired(c)]
+        self._unsub = async_track_time_interval(
+            self.hass,
+            self._async_retry,
+            datetime.timedelta(seconds=OUTBOX_RETRY_INTERVAL),
+        )
+
+    async def async_stop(self) -> None:
+        """Stop retrying and store what is still queued"""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        await self.store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"commands": self.commands}
+
+    @callback
+    def _schedule_save(self) -> None:
+        self.store.async_delay_save(self._data_to_save, 1)
+
+    @callback
+    def enqueue(self, kind: str, target: str, data: dict) -> None:
+        """Queue a command, replacing the ones it makes obsolete"""
+        if supersedes(kind, data):
+            self.commands = [
+                c for c in self.commands if not is_replaced_by(c, kind, target)
+            ]
+        self.commands.append(
+            {"kind": kind, "target": target, "data": data, "queued_at": time.time()}
+        )
+        _LOGGER.warning(
+            "Failed to send %s command to %s; %d commands queued",
+            kind,
+            target,
+            len(self.commands),
+        )
+        self._schedule_save()
+
+    @callback
+    def discard(self, kind: str, target: str, data: dict) -> None:
+        """Drop queued commands obsoleted by a command that was just sent"""
+        if not supersedes(kind, data):
+            return
+        remaining = [c for c in self.commands if not is_replaced_by(c, kind, target)]
+        if len(remaining) != len(self.commands):
+            self.commands = remaining
+            self._schedule_save()
+
+    @callback
+    def async_schedule_drain(self) -> None:
+        """Drain the outbox in the background"""
+        if not self._draining:
+            self.hass.async_create_task(self.async_drain())
+
+    async def _async_retry(self, now: datetime.datetime) -> None:
+        if self.commands:
+            await self.async_drain()
+
+    async def async_drain(self) -> None:
+        """Send queued commands in order until one fails"""
+        if self._draining:
+            return
+        self._draining = True
+        try:
+            while self.commands:
+                command = self.commands[0]
+                if is_expired(command):
+                    _LOGGER.warning(
+                        "Dropped %s command to %s queued for too long",
+                        command["kind"],
+                        command["target"],
+                    )
+                else:
+                    try:
+                        await self.api.transmit_command(
+                            command["kind"], command["target"], command["data"]
+                        )
+                    except NetworkError:
+                        _LOGGER.debug(
+                            "Still offline; %d commands queued", len(self.commands)
+                        )
+                        return
+                    except CommandRejected as err:
+                        _LOGGER.warning(
+                            "Dropped %s command to %s rejected by the API: %s",
+                            command["kind"],
+                            command["target"],
+                            err,
+                        )
+                # a newer command may have replaced it while it was sent
+                self.commands = [c for c in self.commands if c is not command]
+                self._schedule_save()
+                if self.commands:
+                    await asyncio.sleep(OUTBOX_DRAIN_GAP)
+        finally:
+            self._draining = False
+
+    def report(self) -> dict[str, Any]:
+        """Queued commands, for diagnostics"""
+        now = time.time()
+        return {
+            "queued": len(self.commands),
+            "commands": [
+                {
+                    "kind": c["kind"],
+                    "target": c["target"],
+                    "age": round(now - c["queued_at"], 1),
+                }
+                for c in self.commands
+            ],
+        }
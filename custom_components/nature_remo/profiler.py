@@ -0,0 +1,145 @@
+"""File for profiling the hot paths of the integration on demand"""
+import asyncio
+import contextlib
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from typing import Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(__file__)
+
+
+class ProfileSession:
+    """Class collecting cProfile stats and memory allocations.
+
+    The profiler is enabled only while at least one profiled function is
+    running. Since coroutines interleave on the event loop, whatever else
+    runs on the loop while a profiled coroutine awaits is captured as well.
+    Neither cProfile nor tracemalloc sets a trace function, so the debugger
+    check in `api.py` is not affected.
+    """
+
+    def __init__(self) -> None:
+        self.profile = cProfile.Profile()
+        self.profile_enabled = False
+        self.timings: dict[str, list[float]] = {}
+        self.started_at = time.time()
+        self._depth = 0
+        self._started_tracemalloc = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def start(self) -> None:
+        """Start tracing memory allocations"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._snapshot = tracemalloc.take_snapshot()
+
+    @contextlib.contextmanager
+    def measure(self, name: str):
+        """Profile the enclosed code"""
+        if self._depth == 0:
+            try:
+                self.profile.enable()
+            except ValueError:
+                # another profiler is active; fall back to wall time only
+                self.profile_enabled = False
+            else:
+                self.profile_enabled = True
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.setdefault(name, []).append(time.perf_counter() - start)
+            self._depth -= 1
+            if self._depth == 0 and self.profile_enabled:
+                self.profile.disable()
+
+    def stop(self) -> str:
+        """Stop the session and render the collected data"""
+        if self._depth and self.profile_enabled:
+            self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        out = io.StringIO()
+        out.write(f"Nature Remo profile started at {time.ctime(self.started_at)}, ")
+        out.write(f"lasting {time.time() - self.started_at:.1f}s\n\n")
+        out.write("== Wall time per function ==\n")
+        for name, times in sorted(self.timings.items()):
+            out.write(
+                f"{name}: {len(times)} calls, total {sum(times):.4f}s, "
+                f"mean {sum(times) / len(times):.4f}s, max {max(times):.4f}s\n"
+            )
+        out.write("\n== cProfile (cumulative) ==\n")
+        try:
+            stats = pstats.Stats(self.profile, stream=out)
+        except TypeError:
+            out.write("no samples collected\n")
+        else:
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(40)
+        out.write("\n== Memory allocated by the integration ==\n")
+        package_filter = tracemalloc.Filter(True, os.path.join(PACKAGE_DIR, "*"))
+        diff = snapshot.filter_traces([package_filter]).compare_to(
+            self._snapshot.filter_traces([package_filter]), "lineno"
+        )
+        for stat in diff[:20]:
+            out.write(f"{stat}\n")
+        return out.getvalue()
+
+
+_session: Optional[ProfileSession] = None
+
+
+def profiled(func):
+    """Profile the decorated function while a session is running"""
+    name = func.__qualname__
+    if asyncio.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if (session := _session) is None:
+                return await func(*args, **kwargs)
+            with session.measure(name):
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if (session := _session) is None:
+            return func(*args, **kwargs)
+        with session.measure(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def write_report(path: str, report: str) -> None:
+    """Write the report to a file"""
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(report)
+
+
+async def async_profile(duration: float, path: str) -> None:
+    """Profile the integration for `duration` seconds and write the report"""
+    global _session  # pylint: disable=global-statement
+    if _session is not None:
+        raise RuntimeError("A profiling session is already running")
+    session = _session = ProfileSession()
+    try:
+        session.start()
+        await asyncio.sleep(duration)
+    finally:
+        _session = None
+        report = session.stop()
+    await asyncio.get_running_loop().run_in_executor(None, write_report, path, report)
+    _LOGGER.info("Profile written to %s", path)
@@ -0,0 +1,90 @@
+"""File for scheduling signal transmission on remo devices"""
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+import time
+from typing import Any, Optional
+
+from .const import MIN_SIGNAL_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EmitterStats:
+    """Class storing transmission statistics of one remo device."""
+
+    def __init__(self) -> None:
+        self.queue_depth = 0
+        self.sent = 0
+        self.last_wait = 0.0
+        self.max_wait = 0.0
+        self.total_wait = 0.0
+
+    def record_wait(self, wait: float) -> None:
+        """Record the time a transmission waited for its turn"""
+        self.sent += 1
+        self.last_wait = wait
+        self.max_wait = max(self.max_wait, wait)
+        self.total_wait += wait
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summarize the statistics"""
+        return {
+            "queue_depth": self.queue_depth,
+            "sent": self.sent,
+            "last_wait": round(self.last_wait, 3),
+            "max_wait": round(self.max_wait, 3),
+            "mean_wait": round(self.total_wait / self.sent, 3) if self.sent else 0.0,
+        }
+
+
+class TransmitScheduler:
+    """Class serializing transmissions per remo device.
+
+    Signals sent through the same remo are sent one by one with at least
+    `min_interval` seconds in between, so that IR frames do not collide.
+    Signals sent through different remos are not delayed by each other.
+    """
+
+    def __init__(self, min_interval: float = MIN_SIGNAL_INTERVAL) -> None:
+        self.min_interval = min_interval
+        self.stats: dict[str, EmitterStats] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._last_sent: dict[str, float] = {}
+
+    async def transmit(
+        self, mac: Optional[str], send: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Run `send` once the remo with given mac address is free"""
+        if mac is None:
+            # the emitter is unknown, so there is nothing to serialize against
+            return await send()
+        stats = self.stats.setdefault(mac, EmitterStats())
+        lock = self._locks.setdefault(mac, asyncio.Lock())
+        enqueued_at = time.monotonic()
+        stats.queue_depth += 1
+        try:
+            async with lock:
+                last_sent = self._last_sent.get(mac)
+                if last_sent is not None:
+                    gap = last_sent + self.min_interval - time.monotonic()
+                    if gap > 0:
+                        await asyncio.sleep(gap)
+                wait = time.monotonic() - enqueued_at
+                stats.record_wait(wait)
+                _LOGGER.debug(
+                    "Transmitting via %s after waiting %.3fs (%d queued)",
+                    mac,
+                    wait,
+                    stats.queue_depth - 1,
+                )
+                try:
+                    return await send()
+                finally:
+                    self._last_sent[mac] = time.monotonic()
+        finally:
+            stats.queue_depth -= 1
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        """Report queue depth and wait time of each remo device"""
+        return {mac: stats.as_dict() for mac, stats in self.stats.items()}
@@ -6,43 +6,27 @@ import voluptuous as vol
 
 from homeassistant.components.select import (
     ATTR_OPTION,
+    ATTR_OPTIONS,
     SERVICE_SELECT_OPTION,
     SelectEntity,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv, entity_platform
 
 from .api import RemoAPI
 from .const import DOMAIN, Appliance, Appliances, NoSignalError, Signal
+from .index import (
+    SignalCatalog,
+    SignalIndex,
+    extract_general_appliance,
+    extract_light_appliance,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def extract_general_appliance(properties: dict) -> Appliance:
-    """Build general Appliance from given properties"""
-    app_id, app_name = properties["id"], properties["nickname"]
-    signals = []
-    for signal in properties.get("signals", []):
-        signal_id, signal_name = signal["id"], signal["name"]
-        signals.append(Signal(signal_id, signal_name))
-    if signals:
-        return Appliance(app_id, app_name, signals)
-    else:
-        raise NoSignalError
-
-
-def extract_light_appliance(properties: dict) -> Appliance:
-    """Build light Appliance from given properties"""
-    app_id, app_name = properties["id"], properties["nickname"]
-    light_signals = [button["name"] for button in properties["light"]["buttons"]]
-    ir_signals = []
-    for signal in properties.get("signals", []):
-        signal_id, signal_name = signal["id"], signal["name"]
-        ir_signals.append(Signal(signal_id, signal_name))
-    return Appliance(app_id, app_name, light_signals + ir_signals)
-
-
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -58,6 +42,7 @@ async def async_setup_entry(
     entities = []
     api: RemoAPI = hass.data[DOMAIN][entry.entry_id]["api"]
     appliances: Appliances = hass.data[DOMAIN][entry.entry_id]["appliances"]
+    index: SignalIndex = hass.data[DOMAIN][entry.entry_id]["signal_index"]
     hass.data[DOMAIN][entry.entry_id]["signal_appliances"] = []
     hass.data[DOMAIN][entry.entry_id]["signal_entities"] = []
     for properties in appliances.others:
@@ -69,13 +54,13 @@ async def async_setup_entry(
             )
         else:
             hass.data[DOMAIN][entry.entry_id]["signal_appliances"].append(appliance)
-            signal_entity = SignalEntity(appliance, api)
+            signal_entity = SignalEntity(appliance, api, index.catalogs[appliance.id])
             hass.data[DOMAIN][entry.entry_id]["signal_entities"].append(signal_entity)
             entities.append(signal_entity)
     for properties in appliances.light:
         appliance: Appliance = extract_light_appliance(properties)
         hass.data[DOMAIN][entry.entry_id]["signal_appliances"].append(appliance)
-        signal_entity = LightSignalEntity(appliance, api)
+        signal_entity = LightSignalEntity(appliance, api, index.catalogs[appliance.id])
         hass.data[DOMAIN][entry.entry_id]["signal_entities"].append(signal_entity)
         entities.append(signal_entity)
     async_add_entities(entities)
@@ -85,61 +70,61 @@ class SignalEntity(SelectEntity):
     """Class for containing signals"""
 
     _attr_has_entity_name = True
+    # the catalog is served by the signal index; keep it out of the history
+    _unrecorded_attributes = frozenset({ATTR_OPTIONS})
 
-    def __init__(self, appliance: Appliance, api: RemoAPI) -> None:
+    def __init__(
+        self, appliance: Appliance, api: RemoAPI, catalog: SignalCatalog
+    ) -> None:
         self.api = api
         self._attr_name = f"Signals @ {appliance.name}"
         self._attr_unique_id = f"Signals @ {appliance.id}"
-        self.signals: list[Signal] = appliance.signals
-        self._attr_options = [
-            f"{i+1}. {signal.name}" for i, signal in enumerate(self.signals)
-        ]
-        self._attr_current_option = self._attr_options[0]
-        self.option_idx_map = {option: i for i, option in enumerate(self._attr_options)}
-        self.current_option_idx = 0
+        self.catalog = catalog
+        self.signals: list[Signal] = catalog.signals
+        self._attr_options = catalog.options
+        self._attr_current_option = catalog.options[0]
 
     def select_option(self, option: str) -> None:
         """Change the selected option."""
+        if option not in self.catalog.positions:
+            raise HomeAssistantError(f"{option} is not an option of {self.name}")
         self._attr_current_option = option
-        self.current_option_idx = self.option_idx_map[option]
 
-    async def send_signal(self):
-        """Send signal of current selection"""
-        signal_id = self.signals[self.current_option_idx].id
-        return await self.api.send_ir_signal(signal_id)
+    async def send_signal(self, option: str | None = None):
+        """Send signal of given option, or of current selection if not given"""
+        signal = self.catalog.signal(option or self._attr_current_option)
+        return await self.api.send_ir_signal(signal.id)
 
 
 class LightSignalEntity(SelectEntity):
     """Class for containing signals of lights"""
 
     _attr_has_entity_name = True
+    # the catalog is served by the signal index; keep it out of the history
+    _unrecorded_attributes = frozenset({ATTR_OPTIONS})
 
-    @staticmethod
-    def signal_to_str(button: str | Signal):
-        return button.name if isinstance(button, Signal) else button
-
-    def __init__(self, appliance: Appliance, api: RemoAPI) -> None:
+    def __init__(
+        self, appliance: Appliance, api: RemoAPI, catalog: SignalCatalog
+    ) -> None:
         self.api = api
         self.light_id = appliance.id
-        self.buttons: list[str | Signal] = appliance.signals
+        self.catalog = catalog
+        self.buttons: list[str | Signal] = catalog.signals
         self._attr_name = f"Signals @ {appliance.name}"
         self._attr_unique_id = f"Signals @ {appliance.id}"
-        self._attr_options = [
-            f"{i+1}. {self.signal_to_str(signal)}"
-            for i, signal in enumerate(self.buttons)
-        ]
-        self._attr_current_option = self._attr_options[0]
-        self.current_button = self.buttons[0]
-        self.option_idx_map = {option: i for i, option in enumerate(self._attr_options)}
+        self._attr_options = catalog.options
+        self._attr_current_option = catalog.options[0]
 
     def select_option(self, option: str) -> None:
         """Change the selected option."""
+        if option not in self.catalog.positions:
+            raise HomeAssistantError(f"{option} is not an option of {self.name}")
         self._attr_current_option = option
-        self.current_button = self.buttons[self.option_idx_map[option]]
-
-    async def send_signal(self):
-        """Send signal of current selection"""
-        if isinstance(self.current_button, Signal):
-            return await self.api.send_ir_signal(self.current_button.id)
-        elif isinstance(self.current_button, str):
-            return await self.api.send_light_signal(self.light_id, self.current_button)
+
+    async def send_signal(self, option: str | None = None):
+        """Send signal of given option, or of current selection if not given"""
+        button = self.catalog.signal(option or self._attr_current_option)
+        if isinstance(button, Signal):
+            return await self.api.send_ir_signal(button.id)
+        elif isinstance(button, str):
+            return await self.api.send_light_signal(self.light_id, button)
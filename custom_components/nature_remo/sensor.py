@@ -1,7 +1,7 @@
 """File defining temperature sensor"""
 import datetime
 import logging
-import time
+from typing import Optional
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -12,30 +12,54 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     LIGHT_LUX,
     PERCENTAGE,
+    EntityCategory,
     UnitOfEnergy,
     UnitOfPower,
     UnitOfTemperature,
 )
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import area_registry as ar, entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-)
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .api import RemoAPI
+from .aggregate import AGGREGATE_FIELDS, SensorAggregator
 from .const import (
+    CONF_AGGREGATE_BY_AREA,
     DOMAIN,
     ENERGY_UNIT_COEFFICIENT_MAP,
     EPC_ITEM_NAME_MAP,
     EPC_ITEM_VALUE_MAP,
     EPC_ITEMS,
     EPC_VALUE_ITEM_MAP,
+    ROLLOVER_WRITE_DELAY,
     Appliances,
     SensorData,
 )
+from .coordinator import (
+    ApplianceCoordinator,
+    LocalMeterCoordinator,
+    SensorCoordinator,
+)
+from .watchdog import LoopWatchdog
 
 _LOGGER = logging.getLogger(__name__)
+# unique id prefixes of the sensors an area can be assigned to
+SENSOR_PREFIXES = ("Temperature Sensor", "Humidity Sensor", "Illuminance Sensor")
+AGGREGATE_LABELS = {
+    "temperature_mean": "Mean Temperature",
+    "temperature_min": "Min Temperature",
+    "temperature_max": "Max Temperature",
+    "humidity_mean": "Mean Humidity",
+    "humidity_min": "Min Humidity",
+    "humidity_max": "Max Humidity",
+    "illuminance_total": "Total Illuminance",
+}
+FIELD_DEVICE_CLASSES = {
+    "temperature": (SensorDeviceClass.TEMPERATURE, UnitOfTemperature.CELSIUS),
+    "humidity": (SensorDeviceClass.HUMIDITY, PERCENTAGE),
+    "illuminance": (SensorDeviceClass.ILLUMINANCE, LIGHT_LUX),
+}
 
 
 async def async_setup_entry(
@@ -43,11 +67,10 @@ async def async_setup_entry(
 ) -> None:
     """Set up nature remo sensors from a config entry."""
     sensors = []
-    api: RemoAPI = hass.data[DOMAIN][entry.entry_id]["api"]
-    sensor_data_dic: dict[str, SensorData] = await api.fecth_sensor_data()
-    device_name_dic: dict[str, str] = await api.fetch_device_name()
-    coordinator = SensorCoordinator(hass, api)
-    hass.data[DOMAIN][entry.entry_id]["sensor_coordinator"] = coordinator
+    store = hass.data[DOMAIN][entry.entry_id]
+    sensor_data_dic: dict[str, SensorData] = store["sensor_data"]
+    device_name_dic: dict[str, str] = store["device_names"]
+    coordinator: SensorCoordinator = store["sensor_coordinator"]
     for mac, sensor_data in sensor_data_dic.items():
         device_name = device_name_dic[mac]
         if (val := sensor_data.temperature) is not None:
@@ -58,12 +81,15 @@ async def async_setup_entry(
             sensors.append(IlluminanceSensor(coordinator, mac, device_name, val))
         if (val := sensor_data.movement) is not None:
             sensors.append(MovementSensor(coordinator, mac, device_name, val))
-    appliances: Appliances = hass.data[DOMAIN][entry.entry_id]["appliances"]
-    coordinator = ApplianceCoordinator(hass, api)
-    hass.data[DOMAIN][entry.entry_id]["appliance_coordinator"] = coordinator
+    appliances: Appliances = store["appliances"]
+    meter_coordinators: dict[str, LocalMeterCoordinator] = store["meter_coordinators"]
     for properties in appliances.power_energy_meter:
         mac = properties["device"]["mac_address"]
         device_name = device_name_dic[mac]
+        # prefer the local network when the meter is reachable over it
+        coordinator: ApplianceCoordinator | LocalMeterCoordinator = (
+            meter_coordinators.get(mac, store["appliance_coordinator"])
+        )
         epc_items = {
             EPC_VALUE_ITEM_MAP[p["epc"]]
             for p in properties["smart_meter"]["echonetlite_properties"]
@@ -77,22 +103,61 @@ async def async_setup_entry(
             sensors.append(
                 PowerEnergyMeter(epc_item, coordinator, mac, device_name, properties)
             )
-    hass.data[DOMAIN][entry.entry_id]["sensors"] = sensors
+    groups = aggregate_groups(hass, entry, sensor_data_dic)
+    if groups:
+        sensor_coordinator: SensorCoordinator = store["sensor_coordinator"]
+        aggregator = SensorAggregator(
+            sensor_coordinator, {group: macs for group, (_, macs) in groups.items()}
+        )
+        for group, (group_name, _) in groups.items():
+            for name in AGGREGATE_FIELDS:
+                if aggregator.get(group, name) is not None:
+                    sensors.append(
+                        AggregateSensor(
+                            sensor_coordinator,
+                            aggregator,
+                            entry.entry_id,
+                            group,
+                            group_name,
+                            name,
+                        )
+                    )
+    if (watchdog := store.get("watchdog")) is not None:
+        sensors.append(LoopStallSensor(watchdog, entry.entry_id))
+    store["sensors"] = sensors
     async_add_entities(sensors)
 
 
-class SensorCoordinator(DataUpdateCoordinator):
-    """Coordinator for polling Remo sensor data"""
-
-    def __init__(self, hass: HomeAssistant, api: RemoAPI) -> None:
-        self.api = api
-        super().__init__(
-            hass,
-            _LOGGER,
-            name="Remo API Coordinator for sensors",
-            update_interval=datetime.timedelta(seconds=60),
-            update_method=self.api.fecth_sensor_data,
-        )
+def aggregate_groups(
+    hass: HomeAssistant, entry: ConfigEntry, sensor_data: dict[str, SensorData]
+) -> dict[str, tuple[str, list[str]]]:
+    """Find the groups of Remo devices to aggregate, with their names.
+
+    The whole home is a group when there are several devices. With the
+    aggregate_by_area option, each area assigned to a sensor entity of a
+    device is a group too.
+    """
+    groups = {}
+    if len(sensor_data) > 1:
+        groups["home"] = ("Home", list(sensor_data))
+    if not entry.options.get(CONF_AGGREGATE_BY_AREA):
+        return groups
+    entity_registry = er.async_get(hass)
+    area_registry = ar.async_get(hass)
+    for mac in sensor_data:
+        for prefix in SENSOR_PREFIXES:
+            entity_id = entity_registry.async_get_entity_id(
+                "sensor", DOMAIN, f"{prefix} @ {mac}"
+            )
+            if entity_id is None:
+                continue
+            registry_entry = entity_registry.async_get(entity_id)
+            if registry_entry.area_id and (
+                area := area_registry.async_get_area(registry_entry.area_id)
+            ):
+                groups.setdefault(area.id, (area.name, []))[1].append(mac)
+                break
+    return groups
 
 
 class TemperatureSensor(CoordinatorEntity, SensorEntity):
@@ -101,14 +166,14 @@ class TemperatureSensor(CoordinatorEntity, SensorEntity):
     _attr_unit_of_measurement = UnitOfTemperature.CELSIUS
     _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
     _attr_has_entity_name = True
-    _attr_should_poll = True
+    _attr_should_poll = False
     _attr_device_info = {}
     _attr_device_class = SensorDeviceClass.TEMPERATURE
     _attr_state_class = SensorStateClass.MEASUREMENT
 
     def __init__(self, coordinator, mac, name, init_val) -> None:
         # this step sets self.coordinator
-        super().__init__(coordinator)
+        super().__init__(coordinator, "temperature")
         self.mac = mac
         self._attr_unique_id = f"Temperature Sensor @ {mac}"
         self._attr_name = f"Temperature Sensor @ {name}"
@@ -127,14 +192,14 @@ class HumiditySensor(CoordinatorEntity, SensorEntity):
     _attr_unit_of_measurement = PERCENTAGE
     _attr_native_unit_of_measurement = PERCENTAGE
     _attr_has_entity_name = True
-    _attr_should_poll = True
+    _attr_should_poll = False
     _attr_device_info = {}
     _attr_device_class = SensorDeviceClass.HUMIDITY
     _attr_state_class = SensorStateClass.MEASUREMENT
 
     def __init__(self, coordinator, mac, name, init_val) -> None:
         # this step sets self.coordinator
-        super().__init__(coordinator)
+        super().__init__(coordinator, "humidity")
         self.mac = mac
         self._attr_unique_id = f"Humidity Sensor @ {mac}"
         self._attr_name = f"Humidity Sensor @ {name}"
@@ -153,14 +218,14 @@ class IlluminanceSensor(CoordinatorEntity, SensorEntity):
     _attr_unit_of_measurement = LIGHT_LUX
     _attr_native_unit_of_measurement = LIGHT_LUX
     _attr_has_entity_name = True
-    _attr_should_poll = True
+    _attr_should_poll = False
     _attr_device_info = {}
     _attr_device_class = SensorDeviceClass.ILLUMINANCE
     _attr_state_class = SensorStateClass.MEASUREMENT
 
     def __init__(self, coordinator, mac, name, init_val) -> None:
         # this step sets self.coordinator
-        super().__init__(coordinator)
+        super().__init__(coordinator, "illuminance")
         self.mac = mac
         self._attr_unique_id = f"Illuminance Sensor @ {mac}"
         self._attr_name = f"Illuminance Sensor @ {name}"
@@ -177,7 +242,7 @@ class MovementSensor(CoordinatorEntity, SensorEntity):
     """Class providing movement sensor function"""
 
     _attr_has_entity_name = True
-    _attr_should_poll = True
+    _attr_should_poll = False
     _attr_device_info = {}
     _attr_device_class = SensorDeviceClass.TIMESTAMP
 
@@ -187,7 +252,7 @@ class MovementSensor(CoordinatorEntity, SensorEntity):
 
     def __init__(self, coordinator, mac, name, init_val) -> None:
         # this step sets self.coordinator
-        super().__init__(coordinator)
+        super().__init__(coordinator, "movement")
         self.mac = mac
         self._attr_unique_id = f"Movement Sensor @ {mac}"
         self._attr_name = f"Movement Sensor @ {name}"
@@ -201,25 +266,81 @@ class MovementSensor(CoordinatorEntity, SensorEntity):
         self.async_write_ha_state()
 
 
-class ApplianceCoordinator(DataUpdateCoordinator):
-    """Coordinator for polling appliance data"""
+class AggregateSensor(CoordinatorEntity, SensorEntity):
+    """Class providing an aggregate of the sensors of several Remo devices"""
 
-    def __init__(self, hass: HomeAssistant, api: RemoAPI) -> None:
-        self.api = api
-        super().__init__(
-            hass,
-            _LOGGER,
-            name="Remo API Coordinator for appliances",
-            update_interval=datetime.timedelta(seconds=60),
-            update_method=self.api.fetch_appliance,
-        )
+    _attr_has_entity_name = True
+    _attr_device_info = {}
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: SensorCoordinator,
+        aggregator: SensorAggregator,
+        entry_id: str,
+        group: str,
+        group_name: str,
+        name: str,
+    ) -> None:
+        field = AGGREGATE_FIELDS[name]
+        # this step sets self.coordinator
+        super().__init__(coordinator, field)
+        self.aggregator = aggregator
+        self.group = group
+        self.aggregate_name = name
+        self._attr_unique_id = f"{AGGREGATE_LABELS[name]} @ {entry_id}/{group}"
+        self._attr_name = f"{AGGREGATE_LABELS[name]} @ {group_name}"
+        device_class, unit = FIELD_DEVICE_CLASSES[field]
+        self._attr_device_class = device_class
+        self._attr_native_unit_of_measurement = unit
+        self._attr_native_value = aggregator.get(group, name)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._attr_native_value = self.aggregator.get(self.group, self.aggregate_name)
+        self.async_write_ha_state()
+
+
+class LoopStallSensor(SensorEntity):
+    """Class providing the number of event loop stalls caused by the integration"""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_device_info = {}
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_value = 0
+    _unrecorded_attributes = frozenset({"stalls", "last_stack"})
+
+    def __init__(self, watchdog: LoopWatchdog, entry_id: str) -> None:
+        self.watchdog = watchdog
+        self._attr_unique_id = f"Event Loop Stalls @ {entry_id}"
+        self._attr_name = "Event Loop Stalls @ Nature Remo"
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.watchdog.listeners.append(self._handle_stall)
+        self.async_on_remove(lambda: self.watchdog.listeners.remove(self._handle_stall))
+
+    @callback
+    def _handle_stall(self) -> None:
+        stats = self.watchdog.stats
+        self._attr_native_value = sum(s.count for s in stats.values())
+        worst = max(stats, key=lambda name: stats[name].max_duration)
+        self._attr_extra_state_attributes = {
+            "stalls": self.watchdog.report(),
+            "worst": worst,
+            "last_stack": stats[worst].last_stack,
+        }
+        self.async_write_ha_state()
 
 
 class PowerEnergyMeter(CoordinatorEntity, SensorEntity):
     """Class providing electricity or power meter function"""
 
     _attr_has_entity_name = True
-    _attr_should_poll = True
+    _attr_should_poll = False
     _attr_device_info = {}
     _attr_native_value = 0.0
 
@@ -233,7 +354,7 @@ class PowerEnergyMeter(CoordinatorEntity, SensorEntity):
 
     def __init__(self, epc_item, coordinator, mac, name, init_properties) -> None:
         # this step sets self.coordinator
-        super().__init__(coordinator)
+        super().__init__(coordinator, "power_energy_meter")
         self.epc_item = epc_item
         self.epc_value = EPC_ITEM_VALUE_MAP[epc_item]
         self.epc_name = EPC_ITEM_NAME_MAP[epc_item]
@@ -262,20 +383,44 @@ class PowerEnergyMeter(CoordinatorEntity, SensorEntity):
             self.coefficient = float(energy_coefficient * energy_unit_coefficient)
             self.max_value = float(self.coefficient * int("9" * energy_max_digits))
 
+        self._rollover_unsub: Optional[CALLBACK_TYPE] = None
+        self._pending_value = 0.0
         self.update_state(init_properties)
 
-    def update_state(self, properties: dict):
+    def update_state(self, properties: dict) -> bool:
+        """Update the value, returning False if it is written later"""
         raw_val = self.get_raw_value(properties, self.epc_item)
         if self.epc_item == EPC_ITEMS.power:
             self._attr_native_value = raw_val
-        else:
-            value = float(self.coefficient * raw_val)
-            if value < self._attr_native_value:
-                # reseted since last update
-                self._attr_native_value = self.max_value
-                self.async_write_ha_state()
-                time.sleep(1.0)
-            self._attr_native_value = value
+            return True
+        value = float(self.coefficient * raw_val)
+        if self._rollover_unsub is not None:
+            # still showing the top of the meter; write the newest value then
+            self._pending_value = value
+            return False
+        if value < self._attr_native_value:
+            # reseted since last update: record the top of the meter first,
+            # and the new value a moment later so that both states are kept
+            self._attr_native_value = self.max_value
+            self._pending_value = value
+            self._rollover_unsub = async_call_later(
+                self.hass, ROLLOVER_WRITE_DELAY, self._write_pending_value
+            )
+            return True
+        self._attr_native_value = value
+        return True
+
+    @callback
+    def _write_pending_value(self, _now: datetime.datetime) -> None:
+        self._rollover_unsub = None
+        self._attr_native_value = self._pending_value
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        if self._rollover_unsub is not None:
+            self._rollover_unsub()
+            self._rollover_unsub = None
+        await super().async_will_remove_from_hass()
 
     @callback
     def _handle_coordinator_update(self) -> None:
@@ -285,5 +430,5 @@ class PowerEnergyMeter(CoordinatorEntity, SensorEntity):
             for p in self.coordinator.data.power_energy_meter
             if p["device"]["mac_address"] == self.mac
         )
-        self.update_state(properties)
-        self.async_write_ha_state()
+        if self.update_state(properties):
+            self.async_write_ha_state()
@@ -0,0 +1,232 @@
+"""File defining integration-wide services"""
+import asyncio
+import datetime
+import functools
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+import homeassistant.components.climate as Climate
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_STATE, ATTR_TEMPERATURE
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity import Entity
+
+from .const import (
+    BATCH_CONCURRENCY,
+    DOMAIN,
+    SERVICE_APPLY_BATCH,
+    SERVICE_PROFILE,
+    SERVICE_SEND_SIGNAL,
+)
+from .index import IndexedSignal, SignalIndex, signal_name
+from .profiler import async_profile
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_ITEMS = "items"
+ATTR_OPTION = "option"
+ATTR_APPLIANCE = "appliance"
+ATTR_SIGNAL = "signal"
+ATTR_SIGNAL_ID = "signal_id"
+ATTR_TARGETS = "targets"
+ATTR_DURATION = "duration"
+
+BATCH_ITEM_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+        vol.Optional(ATTR_STATE): vol.In(["on", "off", "toggle"]),
+        vol.Optional(Climate.const.ATTR_HVAC_MODE): vol.Coerce(
+            Climate.const.HVACMode
+        ),
+        vol.Optional(ATTR_TEMPERATURE): vol.Coerce(float),
+        vol.Optional(Climate.const.ATTR_FAN_MODE): cv.string,
+        vol.Optional(Climate.const.ATTR_SWING_MODE): cv.string,
+        vol.Optional(ATTR_OPTION): cv.string,
+    }
+)
+APPLY_BATCH_SCHEMA = vol.Schema(
+    {vol.Required(ATTR_ITEMS): vol.All(cv.ensure_list, [BATCH_ITEM_SCHEMA])}
+)
+
+SIGNAL_TARGET_SCHEMA = vol.Any(
+    vol.Schema({vol.Required(ATTR_SIGNAL_ID): cv.string}),
+    vol.Schema(
+        {vol.Required(ATTR_APPLIANCE): cv.string, vol.Required(ATTR_SIGNAL): cv.string}
+    ),
+)
+SEND_SIGNAL_SCHEMA = vol.Any(
+    SIGNAL_TARGET_SCHEMA,
+    vol.Schema(
+        {vol.Required(ATTR_TARGETS): vol.All(cv.ensure_list, [SIGNAL_TARGET_SCHEMA])}
+    ),
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=60.0): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=600)
+        )
+    }
+)
+
+
+def find_entity(hass: HomeAssistant, entity_id: str) -> Entity | None:
+    """Find the entity object registered by this integration"""
+    for platform in entity_platform.async_get_platforms(hass, DOMAIN):
+        if (entity := platform.entities.get(entity_id)) is not None:
+            return entity
+    return None
+
+
+async def apply_climate_item(entity: Entity, item: dict[str, Any]) -> None:
+    """Apply the target state to an air conditioner with a single command"""
+    hvac_mode = item.get(Climate.const.ATTR_HVAC_MODE)
+    if hvac_mode is None and item.get(ATTR_STATE) == "on":
+        hvac_mode = entity.last_hvac_mode
+    elif hvac_mode is None and item.get(ATTR_STATE) == "off":
+        hvac_mode = Climate.const.HVACMode.OFF
+    await entity.async_set_ac_state(
+        hvac_mode=hvac_mode,
+        temperature=item.get(ATTR_TEMPERATURE),
+        fan_mode=item.get(Climate.const.ATTR_FAN_MODE),
+        swing_mode=item.get(Climate.const.ATTR_SWING_MODE),
+    )
+
+
+async def apply_light_item(entity: Entity, item: dict[str, Any]) -> None:
+    """Apply the target state to a light"""
+    state = item.get(ATTR_STATE)
+    if state == "on":
+        await entity.async_turn_on()
+    elif state == "off":
+        await entity.async_turn_off()
+    elif state == "toggle":
+        await entity.async_toggle()
+
+
+async def apply_batch_item(hass: HomeAssistant, item: dict[str, Any]) -> None:
+    """Apply the target state of one batch item"""
+    entity_id = item[ATTR_ENTITY_ID]
+    if (entity := find_entity(hass, entity_id)) is None:
+        raise ValueError(f"{entity_id} is not a nature_remo entity")
+    domain = entity.platform.domain
+    if domain == "climate":
+        await apply_climate_item(entity, item)
+    elif domain == "light":
+        await apply_light_item(entity, item)
+        entity.async_write_ha_state()
+    elif domain == "select":
+        await entity.send_signal(item.get(ATTR_OPTION))
+    elif domain == "button":
+        await entity.signal_entity.send_signal(item.get(ATTR_OPTION))
+    else:
+        raise ValueError(f"{entity_id} cannot be controlled in a batch")
+
+
+async def async_apply_batch(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Apply target states to many appliances concurrently"""
+    semaphore = asyncio.Semaphore(batch_concurrency(hass))
+
+    async def apply(item: dict[str, Any]) -> dict[str, Any]:
+        async with semaphore:
+            try:
+                await apply_batch_item(hass, item)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.warning("Failed to apply %s: %s", item[ATTR_ENTITY_ID], err)
+                return {
+                    ATTR_ENTITY_ID: item[ATTR_ENTITY_ID],
+                    "success": False,
+                    "error": str(err) or type(err).__name__,
+                }
+            return {ATTR_ENTITY_ID: item[ATTR_ENTITY_ID], "success": True}
+
+    results = await asyncio.gather(*(apply(item) for item in call.data[ATTR_ITEMS]))
+    return {"results": list(results)}
+
+
+def batch_concurrency(hass: HomeAssistant) -> int:
+    """Concurrency limit of batch services, the lowest of all entries"""
+    return min(
+        (store["api"].concurrency for store in hass.data.get(DOMAIN, {}).values()),
+        default=BATCH_CONCURRENCY,
+    )
+
+
+def resolve_signal(
+    hass: HomeAssistant, target: dict[str, str]
+) -> tuple[dict, IndexedSignal]:
+    """Find the signal and the config entry owning it"""
+    for store in hass.data.get(DOMAIN, {}).values():
+        index: SignalIndex = store["signal_index"]
+        if (entry := index.lookup(**target)) is not None:
+            return store, entry
+    raise HomeAssistantError(f"No signal found for {target}")
+
+
+async def async_send_signal(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Send signals resolved by name or id without touching select entities"""
+    targets = call.data.get(ATTR_TARGETS, [call.data])
+    resolved = [resolve_signal(hass, dict(target)) for target in targets]
+    semaphore = asyncio.Semaphore(batch_concurrency(hass))
+
+    async def send(store: dict, entry: IndexedSignal) -> dict[str, Any]:
+        result = {
+            ATTR_APPLIANCE: entry.appliance_name,
+            ATTR_SIGNAL: signal_name(entry.signal),
+        }
+        async with semaphore:
+            try:
+                await SignalIndex.send(store["api"], entry)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.warning("Failed to send %s: %s", result, err)
+                error = str(err) or type(err).__name__
+                return result | {"success": False, "error": error}
+        return result | {"success": True}
+
+    results = await asyncio.gather(*(send(*r) for r in resolved))
+    return {"results": list(results)}
+
+
+async def async_run_profile(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Profile the integration for a while and write the report to a file"""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = hass.config.path(f"nature_remo_profile_{timestamp}.txt")
+    try:
+        await async_profile(call.data[ATTR_DURATION], path)
+    except RuntimeError as err:
+        raise HomeAssistantError(str(err)) from err
+    return {"path": path}
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register integration-wide services"""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_BATCH,
+        # ServiceCall does not carry hass in older Home Assistant versions
+        functools.partial(async_apply_batch, hass),
+        schema=APPLY_BATCH_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEND_SIGNAL,
+        functools.partial(async_send_signal, hass),
+        schema=SEND_SIGNAL_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        functools.partial(async_run_profile, hass),
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,95 @@
+"""File providing a bulk state snapshot over the websocket API"""
+from typing import Any, Optional
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, WS_TYPE_SNAPSHOT, Appliances
+from .coordinator import (
+    ApplianceCoordinator,
+    LocalMeterCoordinator,
+    SensorCoordinator,
+)
+from .index import SignalIndex, signal_name
+
+
+def meter_values(appliances: Appliances) -> dict[str, dict[int, str]]:
+    """Raw ECHONET Lite values of each smart meter, keyed by EPC"""
+    return {
+        properties["device"]["mac_address"]: {
+            p["epc"]: p["val"]
+            for p in properties["smart_meter"]["echonetlite_properties"]
+        }
+        for properties in appliances.power_energy_meter
+    }
+
+
+def build_sections(store: dict) -> dict[str, tuple[int, Any]]:
+    """Build every snapshot section with the revision it was last changed at"""
+    sensor_coordinator: SensorCoordinator = store["sensor_coordinator"]
+    appliance_coordinator: ApplianceCoordinator = store["appliance_coordinator"]
+    meter_coordinators: dict[str, LocalMeterCoordinator] = store["meter_coordinators"]
+    index: SignalIndex = store["signal_index"]
+    device_names: dict[str, str] = store["device_names"]
+    meters = meter_values(appliance_coordinator.data)
+    meters_revision = appliance_coordinator.revision
+    for coordinator in meter_coordinators.values():
+        meters.update(meter_values(coordinator.data or Appliances([], [], [], [])))
+        meters_revision = max(meters_revision, coordinator.revision)
+    return {
+        "devices": (
+            sensor_coordinator.revision,
+            {
+                mac: {"name": device_names.get(mac)} | data._asdict()
+                for mac, data in sensor_coordinator.data.items()
+            },
+        ),
+        "ac": (
+            appliance_coordinator.revision,
+            {ac["id"]: ac.get("settings") for ac in appliance_coordinator.data.ac},
+        ),
+        "meters": (meters_revision, meters),
+        # the catalog never changes while the entry is loaded
+        "signals": (
+            0,
+            {
+                appliance.id: {
+                    "name": appliance.name,
+                    "signals": [signal_name(s) for s in appliance.signals],
+                }
+                for appliance in index.appliances
+            },
+        ),
+    }
+
+
+def build_snapshot(hass: HomeAssistant, since: Optional[int]) -> dict[str, Any]:
+    """Build the snapshot of every entry, only with sections after `since`"""
+    entries, revision = {}, 0
+    for entry_id, store in hass.data.get(DOMAIN, {}).items():
+        entry_snapshot = {}
+        for section, (section_revision, data) in build_sections(store).items():
+            revision = max(revision, section_revision)
+            if since is None or section_revision > since:
+                entry_snapshot[section] = data
+        entries[entry_id] = entry_snapshot
+    return {"revision": revision, "entries": entries}
+
+
+@websocket_api.websocket_command(
+    {vol.Required("type"): WS_TYPE_SNAPSHOT, vol.Optional("since"): int}
+)
+@callback
+def websocket_snapshot(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Send the current state of every Nature Remo device in one message"""
+    connection.send_result(msg["id"], build_snapshot(hass, msg.get("since")))
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    """Register websocket commands"""
+    websocket_api.async_register_command(hass, websocket_snapshot)
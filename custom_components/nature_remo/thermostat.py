@@ -0,0 +1,73 @@
+"""File for controlling air conditioners locally with hysteresis"""
+import collections
+import time
+from typing import Any, Optional
+
+import homeassistant.components.climate as Climate
+
+# modes the controller can hold a setpoint in; dry mode holds humidity
+CONTROLLED_MODES = (
+    Climate.const.HVACMode.COOL,
+    Climate.const.HVACMode.HEAT,
+    Climate.const.HVACMode.DRY,
+)
+
+
+class HysteresisController:
+    """Class deciding when to turn an AC on or off to hold a setpoint.
+
+    In cool and dry mode the AC is turned on above `setpoint + hysteresis`
+    and off below `setpoint - hysteresis`; heat mode is the other way round.
+    At most `max_commands_per_hour` commands are issued in any hour.
+    """
+
+    def __init__(
+        self,
+        hvac_mode: Climate.const.HVACMode,
+        setpoint: float,
+        hysteresis: float,
+        max_commands_per_hour: int,
+    ) -> None:
+        self.hvac_mode = hvac_mode
+        self.setpoint = setpoint
+        self.hysteresis = hysteresis
+        self.max_commands_per_hour = max_commands_per_hour
+        self.commands: collections.deque[float] = collections.deque()
+
+    def decide(self, reading: Optional[float]) -> Optional[Climate.const.HVACMode]:
+        """Mode the AC should be in, or None to leave it as it is"""
+        if reading is None:
+            return None
+        too_high = reading > self.setpoint + self.hysteresis
+        too_low = reading < self.setpoint - self.hysteresis
+        if self.hvac_mode == Climate.const.HVACMode.HEAT:
+            too_high, too_low = too_low, too_high
+        if too_high:
+            return self.hvac_mode
+        if too_low:
+            return Climate.const.HVACMode.OFF
+        return None
+
+    def commands_last_hour(self) -> int:
+        """Number of commands issued in the last hour"""
+        now = time.monotonic()
+        while self.commands and now - self.commands[0] > 3600:
+            self.commands.popleft()
+        return len(self.commands)
+
+    def has_budget(self) -> bool:
+        """Check if the hourly budget allows another command"""
+        return self.commands_last_hour() < self.max_commands_per_hour
+
+    def record_command(self) -> None:
+        """Count a command that was actually sent"""
+        self.commands.append(time.monotonic())
+
+    def as_dict(self) -> dict[str, Any]:
+        """Settings to be restored after restart"""
+        return {
+            "hvac_mode": self.hvac_mode,
+            "setpoint": self.setpoint,
+            "hysteresis": self.hysteresis,
+            "max_commands_per_hour": self.max_commands_per_hour,
+        }
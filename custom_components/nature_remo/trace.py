@@ -0,0 +1,53 @@
+"""File for tracing API payloads without cost when tracing is off.
+
+Each subsystem traces to its own logger, so it can be switched on and off at
+runtime with the `logger.set_level` service, e.g. setting
+`custom_components.nature_remo.trace.transport` to `debug`.
+"""
+import logging
+from typing import Any
+
+TRANSPORT = "transport"
+PARSING = "parsing"
+CLIMATE = "climate"
+
+# keys whose values are never written to the log
+REDACTED_KEYS = {"authorization", "token", "access_token", "refresh_token"}
+# items kept from each list, and characters kept from the whole message
+MAX_ITEMS = 3
+MAX_CHARS = 2000
+
+
+def get_tracer(subsystem: str) -> logging.Logger:
+    """Get the logger tracing given subsystem"""
+    return logging.getLogger(f"{__name__}.{subsystem}")
+
+
+def redact(obj: Any) -> Any:
+    """Copy obj with secrets redacted and long lists sampled"""
+    if isinstance(obj, dict):
+        return {
+            k: "**REDACTED**" if str(k).lower() in REDACTED_KEYS else redact(v)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, (list, tuple)):
+        sampled = [redact(v) for v in obj[:MAX_ITEMS]]
+        if len(obj) > MAX_ITEMS:
+            sampled.append(f"... {len(obj) - MAX_ITEMS} more")
+        return sampled
+    return obj
+
+
+class Payload:
+    """Payload formatted only when the log record is emitted"""
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj: Any) -> None:
+        self.obj = obj
+
+    def __str__(self) -> str:
+        text = str(redact(self.obj))
+        if len(text) > MAX_CHARS:
+            text = f"{text[:MAX_CHARS]}... ({len(text) - MAX_CHARS} chars truncated)"
+        return text
@@ -0,0 +1,160 @@
+"""File for detecting integration code that blocks the event loop"""
+from collections.abc import Callable, Coroutine
+import contextlib
+import functools
+import itertools
+import logging
+import sys
+import threading
+import time
+import traceback
+import types
+from typing import Any, Optional
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+# frames kept from each stack sample
+STACK_DEPTH = 12
+
+
+class StallStats:
+    """Class storing stalls attributed to one function"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.max_duration = 0.0
+        self.last_duration = 0.0
+        self.last_stack: Optional[str] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summarize the statistics"""
+        return {
+            "count": self.count,
+            "max_duration": round(self.max_duration, 3),
+            "last_duration": round(self.last_duration, 3),
+        }
+
+
+class LoopWatchdog:
+    """Class timing integration code that runs on the event loop.
+
+    Every wrapped callback, and every step of a wrapped coroutine between two
+    awaits, holds the loop while it runs. Steps longer than `threshold`
+    seconds are counted as stalls of the function. A sampler thread captures
+    the stack of the loop thread while such a step is still running, so the
+    blocking call itself shows up, not only the function it was called from.
+    """
+
+    def __init__(self, hass: HomeAssistant, threshold: float) -> None:
+        self.hass = hass
+        self.threshold = threshold
+        self.stats: dict[str, StallStats] = {}
+        self.listeners: list[Callable[[], None]] = []
+        self._loop_thread_id: Optional[int] = None
+        self._tokens = itertools.count()
+        # (token, name, start) of the step holding the loop, set by the loop
+        self._running: Optional[tuple[int, str, float]] = None
+        # (token, stack) sampled by the sampler thread
+        self._sample: Optional[tuple[int, str]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling; must be called from the event loop"""
+        self._loop_thread_id = threading.get_ident()
+        self._thread = threading.Thread(
+            target=self._sample_loop, name="nature_remo_watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling"""
+        self._stop.set()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.threshold / 2):
+            running = self._running
+            if running is None or (self._sample or (None,))[0] == running[0]:
+                continue
+            token, _, start = running
+            if time.perf_counter() - start < self.threshold:
+                continue
+            frame = sys._current_frames().get(  # pylint: disable=protected-access
+                self._loop_thread_id
+            )
+            if frame is not None:
+                stack = "".join(traceback.format_stack(frame, limit=STACK_DEPTH))
+                self._sample = (token, stack)
+
+    @contextlib.contextmanager
+    def step(self, name: str):
+        """Time a step of `name` running on the loop"""
+        if self._running is not None:
+            # nested in a step that is already timed
+            yield
+            return
+        token = next(self._tokens)
+        start = time.perf_counter()
+        self._running = (token, name, start)
+        try:
+            yield
+        finally:
+            self._running = None
+            if (duration := time.perf_counter() - start) >= self.threshold:
+                sample = self._sample
+                stack = sample[1] if sample and sample[0] == token else None
+                self._record(name, duration, stack)
+
+    def _record(self, name: str, duration: float, stack: Optional[str]) -> None:
+        stats = self.stats.setdefault(name, StallStats())
+        stats.count += 1
+        stats.last_duration = duration
+        stats.max_duration = max(stats.max_duration, duration)
+        if stack is not None:
+            stats.last_stack = stack
+        _LOGGER.warning(
+            "%s blocked the event loop for %.3fs%s",
+            name,
+            duration,
+            f"; sampled stack:\n{stack}" if stack else "",
+        )
+        self.hass.loop.call_soon(self._notify)
+
+    @callback
+    def _notify(self) -> None:
+        for listener in self.listeners:
+            listener()
+
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Time every call of a callback"""
+        name = getattr(func, "__qualname__", repr(func))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.step(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    @types.coroutine
+    def run(self, name: str, coro: Coroutine):
+        """Await `coro`, timing each of its steps"""
+        value, error = None, None
+        while True:
+            with self.step(name):
+                try:
+                    if error is None:
+                        future = coro.send(value)
+                    else:
+                        future = coro.throw(error)
+                except StopIteration as stop:
+                    return stop.value
+            try:
+                value, error = (yield future), None
+            except BaseException as err:  # pylint: disable=broad-except
+                value, error = None, err
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        """Stall statistics of each function"""
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
@@ -0,0 +1,355 @@
+"""Time-accelerated soak test of the nature_remo polling pipeline.
+
+Runs the real coordinators, entities and RemoAPI against a scripted fake
+Nature API on an event loop with a virtual clock, so that a day of polling
+takes a few seconds. Requires Home Assistant to be installed.
+
+    python scripts/soak_simulator.py --hours 24 --remos 3 --acs 2
+"""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import restore_state  # noqa: E402
+from homeassistant.util import slugify  # noqa: E402
+
+from custom_components.nature_remo.aggregate import (  # noqa: E402
+    AGGREGATE_FIELDS,
+    SensorAggregator,
+)
+from custom_components.nature_remo.api import RemoAPI  # noqa: E402
+from custom_components.nature_remo.climate import (  # noqa: E402
+    AirConditioner,
+    extract_ac_properties,
+)
+from custom_components.nature_remo.const import (  # noqa: E402
+    EVENT_AC_CHANGED,
+    EVENT_METER_ROLLOVER,
+    EVENT_MOTION_DETECTED,
+)
+from custom_components.nature_remo.coordinator import (  # noqa: E402
+    ApplianceCoordinator,
+    SensorCoordinator,
+)
+from custom_components.nature_remo.sensor import (  # noqa: E402
+    EPC_ITEMS,
+    AggregateSensor,
+    HumiditySensor,
+    IlluminanceSensor,
+    MovementSensor,
+    PowerEnergyMeter,
+    TemperatureSensor,
+)
+
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop jumping to the next timer whenever it has nothing to do"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._virtual_time = 0.0
+        self.busy_times: list[float] = []
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def _run_once(self) -> None:
+        if not self._ready and self._scheduled:
+            self._virtual_time = max(self._virtual_time, self._scheduled[0].when())
+        start = time.perf_counter()
+        super()._run_once()
+        self.busy_times.append(time.perf_counter() - start)
+
+
+class InlineExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Executor running jobs immediately, so no thread outlives virtual time"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as err:  # pylint: disable=broad-except
+            future.set_exception(err)
+        return future
+
+
+class FakeResponse:
+    """Response of the fake backend"""
+
+    def __init__(self, status_code: int, data) -> None:
+        self.status_code = status_code
+        self._data = data
+
+    @property
+    def content(self) -> bytes:
+        return json.dumps(self._data).encode()
+
+    def json(self):
+        return self._data
+
+
+class FakeBackend:
+    """Scripted Nature API whose state evolves with the virtual clock"""
+
+    def __init__(self, loop: VirtualClockLoop, args: argparse.Namespace) -> None:
+        self.loop = loop
+        self.rng = random.Random(args.seed)
+        self.macs = [f"00:00:00:00:00:{i:02x}" for i in range(args.remos)]
+        self.ac_ids = [f"ac-{i}" for i in range(args.acs)]
+        self.outages = [
+            (hour * 3600, hour * 3600 + args.outage_minutes * 60)
+            for hour in range(args.outage_every, args.hours, args.outage_every)
+        ]
+        self.calls: collections.Counter[str] = collections.Counter()
+        self.call_times: list[float] = []
+        self.ac_settings = {
+            ac_id: {"temp": "26", "mode": "cool", "vol": "auto", "dir": "auto",
+                    "dirh": "", "button": ""}
+            for ac_id in self.ac_ids
+        }
+        self.ac_settings_at = {ac_id: 0.0 for ac_id in self.ac_ids}
+        self.last_motion = {mac: 0.0 for mac in self.macs}
+        # a 5-digit meter at 0.01 kWh rolls over every ~1000 kWh; start close
+        self.energy_raw = 99_000
+        self.last_phone_change = 0.0
+
+    def now(self) -> float:
+        return self.loop.time()
+
+    def timestamp(self, seconds: float) -> str:
+        moment = EPOCH + datetime.timedelta(seconds=seconds)
+        return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def advance(self) -> None:
+        """Apply scripted events up to the current virtual time"""
+        now = self.now()
+        for mac in self.macs:
+            if self.rng.random() < 0.3:
+                self.last_motion[mac] = now
+        # someone changes an AC from the phone app every three hours
+        if self.ac_ids and now - self.last_phone_change >= 3 * 3600:
+            self.last_phone_change = now
+            ac_id = self.rng.choice(self.ac_ids)
+            settings = self.ac_settings[ac_id]
+            settings["button"] = "" if settings["button"] else "power-off"
+            self.ac_settings_at[ac_id] = now
+        # ~2 kW average consumption, rolling over the meter during the run
+        self.energy_raw = (self.energy_raw + self.rng.randint(0, 7)) % 100_000
+
+    def devices(self) -> list[dict]:
+        now = self.now()
+        daily = math.sin(now / 86400 * 2 * math.pi)
+        return [
+            {
+                "name": f"Remo {i}",
+                "mac_address": mac,
+                "newest_events": {
+                    "te": {"val": round(24 + 3 * daily, 1)},
+                    "hu": {"val": int(50 + 10 * daily)},
+                    "il": {"val": max(0, int(300 * daily))},
+                    "mo": {"created_at": self.timestamp(self.last_motion[mac])},
+                },
+            }
+            for i, mac in enumerate(self.macs)
+        ]
+
+    def appliances(self) -> list[dict]:
+        mode = {"temp": [str(t) for t in range(18, 31)], "vol": ["auto", "1", "2"],
+                "dir": ["auto", "swing"], "dirh": [""]}
+        appliances = [
+            {
+                "id": ac_id,
+                "nickname": f"AC {i}",
+                "device": {"name": f"Remo {i % len(self.macs)}",
+                           "mac_address": self.macs[i % len(self.macs)]},
+                "aircon": {"tempUnit": "c", "range": {
+                    "fixedButtons": ["power-off"],
+                    "modes": {"cool": mode, "warm": mode}}},
+                "settings": self.ac_settings[ac_id]
+                | {"updated_at": self.timestamp(self.ac_settings_at[ac_id])},
+            }
+            for i, ac_id in enumerate(self.ac_ids)
+        ]
+        appliances.append(
+            {
+                "id": "meter",
+                "nickname": "Remo E",
+                "device": {"name": "Remo E", "mac_address": "00:00:00:00:ee:00"},
+                "smart_meter": {"echonetlite_properties": [
+                    {"epc": 231, "val": str(self.rng.randint(200, 3000))},
+                    {"epc": 224, "val": str(self.energy_raw)},
+                    {"epc": 211, "val": "1"},
+                    {"epc": 225, "val": "2"},
+                    {"epc": 215, "val": "5"},
+                ]},
+            }
+        )
+        return appliances
+
+    def record(self, endpoint: str) -> None:
+        self.calls[endpoint] += 1
+        self.call_times.append(self.now())
+        if any(start <= self.now() < end for start, end in self.outages):
+            raise ConnectionError("scripted outage")
+
+    def get(self, url: str, timeout: float = 5) -> FakeResponse:
+        endpoint = url.split("/1/", 1)[1]
+        self.record(f"GET {endpoint}")
+        self.advance()
+        if endpoint == "devices":
+            return FakeResponse(200, self.devices())
+        if endpoint == "appliances":
+            return FakeResponse(200, self.appliances())
+        return FakeResponse(200, {"id": "user"})
+
+    def post(self, url: str, data: dict, timeout: float = 5) -> FakeResponse:
+        self.record(f"POST {url.split('/1/', 1)[1].split('/')[0]}")
+        return FakeResponse(200, {})
+
+    def peak_rate(self, window: float = 60.0) -> int:
+        """Largest number of calls within any window of given seconds"""
+        peak, start = 0, 0
+        for end, moment in enumerate(self.call_times):
+            while moment - self.call_times[start] > window:
+                start += 1
+            peak = max(peak, end - start + 1)
+        return peak
+
+
+def instrument(entity, hass: HomeAssistant, writes: collections.Counter) -> None:
+    """Attach the entity to hass and count its state writes"""
+    entity.hass = hass
+    domain = "climate" if isinstance(entity, AirConditioner) else "sensor"
+    entity.entity_id = f"{domain}.{slugify(entity.unique_id)}"
+    entity._no_platform_reported = True  # pylint: disable=protected-access
+    write = entity.async_write_ha_state
+
+    def counted_write() -> None:
+        writes[entity.entity_id] += 1
+        write()
+
+    entity.async_write_ha_state = counted_write
+    entity.coordinator.async_add_listener(
+        entity._handle_coordinator_update,  # pylint: disable=protected-access
+        entity.coordinator_context,
+    )
+
+
+async def simulate(loop: VirtualClockLoop, args: argparse.Namespace) -> None:
+    """Run the pipeline for the requested virtual duration and report"""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.data[restore_state.DATA_RESTORE_STATE] = restore_state.RestoreStateData(
+            hass
+        )
+        backend = FakeBackend(loop, args)
+        api = RemoAPI("simulated-token")
+        api.session = backend
+        appliances, (sensor_data, device_names) = await asyncio.gather(
+            api.fetch_appliance(), api.fetch_devices()
+        )
+        sensor_coordinator = SensorCoordinator(hass, api, sensor_data)
+        appliance_coordinator = ApplianceCoordinator(hass, api, appliances)
+        entities = []
+        for mac, data in sensor_data.items():
+            name = device_names[mac]
+            entities += [
+                TemperatureSensor(sensor_coordinator, mac, name, data.temperature),
+                HumiditySensor(sensor_coordinator, mac, name, data.humidity),
+                IlluminanceSensor(sensor_coordinator, mac, name, data.illuminance),
+                MovementSensor(sensor_coordinator, mac, name, data.movement),
+            ]
+        aggregator = SensorAggregator(sensor_coordinator, {"home": list(sensor_data)})
+        for name in AGGREGATE_FIELDS:
+            entities.append(
+                AggregateSensor(
+                    sensor_coordinator, aggregator, "sim", "home", "Home", name
+                )
+            )
+        for properties in appliances.power_energy_meter:
+            mac = properties["device"]["mac_address"]
+            for item in (EPC_ITEMS.power, EPC_ITEMS.comsumed_energy):
+                entities.append(
+                    PowerEnergyMeter(
+                        item, appliance_coordinator, mac, "Remo E", properties
+                    )
+                )
+        for properties in appliances.ac:
+            data = extract_ac_properties(properties, entities)
+            entities.append(AirConditioner(data, api, appliance_coordinator))
+        writes: collections.Counter[str] = collections.Counter()
+        for entity in entities:
+            instrument(entity, hass, writes)
+        events: collections.Counter[str] = collections.Counter()
+        for event_type in (
+            EVENT_MOTION_DETECTED,
+            EVENT_AC_CHANGED,
+            EVENT_METER_ROLLOVER,
+        ):
+            hass.bus.async_listen(
+                event_type, lambda event: events.update([event.event_type])
+            )
+
+        started = time.perf_counter()
+        loop.busy_times.clear()
+        await asyncio.sleep(args.hours * 3600)
+        elapsed = time.perf_counter() - started
+        await sensor_coordinator.async_shutdown()
+        await appliance_coordinator.async_shutdown()
+
+    busy = sorted(loop.busy_times)
+    print(f"Simulated {args.hours}h in {elapsed:.2f}s of wall time")
+    print(f"Total API calls: {sum(backend.calls.values())}")
+    for endpoint, count in sorted(backend.calls.items()):
+        print(f"  {endpoint}: {count}")
+    print(f"Peak request rate: {backend.peak_rate()} per minute")
+    print(f"State writes: {sum(writes.values())} over {len(writes)} entities")
+    for entity_id, count in sorted(writes.items()):
+        print(f"  {entity_id}: {count}")
+    print(f"Change events: {sum(events.values())}")
+    for event_type, count in sorted(events.items()):
+        print(f"  {event_type}: {count}")
+    if busy:
+        print(
+            f"Event loop time per tick: mean {sum(busy) / len(busy) * 1e3:.3f}ms, "
+            f"p99 {busy[int(len(busy) * 0.99)] * 1e3:.3f}ms, "
+            f"max {busy[-1] * 1e3:.3f}ms over {len(busy)} ticks"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--remos", type=int, default=3)
+    parser.add_argument("--acs", type=int, default=2)
+    parser.add_argument("--outage-every", type=int, default=6, metavar="HOURS")
+    parser.add_argument("--outage-minutes", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.CRITICAL)
+    loop = VirtualClockLoop()
+    loop.set_default_executor(InlineExecutor())
+    try:
+        loop.run_until_complete(simulate(loop, args))
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
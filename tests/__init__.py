@@ -0,0 +1 @@
+"""Tests for the nature_remo integration."""
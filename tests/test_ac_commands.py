@@ -0,0 +1,94 @@
+"""Tests for skipping AC commands the AC is known to be in already"""
+
+import asyncio
+from types import SimpleNamespace
+
+import homeassistant.components.climate as Climate
+
+from custom_components.nature_remo import api as api_module
+from custom_components.nature_remo.api import RemoAPI, build_ac_payload
+from custom_components.nature_remo.const import AC_CONFIRM_FRESHNESS, SwingModePair
+
+COOL = Climate.const.HVACMode.COOL
+# aircon settings as the API reports them for the AC below
+SETTINGS = {
+    "temp": "25",
+    "mode": "cool",
+    "vol": "auto",
+    "dir": "swing",
+    "dirh": "",
+    "button": "",
+}
+
+
+class Clock:
+    """Clock advanced by hand, standing in for the time module"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+def cooling_ac(temperature_idx: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(
+        hvac_mode=COOL,
+        last_hvac_mode=COOL,
+        mode_target_swingmodepair={COOL: SwingModePair("swing", "")},
+        mode_target_temp_idx={COOL: temperature_idx},
+        mode_target_fan_mode={COOL: "auto"},
+        data=SimpleNamespace(
+            id="ac", modes={COOL: SimpleNamespace(temps_str=["25", "26"])}
+        ),
+    )
+
+
+def recording_api(monkeypatch) -> tuple[RemoAPI, list, Clock]:
+    clock = Clock()
+    monkeypatch.setattr(api_module, "time", clock)
+    api = RemoAPI("token")
+    sent = []
+
+    async def post(remote_api, args, data):
+        sent.append(data)
+        return {**SETTINGS, "temp": data["temperature"]}
+
+    api.post = post
+    return api, sent, clock
+
+
+def test_reported_settings_match_the_built_payload():
+    assert api_module.settings_to_payload(SETTINGS) == build_ac_payload(cooling_ac())
+
+
+def test_confirmed_state_is_not_sent_again(monkeypatch):
+    api, sent, _ = recording_api(monkeypatch)
+    api.confirm_ac_settings("ac", SETTINGS)
+    assert asyncio.run(api.send_ac_signal(cooling_ac())) is None
+    assert sent == []
+    # forcing sends it anyway
+    asyncio.run(api.send_ac_signal(cooling_ac(), force=True))
+    assert len(sent) == 1
+
+
+def test_different_state_is_sent_and_confirmed(monkeypatch):
+    api, sent, _ = recording_api(monkeypatch)
+    api.confirm_ac_settings("ac", SETTINGS)
+    asyncio.run(api.send_ac_signal(cooling_ac(temperature_idx=1)))
+    assert [data["temperature"] for data in sent] == ["26"]
+    assert api.ac_last_sent["ac"] == sent[0]
+    # the response confirms the new state, so repeating it is skipped
+    asyncio.run(api.send_ac_signal(cooling_ac(temperature_idx=1)))
+    assert len(sent) == 1
+
+
+def test_confirmation_expires(monkeypatch):
+    api, sent, clock = recording_api(monkeypatch)
+    api.confirm_ac_settings("ac", SETTINGS)
+    clock.now += AC_CONFIRM_FRESHNESS + 1
+    asyncio.run(api.send_ac_signal(cooling_ac()))
+    assert len(sent) == 1
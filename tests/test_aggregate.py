@@ -0,0 +1,57 @@
+"""Tests for aggregates of readings over groups of Remos"""
+
+from types import SimpleNamespace
+
+from custom_components.nature_remo import aggregate as aggregate_module
+from custom_components.nature_remo.aggregate import (
+    AGGREGATE_FIELDS,
+    SensorAggregator,
+    aggregate,
+)
+from custom_components.nature_remo.const import SensorData
+
+DATA = {
+    "living": SensorData(24.0, 40, 100, None),
+    "bedroom": SensorData(21.5, 55, 20, None),
+    # a Remo mini only reports temperature
+    "study": SensorData(23.0, None, None, None),
+}
+
+
+def test_aggregates_skip_missing_readings():
+    assert aggregate(DATA, ["living", "bedroom", "study", "unknown"]) == {
+        "temperature_mean": 22.8,
+        "temperature_min": 21.5,
+        "temperature_max": 24.0,
+        "humidity_mean": 47.5,
+        "humidity_min": 40,
+        "humidity_max": 55,
+        "illuminance_total": 120,
+    }
+
+
+def test_group_without_readings_has_no_aggregates():
+    assert aggregate(DATA, ["unknown"]) == dict.fromkeys(AGGREGATE_FIELDS)
+    assert aggregate(DATA, ["study"])["humidity_mean"] is None
+
+
+def test_aggregates_are_computed_once_per_poll(monkeypatch):
+    calls = []
+
+    def counting_aggregate(data, macs):
+        calls.append(tuple(macs))
+        return aggregate(data, macs)
+
+    monkeypatch.setattr(aggregate_module, "aggregate", counting_aggregate)
+    coordinator = SimpleNamespace(revision=1, data=DATA)
+    aggregator = SensorAggregator(
+        coordinator, {"home": list(DATA), "bedroom": ["bedroom"]}
+    )
+    for name in AGGREGATE_FIELDS:
+        aggregator.get("home", name)
+        aggregator.get("bedroom", name)
+    assert len(calls) == 2
+    coordinator.revision = 2
+    coordinator.data = {"bedroom": SensorData(25.0, 50, 10, None)}
+    assert aggregator.get("bedroom", "temperature_max") == 25.0
+    assert len(calls) == 4
@@ -0,0 +1,116 @@
+"""Tests for fetching, decoding and classifying API responses"""
+
+import asyncio
+import threading
+
+import pytest
+import requests
+
+from custom_components.nature_remo import api as api_module
+from custom_components.nature_remo.api import (
+    RemoAPI,
+    blocking_fetch,
+    classify_appliances,
+    decode_json,
+)
+from custom_components.nature_remo.const import AuthError, NetworkError
+
+
+class StaticSession(requests.Session):
+    """Session answering every GET with the same response"""
+
+    def __init__(self, status: int = 200, content: bytes = b"[]") -> None:
+        super().__init__()
+        self.status = status
+        self.content = content
+
+    def get(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = self.content  # pylint: disable=protected-access
+        return response
+
+
+APPLIANCES = [
+    {
+        "id": "ac",
+        "aircon": {"range": {}},
+        "device": {"mac_address": "remo-1"},
+        "signals": [],
+    },
+    {
+        "id": "light",
+        "light": {"buttons": []},
+        "device": {"mac_address": "remo-2"},
+        "signals": [{"id": "sig-night"}],
+    },
+    {
+        "id": "meter",
+        "smart_meter": {"echonetlite_properties": []},
+        "device": {"mac_address": "remo-e"},
+    },
+    {"id": "tv", "signals": [{"id": "sig-power"}], "device": {"mac_address": "remo-1"}},
+    # an appliance without any signal is not controllable
+    {"id": "empty", "signals": []},
+]
+
+
+def test_appliances_are_classified_with_their_emitters():
+    appliances, emitters = classify_appliances(APPLIANCES)
+    assert [a["id"] for a in appliances.ac] == ["ac"]
+    assert [a["id"] for a in appliances.light] == ["light"]
+    assert [a["id"] for a in appliances.power_energy_meter] == ["meter"]
+    assert [a["id"] for a in appliances.others] == ["tv"]
+    # empty properties are dropped
+    assert "signals" not in appliances.ac[0]
+    assert emitters == {
+        "ac": "remo-1",
+        "light": "remo-2",
+        "sig-night": "remo-2",
+        "meter": "remo-e",
+        "tv": "remo-1",
+        "sig-power": "remo-1",
+    }
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_decoding_with_and_without_orjson(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(api_module, "orjson", None)
+    response = StaticSession(content=b'{"a": [1, 2]}').get("url")
+    assert decode_json(response) == {"a": [1, 2]}
+
+
+def test_fetch_reports_the_time_of_each_stage():
+    data, timings = blocking_fetch(StaticSession(content=b"[1]"), "url", 5, len)
+    assert data == 1
+    assert set(timings) == {"request", "decode", "parse"}
+
+
+@pytest.mark.parametrize(
+    ("status", "error"), [(401, AuthError), (500, NetworkError), (429, NetworkError)]
+)
+def test_fetch_errors_follow_the_status(status, error):
+    with pytest.raises(error):
+        blocking_fetch(StaticSession(status), "url", 5, None)
+
+
+def test_parsing_runs_off_the_event_loop():
+    api = RemoAPI("token")
+    api.session = StaticSession()
+    threads = []
+
+    def parse(data):
+        threads.append(threading.get_ident())
+        return data
+
+    async def run() -> None:
+        assert await api.get(api.apis["devices"], parse) == []
+        threads.append(threading.get_ident())
+
+    asyncio.run(run())
+    parse_thread, loop_thread = threads
+    assert parse_thread != loop_thread
+    assert set(api.timings[api.apis["devices"].url]) == {"request", "decode", "parse"}
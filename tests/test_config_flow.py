@@ -0,0 +1,15 @@
+"""Tests for the options flow"""
+import asyncio
+from types import SimpleNamespace
+
+from custom_components.nature_remo.config_flow import ConfigFlow
+from custom_components.nature_remo.const import CONF_ECHONET_HOST
+
+
+def test_options_form_suggests_current_options():
+    entry = SimpleNamespace(options={CONF_ECHONET_HOST: "192.0.2.1"})
+    flow = ConfigFlow.async_get_options_flow(entry)
+    result = asyncio.run(flow.async_step_init())
+    assert result["step_id"] == "init"
+    [host] = [key for key in result["data_schema"].schema if key == CONF_ECHONET_HOST]
+    assert host.description == {"suggested_value": "192.0.2.1"}
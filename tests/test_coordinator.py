@@ -0,0 +1,120 @@
+"""Tests for coordinators polling only while their data is consumed"""
+
+import asyncio
+import datetime
+import logging
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.nature_remo import coordinator as coordinator_module
+from custom_components.nature_remo.coordinator import DemandCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Clock:
+    """Monotonic clock advanced by hand"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class CountingCoordinator(DemandCoordinator):
+    """Coordinator whose polls return how many were made"""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.polls = 0
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="test",
+            update_interval=datetime.timedelta(seconds=60),
+            update_method=self.poll,
+        )
+
+    async def poll(self) -> int:
+        self.polls += 1
+        return self.polls
+
+
+def run_with_coordinator(tmp_path, monkeypatch, test) -> None:
+    clock = Clock()
+    monkeypatch.setattr(coordinator_module, "time", clock)
+
+    async def run() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = CountingCoordinator(hass)
+        try:
+            await test(hass, coordinator, clock)
+        finally:
+            coordinator._unschedule_refresh()  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_demand_follows_listener_contexts(tmp_path, monkeypatch):
+    async def test(hass, coordinator, clock) -> None:
+        remove = coordinator.async_add_listener(lambda: None, "temperature")
+        coordinator.async_add_listener(lambda: None, "humidity")
+        assert coordinator.demand == {"temperature", "humidity"}
+        remove()
+        assert coordinator.demand == {"humidity"}
+
+    run_with_coordinator(tmp_path, monkeypatch, test)
+
+
+def test_listener_returning_to_stale_data_refreshes(tmp_path, monkeypatch):
+    async def test(hass, coordinator, clock) -> None:
+        coordinator.async_add_listener(lambda: None, "temperature")
+        await hass.async_block_till_done()
+        # no data yet, so it is stale
+        assert coordinator.polls == 1
+        coordinator.async_add_listener(lambda: None, "humidity")
+        await hass.async_block_till_done()
+        # not resuming from idle, so no extra poll
+        assert coordinator.polls == 1
+
+    run_with_coordinator(tmp_path, monkeypatch, test)
+
+
+def test_listener_returning_to_fresh_data_waits(tmp_path, monkeypatch):
+    async def test(hass, coordinator, clock) -> None:
+        await coordinator.async_refresh()
+        clock.now += 30
+        coordinator.async_add_listener(lambda: None, "temperature")
+        await hass.async_block_till_done()
+        assert coordinator.polls == 1
+
+    run_with_coordinator(tmp_path, monkeypatch, test)
+
+
+def test_ensure_fresh_refreshes_only_stale_data(tmp_path, monkeypatch):
+    async def test(hass, coordinator, clock) -> None:
+        await coordinator.async_ensure_fresh()
+        assert coordinator.polls == 1
+        clock.now += 30
+        await coordinator.async_ensure_fresh()
+        assert coordinator.polls == 1
+        await coordinator.async_ensure_fresh(max_age=10)
+        assert coordinator.polls == 2
+        clock.now += 61
+        assert coordinator.is_stale()
+        await coordinator.async_ensure_fresh()
+        assert coordinator.polls == 3
+
+    run_with_coordinator(tmp_path, monkeypatch, test)
+
+
+def test_revision_changes_only_with_data(tmp_path, monkeypatch):
+    async def test(hass, coordinator, clock) -> None:
+        await coordinator.async_refresh()
+        revision = coordinator.revision
+        # the next poll returns the same data
+        coordinator.update_method = lambda: asyncio.sleep(0, 1)
+        await coordinator.async_refresh()
+        assert coordinator.revision == revision
+
+    run_with_coordinator(tmp_path, monkeypatch, test)
@@ -0,0 +1,186 @@
+"""Tests for the ECHONET Lite transport, against a local UDP stand-in meter"""
+import asyncio
+
+import pytest
+
+from custom_components.nature_remo.const import EPC_ITEM_VALUE_MAP, EPC_ITEMS
+from custom_components.nature_remo.echonet import (
+    CONTROLLER_EOJ,
+    EHD,
+    ESV_GET,
+    ESV_GET_RES,
+    ESV_GET_SNA,
+    METER_EPCS,
+    SMART_METER_EOJ,
+    EchonetClient,
+    EchonetProtocol,
+    build_get_frame,
+    parse_response,
+)
+
+POWER = EPC_ITEM_VALUE_MAP[EPC_ITEMS.power]
+CONSUMED = EPC_ITEM_VALUE_MAP[EPC_ITEMS.comsumed_energy]
+GENERATED = EPC_ITEM_VALUE_MAP[EPC_ITEMS.generated_energy]
+
+
+# a home air conditioner, answering with the same TID by chance
+AIR_CONDITIONER_EOJ = b"\x01\x30\x01"
+
+
+def response_frame(
+    tid: int,
+    esv: int,
+    properties: list[tuple[int, bytes]],
+    seoj: bytes = SMART_METER_EOJ,
+) -> bytes:
+    """Build a response of the meter to the controller"""
+    frame = bytearray(EHD)
+    frame += tid.to_bytes(2, "big")
+    frame += seoj + CONTROLLER_EOJ
+    frame += bytes([esv, len(properties)])
+    for epc, edt in properties:
+        frame += bytes([epc, len(edt)]) + edt
+    return bytes(frame)
+
+
+def test_get_frame_requests_each_epc_without_data():
+    frame = build_get_frame(0x1234, [POWER, CONSUMED])
+    assert frame[:2] == EHD
+    assert frame[2:4] == b"\x12\x34"
+    assert frame[4:7] == CONTROLLER_EOJ
+    assert frame[7:10] == SMART_METER_EOJ
+    assert frame[10] == ESV_GET
+    assert frame[11] == 2
+    assert frame[12:] == bytes([POWER, 0, CONSUMED, 0])
+
+
+def test_round_trip_keeps_tid_and_values():
+    request = build_get_frame(42, [CONSUMED])
+    tid = int.from_bytes(request[2:4], "big")
+    response = response_frame(
+        tid, ESV_GET_RES, [(CONSUMED, (123456).to_bytes(4, "big"))]
+    )
+    assert parse_response(response) == (
+        42,
+        SMART_METER_EOJ,
+        [{"epc": CONSUMED, "val": "123456"}],
+    )
+
+
+def test_power_is_signed_and_energy_is_not():
+    response = response_frame(
+        1,
+        ESV_GET_RES,
+        [
+            (POWER, (-100).to_bytes(4, "big", signed=True)),
+            (CONSUMED, b"\xff\xff\xff\x9c"),
+        ],
+    )
+    _, _, properties = parse_response(response)
+    assert properties == [
+        {"epc": POWER, "val": "-100"},
+        {"epc": CONSUMED, "val": str(0xFFFFFF9C)},
+    ]
+
+
+def test_properties_without_data_are_skipped():
+    response = response_frame(
+        1,
+        ESV_GET_RES,
+        [(GENERATED, b""), (POWER, (500).to_bytes(4, "big", signed=True))],
+    )
+    assert parse_response(response)[2] == [{"epc": POWER, "val": "500"}]
+
+
+def test_partial_response_keeps_available_properties():
+    # Get_SNA: the meter answers what it can and leaves the rest empty
+    response = response_frame(
+        7, ESV_GET_SNA, [(POWER, (250).to_bytes(4, "big")), (GENERATED, b"")]
+    )
+    assert parse_response(response)[2] == [{"epc": POWER, "val": "250"}]
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [
+        b"\x10\x81\x00",
+        b"\x10\x82" + bytes(10),
+        response_frame(1, ESV_GET, []),
+    ],
+)
+def test_invalid_frames_are_rejected(frame: bytes):
+    with pytest.raises(ValueError):
+        parse_response(frame)
+
+
+class StandInMeter(asyncio.DatagramProtocol):
+    """Meter answering Get requests with fixed readings"""
+
+    def __init__(self, readings: dict[int, bytes]) -> None:
+        self.readings = readings
+        self.transport: asyncio.DatagramTransport
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        tid = int.from_bytes(data[2:4], "big")
+        epcs = [data[12 + 2 * i] for i in range(data[11])]
+        properties = [(epc, self.readings.get(epc, b"")) for epc in epcs]
+        esv = ESV_GET_RES if all(edt for _, edt in properties) else ESV_GET_SNA
+        # stray datagrams first, which the client must ignore
+        self.transport.sendto(b"garbage", addr)
+        self.transport.sendto(
+            response_frame(tid, ESV_GET_RES, [], AIR_CONDITIONER_EOJ), addr
+        )
+        self.transport.sendto(response_frame(tid, esv, properties), addr)
+
+
+async def fetch_from_stand_in(readings: dict[int, bytes]) -> list[dict]:
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: StandInMeter(readings), local_addr=("127.0.0.1", 0)
+    )
+    client = EchonetClient("127.0.0.1", transport.get_extra_info("sockname")[1])
+    try:
+        return await client.fetch_properties()
+    finally:
+        client.close()
+        transport.close()
+
+
+def test_fetch_properties_from_stand_in_meter():
+    readings = {
+        POWER: (-30).to_bytes(4, "big", signed=True),
+        CONSUMED: (98765).to_bytes(4, "big"),
+    }
+    properties = asyncio.run(fetch_from_stand_in(readings))
+    assert {p["epc"] for p in properties} <= set(METER_EPCS)
+    assert properties == [
+        {"epc": POWER, "val": "-30"},
+        {"epc": CONSUMED, "val": "98765"},
+    ]
+
+
+@pytest.mark.parametrize(
+    ("addr", "seoj"),
+    [
+        (("192.0.2.2", 3610), SMART_METER_EOJ),
+        (("192.0.2.1", 3610), AIR_CONDITIONER_EOJ),
+    ],
+)
+def test_response_of_another_node_or_object_is_ignored(addr, seoj):
+    async def run() -> asyncio.Future:
+        protocol = EchonetProtocol()
+        future = asyncio.get_running_loop().create_future()
+        protocol.pending[("192.0.2.1", 5)] = (SMART_METER_EOJ, future)
+        protocol.datagram_received(
+            response_frame(5, ESV_GET_RES, [(POWER, bytes(4))], seoj), addr
+        )
+        assert not future.done()
+        protocol.datagram_received(
+            response_frame(5, ESV_GET_RES, [(POWER, bytes(4))]), ("192.0.2.1", 3610)
+        )
+        return await future
+
+    assert asyncio.run(run()) == [{"epc": POWER, "val": "0"}]
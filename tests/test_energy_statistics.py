@@ -0,0 +1,56 @@
+"""Tests for the hourly buckets of smart meter readings"""
+import datetime
+
+import pytest
+
+from custom_components.nature_remo.energy_statistics import HourlyEnergy
+
+START = datetime.datetime(2024, 1, 1, 10, tzinfo=datetime.timezone.utc)
+
+
+def at(minutes: float) -> datetime.datetime:
+    return START + datetime.timedelta(minutes=minutes)
+
+
+def test_readings_within_an_hour_complete_nothing():
+    buckets = HourlyEnergy(1000.0)
+    assert buckets.add(at(0), 10.0) == []
+    assert buckets.add(at(30), 12.0) == []
+    assert buckets.total == 2.0
+
+
+def test_delta_is_split_across_the_hour_boundary():
+    buckets = HourlyEnergy(1000.0)
+    buckets.add(at(50), 10.0)
+    # 6 kWh over 30 minutes, a third of them before 11:00
+    completed = buckets.add(at(80), 16.0)
+    assert completed == [
+        {"start": START, "state": pytest.approx(12.0), "sum": pytest.approx(2.0)}
+    ]
+    assert buckets.total == pytest.approx(6.0)
+
+
+def test_gap_over_several_hours_completes_each_of_them():
+    buckets = HourlyEnergy(1000.0)
+    buckets.add(at(30), 0.0)
+    completed = buckets.add(at(150), 8.0)
+    assert [c["start"] for c in completed] == [
+        START,
+        START + datetime.timedelta(hours=1),
+    ]
+    assert [c["sum"] for c in completed] == [
+        pytest.approx(2.0),
+        pytest.approx(6.0),
+    ]
+
+
+def test_rollover_adds_up_to_the_modulus():
+    buckets = HourlyEnergy(100.0, total=500.0, last_value=98.0)
+    buckets.add(at(50), 99.0)
+    completed = buckets.add(at(80), 2.0)
+    # 3 kWh over 30 minutes across the rollover, one of them before 11:00
+    assert completed == [
+        {"start": START, "state": pytest.approx(0.0), "sum": pytest.approx(502.0)}
+    ]
+    assert buckets.total == pytest.approx(504.0)
+    assert buckets.last_value == 2.0
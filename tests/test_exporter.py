@@ -0,0 +1,84 @@
+"""Tests for the export of readings to compressed NDJSON files"""
+
+import asyncio
+import gzip
+import json
+from types import SimpleNamespace
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.nature_remo.const import EXPORT_DIRECTORY, Appliances, SensorData
+from custom_components.nature_remo.exporter import (
+    TelemetryExporter,
+    appliance_rows,
+    sensor_rows,
+    write_rows,
+)
+
+TIMESTAMP = "2024-01-01T10:00:00+00:00"
+APPLIANCES = Appliances(
+    ac=[{"id": "ac", "settings": {"temp": "25"}}, {"id": "new-ac"}],
+    light=[],
+    power_energy_meter=[
+        {
+            "device": {"mac_address": "meter"},
+            "smart_meter": {"echonetlite_properties": [{"epc": 231, "val": "500"}]},
+        }
+    ],
+    others=[],
+)
+
+
+def read_rows(path) -> list[dict]:
+    with gzip.open(path, "rt") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_rows_flatten_each_snapshot():
+    assert sensor_rows({"mac": SensorData(25.0, 50, 100, None)}, TIMESTAMP) == [
+        {
+            "ts": TIMESTAMP,
+            "kind": "sensor",
+            "mac": "mac",
+            "temperature": 25.0,
+            "humidity": 50,
+            "illuminance": 100,
+            "movement": None,
+        }
+    ]
+    assert appliance_rows(APPLIANCES, TIMESTAMP) == [
+        {"ts": TIMESTAMP, "kind": "meter", "mac": "meter", "epc_0xe7": "500"},
+        # ACs without settings are skipped
+        {"ts": TIMESTAMP, "kind": "ac", "id": "ac", "temp": "25"},
+    ]
+
+
+def test_appends_go_to_the_file_of_their_day(tmp_path):
+    write_rows(str(tmp_path), [{"ts": TIMESTAMP, "n": 1}])
+    write_rows(
+        str(tmp_path),
+        [{"ts": TIMESTAMP, "n": 2}, {"ts": "2024-01-02T00:00:00+00:00", "n": 3}],
+    )
+    assert [r["n"] for r in read_rows(tmp_path / "2024-01-01.ndjson.gz")] == [1, 2]
+    assert [r["n"] for r in read_rows(tmp_path / "2024-01-02.ndjson.gz")] == [3]
+
+
+def test_updates_are_buffered_until_flushed(tmp_path):
+    async def run() -> TelemetryExporter:
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = SimpleNamespace(
+            last_update_success=True, data={"mac": SensorData(25.0, 50, 100, None)}
+        )
+        exporter = TelemetryExporter(hass, {"sensor": coordinator})
+        exporter._handle_update("sensor")  # pylint: disable=protected-access
+        coordinator.last_update_success = False
+        exporter._handle_update("sensor")  # pylint: disable=protected-access
+        assert len(exporter.buffer) == 1
+        assert not (tmp_path / EXPORT_DIRECTORY).exists()
+        await exporter.async_flush()
+        await hass.async_stop(force=True)
+        return exporter
+
+    assert asyncio.run(run()).buffer == []
+    [path] = (tmp_path / EXPORT_DIRECTORY).iterdir()
+    assert [row["kind"] for row in read_rows(path)] == ["sensor"]
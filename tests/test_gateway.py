@@ -0,0 +1,49 @@
+"""Tests for the authentication of gateway consumers"""
+import asyncio
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.nature_remo.api import RemoAPI
+from custom_components.nature_remo.const import DOMAIN
+from custom_components.nature_remo.gateway import GatewayView, find_store
+
+
+def gateway_hass(token: str = "secret", serving: bool = True) -> SimpleNamespace:
+    api = RemoAPI(token)
+    api.responses = {} if serving else None
+    return SimpleNamespace(data={DOMAIN: {"entry": {"api": api}}})
+
+
+def request_with(hass, authorization: str = None) -> SimpleNamespace:
+    headers = {} if authorization is None else {"Authorization": authorization}
+    return SimpleNamespace(headers=headers, app={"hass": hass})
+
+
+def test_matching_token_finds_the_gateway_entry():
+    hass = gateway_hass()
+    store = find_store(hass, request_with(hass, "Bearer secret"))
+    assert store is hass.data[DOMAIN]["entry"]
+
+
+@pytest.mark.parametrize(
+    "authorization",
+    [None, "secret", "Bearer wrong", "Bearer ", "Bearer sécret", "Bearer 秘密"],
+)
+def test_other_headers_find_nothing(authorization):
+    hass = gateway_hass()
+    assert find_store(hass, request_with(hass, authorization)) is None
+
+
+def test_entries_not_serving_as_gateway_are_not_found():
+    hass = gateway_hass(serving=False)
+    assert find_store(hass, request_with(hass, "Bearer secret")) is None
+
+
+def test_non_ascii_token_is_unauthorized():
+    hass = gateway_hass()
+    request = request_with(hass, "Bearer 秘密")
+    for method in (GatewayView().get, GatewayView().post):
+        response = asyncio.run(method(request, "1/devices"))
+        assert response.status == HTTPStatus.UNAUTHORIZED
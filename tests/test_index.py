@@ -0,0 +1,110 @@
+"""Tests for looking up and sending signals by name"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from homeassistant.core import ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.nature_remo import services
+from custom_components.nature_remo.const import (
+    DOMAIN,
+    SERVICE_SEND_SIGNAL,
+    Appliances,
+    Signal,
+)
+from custom_components.nature_remo.index import SignalCatalog, SignalIndex
+
+APPLIANCES = Appliances(
+    ac=[],
+    light=[
+        {
+            "id": "light-1",
+            "nickname": "Ceiling",
+            "light": {"buttons": [{"name": "on"}, {"name": "off"}]},
+            "signals": [{"id": "sig-night", "name": "Night"}],
+        }
+    ],
+    power_energy_meter=[],
+    others=[
+        {
+            "id": "tv-1",
+            "nickname": "TV",
+            "signals": [{"id": "sig-power", "name": "Power"}],
+        },
+        {"id": "fan-1", "nickname": "Fan", "signals": []},
+    ],
+)
+
+
+@pytest.fixture
+def index() -> SignalIndex:
+    return SignalIndex.from_appliances(APPLIANCES)
+
+
+def test_names_are_looked_up_case_insensitively(index):
+    entry = index.lookup(appliance="tv", signal="POWER")
+    assert entry.appliance_id == "tv-1"
+    assert entry.signal == Signal("sig-power", "Power")
+    # the appliance id works as well as its nickname
+    assert index.lookup(appliance="TV-1", signal="power") == entry
+
+
+def test_signals_are_looked_up_by_id(index):
+    assert index.lookup(signal_id="sig-night").appliance_name == "Ceiling"
+    assert index.lookup(signal_id="missing") is None
+    assert index.lookup(appliance="TV") is None
+
+
+def test_light_buttons_are_indexed_as_names(index):
+    assert index.lookup(appliance="ceiling", signal="Off").signal == "off"
+
+
+def test_appliances_without_signals_are_skipped(index):
+    assert [a.name for a in index.appliances] == ["TV", "Ceiling"]
+
+
+def test_catalog_maps_options_back_to_signals(index):
+    catalog: SignalCatalog = index.catalogs["light-1"]
+    assert catalog.options == ["1. on", "2. off", "3. Night"]
+    assert catalog.signal("3. Night") == Signal("sig-night", "Night")
+
+
+class FakeAPI:
+    """API recording the signals it sends"""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple] = []
+        self.concurrency = 4
+
+    async def send_ir_signal(self, signal_id: str) -> None:
+        self.sent.append(("ir", signal_id))
+
+    async def send_light_signal(self, appliance_id: str, button: str) -> None:
+        self.sent.append(("light", appliance_id, button))
+
+
+def test_send_signal_service_sends_every_target(index):
+    api = FakeAPI()
+    hass = SimpleNamespace(
+        data={DOMAIN: {"entry": {"api": api, "signal_index": index}}}
+    )
+    targets = [
+        {"appliance": "tv", "signal": "power"},
+        {"appliance": "Ceiling", "signal": "ON"},
+    ]
+    call = ServiceCall(DOMAIN, SERVICE_SEND_SIGNAL, {"targets": targets})
+    response = asyncio.run(services.async_send_signal(hass, call))
+    assert [r["success"] for r in response["results"]] == [True, True]
+    assert api.sent == [("ir", "sig-power"), ("light", "light-1", "on")]
+
+
+def test_unknown_signal_fails_the_whole_call(index):
+    hass = SimpleNamespace(
+        data={DOMAIN: {"entry": {"api": FakeAPI(), "signal_index": index}}}
+    )
+    call = ServiceCall(DOMAIN, SERVICE_SEND_SIGNAL, {"signal_id": "missing"})
+    with pytest.raises(HomeAssistantError):
+        asyncio.run(services.async_send_signal(hass, call))
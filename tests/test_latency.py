@@ -0,0 +1,136 @@
+"""Tests for the adaptive timeouts and hedging of API requests"""
+
+import asyncio
+import time
+
+import pytest
+import requests
+
+from custom_components.nature_remo.api import RemoAPI
+from custom_components.nature_remo.const import (
+    LATENCY_MAX_TIMEOUT,
+    LATENCY_MIN_SAMPLES,
+    LATENCY_MIN_TIMEOUT,
+    LATENCY_TIMEOUT_FACTOR,
+    NetworkError,
+)
+from custom_components.nature_remo.latency import LatencyTracker, hedged
+
+
+def tracker_with(*samples: float) -> LatencyTracker:
+    tracker = LatencyTracker()
+    for sample in samples:
+        tracker.add(sample)
+    return tracker
+
+
+def test_default_timeout_until_enough_samples():
+    tracker = tracker_with(*[0.5] * (LATENCY_MIN_SAMPLES - 1))
+    assert tracker.timeout(5.0) == 5.0
+    assert tracker.hedge_delay() is None
+
+
+def test_timeout_follows_p95_within_bounds():
+    tracker = tracker_with(*[0.5] * 19, 2.0)
+    assert tracker.percentile(0.95) == 0.5
+    assert tracker.timeout(5.0) == 0.5 * LATENCY_TIMEOUT_FACTOR
+    assert tracker_with(*[0.01] * 20).timeout(5.0) == LATENCY_MIN_TIMEOUT
+    assert tracker_with(*[60.0] * 20).timeout(5.0) == LATENCY_MAX_TIMEOUT
+
+
+def test_report_counts_hedged_requests():
+    tracker = tracker_with(*[0.5] * 20)
+    tracker.calls, tracker.requests = 10, 13
+    assert tracker.report(5.0)["hedged_requests"] == 3
+
+
+async def attempt(latency: float, result=None, error=None):
+    await asyncio.sleep(latency)
+    if error is not None:
+        raise error
+    return result
+
+
+def test_fast_request_is_not_hedged():
+    calls = []
+
+    def fetch():
+        calls.append(None)
+        return attempt(0.01, "first")
+
+    assert asyncio.run(hedged(fetch, 0.2)) == "first"
+    assert len(calls) == 1
+
+
+def test_hedge_wins_over_slow_request():
+    latencies = iter([1.0, 0.01])
+    results = iter(["slow", "hedge"])
+
+    def fetch():
+        return attempt(next(latencies), next(results))
+
+    started = time.perf_counter()
+    assert asyncio.run(hedged(fetch, 0.05)) == "hedge"
+    assert time.perf_counter() - started < 0.5
+
+
+def test_hedge_failing_leaves_the_first_request():
+    attempts = iter([attempt(0.1, "first"), attempt(0.01, error=NetworkError("hedge"))])
+    assert asyncio.run(hedged(lambda: next(attempts), 0.05)) == "first"
+
+
+def test_error_is_raised_when_every_request_fails():
+    with pytest.raises(NetworkError):
+        asyncio.run(hedged(lambda: attempt(0.01, error=NetworkError()), 0.05))
+
+
+class SlowSession(requests.Session):
+    """Session whose GETs take given seconds, then fail or answer []"""
+
+    def __init__(self, latencies: list[float], fail: bool) -> None:
+        super().__init__()
+        self.latencies = latencies
+        self.fail = fail
+
+    def get(self, url, **kwargs):
+        time.sleep(self.latencies.pop(0))
+        if self.fail:
+            # what urllib3 retries turn an exhausted read timeout into
+            raise requests.ConnectionError("read timed out")
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"[]"  # pylint: disable=protected-access
+        return response
+
+
+def test_failure_after_the_timeout_is_sampled():
+    api = RemoAPI("token")
+    api.timeout = 0.05
+    api.session = SlowSession([0.06, 0.01], fail=True)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(NetworkError):
+                await api.get(api.apis["devices"])
+
+    asyncio.run(run())
+    # only the failure that took the timeout says the API is slow
+    [sample] = api.latency[api.apis["devices"].url].samples
+    assert sample >= 0.05
+
+
+def test_hedge_loser_is_sampled():
+    api = RemoAPI("token")
+    url = api.apis["devices"].url
+    api.latency[url] = tracker_with(*[0.02] * LATENCY_MIN_SAMPLES)
+    api.session = SlowSession([0.3, 0.01], fail=False)
+
+    async def run():
+        assert await api.get(api.apis["devices"], hedge=True) == []
+        # let the slow request complete in its worker thread
+        await asyncio.sleep(0.4)
+
+    asyncio.run(run())
+    tracker = api.latency[url]
+    assert tracker.requests - tracker.calls == 1
+    assert max(tracker.samples) >= 0.3
@@ -0,0 +1,126 @@
+"""Tests for inferring the state of lights from the illuminance of their Remo"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.nature_remo import light as light_module
+from custom_components.nature_remo.const import (
+    LIGHT_LEVEL_WEIGHT,
+    LIGHT_LUX_MIN_JUMP,
+    LIGHT_SETTLE_TIME,
+    SensorData,
+)
+from custom_components.nature_remo.light import RemoLight
+from custom_components.nature_remo.light_inference import LuxThreshold, blend
+
+
+class Clock:
+    """Monotonic clock advanced by hand"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class LightAPI:
+    """API recording the light buttons it sends"""
+
+    def __init__(self) -> None:
+        self.emitters = {"light": "mac"}
+        self.sent: list[str] = []
+
+    async def send_light_signal(self, _light_id: str, button: str) -> None:
+        self.sent.append(button)
+
+
+def test_blend_moves_levels_towards_readings():
+    assert blend(None, 80) == 80
+    assert blend(100, 200) == pytest.approx(100 + LIGHT_LEVEL_WEIGHT * 100)
+
+
+def test_threshold_is_learned_from_toggles_that_change_the_reading():
+    threshold = LuxThreshold()
+    assert threshold.threshold is None
+    assert threshold.infer(100) is None
+    # too small a change to tell anything
+    assert not threshold.learn(50, 50 + LIGHT_LUX_MIN_JUMP - 1)
+    assert threshold.threshold is None
+
+    # the brighter reading is the on level whichever way the toggle went
+    assert threshold.learn(200, 20)
+    assert threshold.as_dict() == {"on": 200, "off": 20}
+    assert threshold.threshold == 110
+    assert threshold.learn(20, 200)
+    assert threshold.as_dict() == {"on": 200, "off": 20}
+
+
+def test_infer_compares_readings_with_the_threshold():
+    threshold = LuxThreshold(on=200, off=20)
+    assert threshold.infer(150) is True
+    assert threshold.infer(110) is True
+    assert threshold.infer(60) is False
+    # daylight far above the on level tells nothing about the light
+    assert threshold.infer(500) is None
+    # levels too close together to separate the states
+    assert LuxThreshold(on=30, off=20).infer(25) is None
+
+
+def make_light(monkeypatch, reading: float) -> tuple[RemoLight, LightAPI, Clock]:
+    clock = Clock()
+    monkeypatch.setattr(light_module, "time", clock)
+    api = LightAPI()
+    light = RemoLight("light", "Ceiling", True, api)
+    coordinator = SimpleNamespace(data={"mac": SensorData(20.0, 50, reading, None)})
+    light.infer_from(coordinator, LuxThreshold(on=200, off=20), lambda: None)
+    light.async_write_ha_state = lambda: None
+    return light, api, clock
+
+
+def set_reading(light: RemoLight, reading: float) -> None:
+    light.coordinator.data["mac"] = SensorData(20.0, 50, reading, None)
+    light._handle_illuminance()  # pylint: disable=protected-access
+
+
+def test_toggles_only_fire_when_the_inferred_state_differs(monkeypatch):
+    light, api, _ = make_light(monkeypatch, 180)
+    assert not light.is_on
+    set_reading(light, 180)
+    assert light.is_on
+
+    async def run() -> None:
+        await light.async_turn_on()
+        assert api.sent == []
+        await light.async_turn_off()
+        assert api.sent == ["onoff"]
+
+    asyncio.run(run())
+    assert light.extra_state_attributes == {"lux_threshold": 110}
+
+
+def test_readings_after_a_toggle_update_the_levels(monkeypatch):
+    light, api, clock = make_light(monkeypatch, 200)
+    set_reading(light, 200)
+
+    async def run() -> None:
+        await light.async_turn_off()
+
+    asyncio.run(run())
+    assert api.sent == ["onoff"]
+    # a reading from before the toggle is not taken as the new state
+    set_reading(light, 200)
+    assert not light.is_on
+    set_reading(light, 40)
+    assert not light.is_on
+    assert light.threshold.off == pytest.approx(blend(20, 40))
+
+    # a toggle with no visible effect stops holding readings back once settled
+    asyncio.run(light.async_turn_on())
+    set_reading(light, 45)
+    assert light.is_on
+    clock.now += LIGHT_SETTLE_TIME
+    set_reading(light, 45)
+    assert not light.is_on
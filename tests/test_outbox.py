@@ -0,0 +1,159 @@
+"""Tests for the outbox of commands that could not be sent"""
+
+import asyncio
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.nature_remo import outbox as outbox_module
+from custom_components.nature_remo.api import RemoAPI
+from custom_components.nature_remo.const import (
+    OUTBOX_DEADLINE,
+    CommandRejected,
+    NetworkError,
+)
+from custom_components.nature_remo.outbox import (
+    CommandOutbox,
+    is_replaced_by,
+    supersedes,
+)
+
+AC_COOL = {"operation_mode": "cool", "button": ""}
+AC_OFF = {"operation_mode": "cool", "button": "power-off"}
+
+
+class Clock:
+    """Wall clock advanced by hand"""
+
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+class FlakyAPI:
+    """API failing the commands given in `failures`, recording the others"""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple] = []
+        self.failures: dict[str, Exception] = {}
+
+    async def transmit_command(self, kind: str, target: str, data: dict):
+        if (error := self.failures.get(target)) is not None:
+            raise error
+        self.sent.append((kind, target, data))
+        return {}
+
+
+def command(kind: str, target: str, data: dict) -> dict:
+    return {"kind": kind, "target": target, "data": data, "queued_at": 0.0}
+
+
+def test_whole_state_commands_supersede_older_ones():
+    assert supersedes("ac", AC_COOL)
+    assert supersedes("light", {"button": "on"})
+    assert not supersedes("light", {"button": "onoff"})
+    assert not supersedes("ir", {})
+
+
+def test_toggles_and_other_targets_are_not_replaced():
+    assert is_replaced_by(command("ac", "a", AC_COOL), "ac", "a")
+    assert not is_replaced_by(command("ac", "b", AC_COOL), "ac", "a")
+    assert not is_replaced_by(command("light", "l", {"button": "onoff"}), "light", "l")
+    assert not is_replaced_by(command("ir", "a", {}), "ac", "a")
+
+
+def run_with_outbox(tmp_path, monkeypatch, test) -> None:
+    clock = Clock()
+    monkeypatch.setattr(outbox_module, "time", clock)
+    monkeypatch.setattr(outbox_module, "OUTBOX_DRAIN_GAP", 0)
+
+    async def run() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        api = FlakyAPI()
+        outbox = CommandOutbox(hass, api, "entry")
+        await test(outbox, api, clock)
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_enqueue_coalesces_whole_state_commands(tmp_path, monkeypatch):
+    async def test(outbox: CommandOutbox, api, clock) -> None:
+        outbox.enqueue("ac", "a", AC_COOL)
+        outbox.enqueue("ir", "sig", {})
+        outbox.enqueue("light", "l", {"button": "onoff"})
+        outbox.enqueue("light", "l", {"button": "onoff"})
+        outbox.enqueue("ac", "a", AC_OFF)
+        assert [(c["kind"], c["data"]) for c in outbox.commands] == [
+            ("ir", {}),
+            ("light", {"button": "onoff"}),
+            ("light", {"button": "onoff"}),
+            ("ac", AC_OFF),
+        ]
+        # a command sent directly makes the queued ones for its AC obsolete
+        outbox.discard("ac", "a", AC_COOL)
+        assert [c["kind"] for c in outbox.commands] == ["ir", "light", "light"]
+
+    run_with_outbox(tmp_path, monkeypatch, test)
+
+
+def test_drain_sends_in_order_until_offline(tmp_path, monkeypatch):
+    async def test(outbox: CommandOutbox, api: FlakyAPI, clock) -> None:
+        for target in ("a", "b", "c"):
+            outbox.enqueue("ir", target, {})
+        api.failures["b"] = NetworkError()
+        await outbox.async_drain()
+        assert [target for _, target, _ in api.sent] == ["a"]
+        assert [c["target"] for c in outbox.commands] == ["b", "c"]
+        del api.failures["b"]
+        await outbox.async_drain()
+        assert [target for _, target, _ in api.sent] == ["a", "b", "c"]
+        assert outbox.commands == []
+
+    run_with_outbox(tmp_path, monkeypatch, test)
+
+
+def test_rejected_and_expired_commands_are_dropped(tmp_path, monkeypatch):
+    async def test(outbox: CommandOutbox, api: FlakyAPI, clock: Clock) -> None:
+        outbox.enqueue("ir", "old", {})
+        clock.now += OUTBOX_DEADLINE - 10
+        outbox.enqueue("ir", "rejected", {})
+        outbox.enqueue("ir", "fresh", {})
+        clock.now += 11
+        api.failures["rejected"] = CommandRejected("unknown signal")
+        await outbox.async_drain()
+        assert [target for _, target, _ in api.sent] == ["fresh"]
+        assert outbox.commands == []
+
+    run_with_outbox(tmp_path, monkeypatch, test)
+
+
+def test_queue_survives_a_restart(tmp_path, monkeypatch):
+    async def test(outbox: CommandOutbox, api: FlakyAPI, clock: Clock) -> None:
+        outbox.enqueue("ir", "old", {})
+        clock.now += OUTBOX_DEADLINE - 10
+        outbox.enqueue("ir", "fresh", {})
+        await outbox.async_stop()
+        clock.now += 11
+        restarted = CommandOutbox(outbox.hass, api, "entry")
+        await restarted.async_start()
+        await restarted.async_stop()
+        assert [c["target"] for c in restarted.commands] == ["fresh"]
+
+    run_with_outbox(tmp_path, monkeypatch, test)
+
+
+def test_unreachable_api_queues_the_command(tmp_path, monkeypatch):
+    async def test(outbox: CommandOutbox, api, clock) -> None:
+        remo = RemoAPI("token")
+        remo.outbox = outbox
+
+        async def offline(*args):
+            raise NetworkError()
+
+        remo.post = offline
+        assert await remo.send_ir_signal("sig") is None
+        assert [c["target"] for c in outbox.commands] == ["sig"]
+
+    run_with_outbox(tmp_path, monkeypatch, test)
@@ -0,0 +1,90 @@
+"""Tests for recording rollovers of the smart meter without blocking the loop"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.nature_remo import sensor as sensor_module
+from custom_components.nature_remo.const import EPC_ITEMS, ROLLOVER_WRITE_DELAY
+from custom_components.nature_remo.sensor import PowerEnergyMeter
+
+
+def meter_properties(consumed: int) -> dict:
+    return {
+        "device": {"mac_address": "mac"},
+        "smart_meter": {
+            "echonetlite_properties": [
+                {"epc": 211, "val": "1"},  # coefficient
+                {"epc": 225, "val": "1"},  # 0.1 kWh per unit
+                {"epc": 215, "val": "4"},  # 4 digits: rolls over at 999.9 kWh
+                {"epc": 224, "val": str(consumed)},
+            ]
+        },
+    }
+
+
+class Scheduler:
+    """Stand-in for async_call_later keeping the scheduled callbacks"""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[float, object]] = []
+        self.cancelled = 0
+
+    def __call__(self, _hass, delay, action):
+        self.calls.append((delay, action))
+        return self.cancel
+
+    def cancel(self) -> None:
+        self.cancelled += 1
+
+
+def make_meter(monkeypatch, scheduler: Scheduler) -> tuple[PowerEnergyMeter, list]:
+    monkeypatch.setattr(sensor_module, "async_call_later", scheduler)
+    data = SimpleNamespace(power_energy_meter=[meter_properties(9990)])
+    meter = PowerEnergyMeter(
+        EPC_ITEMS.comsumed_energy,
+        SimpleNamespace(data=data),
+        "mac",
+        "Meter",
+        meter_properties(9990),
+    )
+    written = []
+    meter.async_write_ha_state = lambda: written.append(meter.native_value)
+    return meter, written
+
+
+def test_rollover_writes_the_top_of_the_meter_then_the_new_value(monkeypatch):
+    scheduler = Scheduler()
+    meter, written = make_meter(monkeypatch, scheduler)
+    assert meter.native_value == pytest.approx(999.0)
+
+    meter.coordinator.data.power_energy_meter = [meter_properties(12)]
+    meter._handle_coordinator_update()  # pylint: disable=protected-access
+    # a new reading while the top of the meter is shown is held back too
+    meter.coordinator.data.power_energy_meter = [meter_properties(15)]
+    meter._handle_coordinator_update()  # pylint: disable=protected-access
+    assert written == pytest.approx([999.9])
+    assert len(scheduler.calls) == 1
+
+    delay, action = scheduler.calls[0]
+    assert delay == ROLLOVER_WRITE_DELAY
+    action(None)
+    assert written == pytest.approx([999.9, 1.5])
+
+    meter.coordinator.data.power_energy_meter = [meter_properties(20)]
+    meter._handle_coordinator_update()  # pylint: disable=protected-access
+    assert written == pytest.approx([999.9, 1.5, 2.0])
+    assert len(scheduler.calls) == 1
+
+
+def test_pending_rollover_is_cancelled_on_removal(monkeypatch):
+    scheduler = Scheduler()
+    meter, _ = make_meter(monkeypatch, scheduler)
+    meter.update_state(meter_properties(12))
+
+    async def remove() -> None:
+        await meter.async_will_remove_from_hass()
+
+    asyncio.run(remove())
+    assert scheduler.cancelled == 1
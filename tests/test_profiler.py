@@ -0,0 +1,88 @@
+"""Tests for the on-demand profiler"""
+
+import asyncio
+
+import pytest
+
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.nature_remo import profiler, services
+from custom_components.nature_remo.const import DOMAIN, SERVICE_PROFILE
+from custom_components.nature_remo.profiler import async_profile, profiled
+
+
+@profiled
+async def poll() -> str:
+    await asyncio.sleep(0.01)
+    return "polled"
+
+
+@profiled
+def parse(value: int) -> int:
+    return value * 2
+
+
+def test_profiled_functions_are_unchanged_without_session():
+    assert profiler._session is None  # pylint: disable=protected-access
+    assert asyncio.run(poll()) == "polled"
+    assert parse(2) == 4
+    assert poll.__name__ == "poll"
+
+
+def test_report_lists_profiled_functions(tmp_path):
+    path = tmp_path / "profile.txt"
+
+    async def run() -> None:
+        session = asyncio.ensure_future(async_profile(0.2, str(path)))
+        await asyncio.sleep(0.05)
+        await poll()
+        parse(1)
+        await session
+
+    asyncio.run(run())
+    report = path.read_text(encoding="utf-8")
+    assert "poll: 1 calls" in report
+    assert "parse: 1 calls" in report
+    assert "== cProfile (cumulative) ==" in report
+
+
+def test_only_one_session_runs_at_a_time(tmp_path):
+    async def run() -> None:
+        first = asyncio.ensure_future(async_profile(0.1, str(tmp_path / "a.txt")))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(RuntimeError):
+                await async_profile(0.1, str(tmp_path / "b.txt"))
+        finally:
+            await first
+
+    asyncio.run(run())
+    assert not (tmp_path / "b.txt").exists()
+
+
+async def run_profile_service(config_dir) -> dict:
+    hass = HomeAssistant(str(config_dir))
+    call = ServiceCall(DOMAIN, SERVICE_PROFILE, {"duration": 1.0})
+    return await services.async_run_profile(hass, call)
+
+
+def test_profile_service_reports_a_running_session(tmp_path, monkeypatch):
+    async def fake_profile(duration: float, path: str) -> None:
+        raise RuntimeError("A profiling session is already running")
+
+    monkeypatch.setattr(services, "async_profile", fake_profile)
+    with pytest.raises(HomeAssistantError):
+        asyncio.run(run_profile_service(tmp_path))
+
+
+def test_profile_service_returns_the_report_path(tmp_path, monkeypatch):
+    written = []
+
+    async def fake_profile(duration: float, path: str) -> None:
+        written.append((duration, path))
+
+    monkeypatch.setattr(services, "async_profile", fake_profile)
+    response = asyncio.run(run_profile_service(tmp_path))
+    assert written == [(1.0, response["path"])]
+    assert response["path"].startswith(str(tmp_path))
@@ -0,0 +1,66 @@
+"""Tests for the serialization of transmissions per Remo"""
+import asyncio
+import time
+
+from custom_components.nature_remo.scheduler import TransmitScheduler
+
+# the event loop may wake up this much early
+SLACK = 0.005
+
+
+def record_sends(scheduler: TransmitScheduler, macs: list) -> list[tuple]:
+    """Send through given remos at once, returning (mac, start, end) per send"""
+    sends = []
+
+    async def send(mac) -> None:
+        started = time.monotonic()
+        await asyncio.sleep(0.01)
+        sends.append((mac, started, time.monotonic()))
+
+    async def run() -> None:
+        await asyncio.gather(
+            *(scheduler.transmit(mac, lambda mac=mac: send(mac)) for mac in macs)
+        )
+
+    asyncio.run(run())
+    return sends
+
+
+def test_same_remo_keeps_the_minimum_interval():
+    sends = record_sends(TransmitScheduler(0.05), ["a", "a", "a"])
+    for (_, _, ended), (_, started, _) in zip(sends, sends[1:]):
+        assert started - ended >= 0.05 - SLACK
+
+
+def test_different_remos_do_not_wait_for_each_other():
+    sends = record_sends(TransmitScheduler(0.2), ["a", "b", None])
+    starts = [started for _, started, _ in sends]
+    assert max(starts) - min(starts) < 0.1
+
+
+def test_report_tracks_waits_and_drains_the_queue():
+    scheduler = TransmitScheduler(0.05)
+    record_sends(scheduler, ["a", "a"])
+    report = scheduler.report()["a"]
+    assert report["sent"] == 2
+    assert report["queue_depth"] == 0
+    assert report["max_wait"] >= 0.05 - SLACK
+
+
+def test_failed_send_still_holds_the_remo():
+    scheduler = TransmitScheduler(0.05)
+    times = []
+
+    async def fail() -> None:
+        raise RuntimeError
+
+    async def run() -> None:
+        try:
+            await scheduler.transmit("a", fail)
+        except RuntimeError:
+            times.append(time.monotonic())
+        await scheduler.transmit("a", lambda: asyncio.sleep(0))
+        times.append(time.monotonic())
+
+    asyncio.run(run())
+    assert times[1] - times[0] >= 0.05 - SLACK
@@ -0,0 +1,73 @@
+"""Tests for the select entities holding the signals of appliances"""
+
+import asyncio
+
+import pytest
+
+from homeassistant.components.select import ATTR_OPTIONS
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.nature_remo.const import Appliance, Signal
+from custom_components.nature_remo.index import SignalIndex
+from custom_components.nature_remo.select import LightSignalEntity, SignalEntity
+
+TV = Appliance("tv", "TV", [Signal("sig-power", "Power"), Signal("sig-mute", "Mute")])
+LIGHT = Appliance("light", "Ceiling", ["on", "off", Signal("sig-night", "Night")])
+
+
+class RecordingAPI:
+    """API recording the signals it sends"""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple] = []
+
+    async def send_ir_signal(self, signal_id: str) -> None:
+        self.sent.append(("ir", signal_id))
+
+    async def send_light_signal(self, appliance_id: str, button: str) -> None:
+        self.sent.append(("light", appliance_id, button))
+
+
+@pytest.fixture
+def index() -> SignalIndex:
+    return SignalIndex([TV, LIGHT])
+
+
+def test_entities_share_the_catalog_of_the_index(index):
+    entity = SignalEntity(TV, RecordingAPI(), index.catalogs["tv"])
+    assert entity.options is index.catalogs["tv"].options
+    assert entity.current_option == "1. Power"
+    # options are served by the index, not written to the history
+    assert ATTR_OPTIONS in SignalEntity._unrecorded_attributes
+    assert ATTR_OPTIONS in LightSignalEntity._unrecorded_attributes
+
+
+@pytest.mark.parametrize("entity_class", [SignalEntity, LightSignalEntity])
+def test_unknown_options_are_rejected(index, entity_class):
+    appliance = TV if entity_class is SignalEntity else LIGHT
+    entity = entity_class(appliance, RecordingAPI(), index.catalogs[appliance.id])
+    with pytest.raises(HomeAssistantError):
+        entity.select_option("9. Missing")
+    entity.select_option("2. " + ("Mute" if appliance is TV else "off"))
+    assert entity.current_option.startswith("2. ")
+
+
+def test_signals_are_sent_for_the_selected_option(index):
+    api = RecordingAPI()
+    tv = SignalEntity(TV, api, index.catalogs["tv"])
+    light = LightSignalEntity(LIGHT, api, index.catalogs["light"])
+
+    async def run() -> None:
+        await tv.send_signal()
+        tv.select_option("2. Mute")
+        await tv.send_signal()
+        await light.send_signal("2. off")
+        await light.send_signal("3. Night")
+
+    asyncio.run(run())
+    assert api.sent == [
+        ("ir", "sig-power"),
+        ("ir", "sig-mute"),
+        ("light", "light", "off"),
+        ("ir", "sig-night"),
+    ]
@@ -0,0 +1,85 @@
+"""Tests for how often sensor entities make the coordinators poll"""
+import asyncio
+import datetime
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.nature_remo import coordinator as coordinator_module
+from custom_components.nature_remo.const import SensorData
+from custom_components.nature_remo.coordinator import SensorCoordinator
+from custom_components.nature_remo.sensor import (
+    AggregateSensor,
+    HumiditySensor,
+    IlluminanceSensor,
+    MovementSensor,
+    PowerEnergyMeter,
+    TemperatureSensor,
+)
+
+# interval at which Home Assistant polls entities that ask for it
+ENTITY_POLL_INTERVAL = 30
+READING = {"mac": SensorData(20.0, 50, 100, None)}
+
+
+class CountingAPI:
+    """API answering sensor polls with fixed readings"""
+
+    def __init__(self) -> None:
+        self.requests = 0
+
+    async def fecth_sensor_data(self) -> dict[str, SensorData]:
+        self.requests += 1
+        return READING
+
+
+class Clock:
+    """Monotonic clock advanced by hand"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize(
+    "entity_class",
+    [
+        TemperatureSensor,
+        HumiditySensor,
+        IlluminanceSensor,
+        MovementSensor,
+        AggregateSensor,
+        PowerEnergyMeter,
+    ],
+)
+def test_coordinator_entities_are_not_polled(entity_class):
+    assert entity_class.should_poll.fget(entity_class.__new__(entity_class)) is False
+
+
+def test_profile_interval_sets_the_request_rate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(coordinator_module, "time", clock)
+    api = CountingAPI()
+
+    async def run() -> None:
+        hass = HomeAssistant("/tmp")
+        coordinator = SensorCoordinator(hass, api, READING)
+        # a 300 s sensor interval from the performance profile
+        coordinator.update_interval = datetime.timedelta(seconds=300)
+        entities = [
+            TemperatureSensor(coordinator, "mac", "Remo", 20.0),
+            HumiditySensor(coordinator, "mac", "Remo", 50),
+        ]
+        while clock.now < 3000:
+            clock.now += ENTITY_POLL_INTERVAL
+            for entity in entities:
+                if entity.should_poll:
+                    await entity.async_update()
+            # stands in for the refresh the coordinator schedules itself
+            await coordinator.async_ensure_fresh()
+
+    asyncio.run(run())
+    assert 9 <= api.requests <= 10
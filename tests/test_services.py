@@ -0,0 +1,93 @@
+"""Tests for the integration-wide services"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall
+
+from custom_components.nature_remo import services
+from custom_components.nature_remo.const import DOMAIN, SERVICE_APPLY_BATCH
+
+
+class FakeLight:
+    """Light entity counting how many commands run at once"""
+
+    platform = SimpleNamespace(domain="light")
+    running = 0
+    peak = 0
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.states: list[str] = []
+
+    async def async_turn_on(self) -> None:
+        FakeLight.running += 1
+        FakeLight.peak = max(FakeLight.peak, FakeLight.running)
+        await asyncio.sleep(0.01)
+        FakeLight.running -= 1
+        if self.fail:
+            raise ConnectionError("unreachable")
+        self.states.append("on")
+
+    def async_write_ha_state(self) -> None:
+        pass
+
+
+@pytest.fixture
+def hass():
+    return SimpleNamespace(
+        data={DOMAIN: {"entry": {"api": SimpleNamespace(concurrency=2)}}}
+    )
+
+
+def test_batch_reports_each_item(hass, monkeypatch):
+    entities = {"light.a": FakeLight(), "light.b": FakeLight(fail=True)}
+    monkeypatch.setattr(services, "find_entity", lambda _, eid: entities.get(eid))
+    items = [
+        {"entity_id": "light.a", "state": "on"},
+        {"entity_id": "light.b", "state": "on"},
+        {"entity_id": "light.c", "state": "on"},
+    ]
+    call = ServiceCall(DOMAIN, SERVICE_APPLY_BATCH, {"items": items})
+    response = asyncio.run(services.async_apply_batch(hass, call))
+    assert [r["success"] for r in response["results"]] == [True, False, False]
+    assert response["results"][1]["error"] == "unreachable"
+    assert "not a nature_remo entity" in response["results"][2]["error"]
+    assert entities["light.a"].states == ["on"]
+
+
+def test_batch_concurrency_is_bounded(hass, monkeypatch):
+    FakeLight.peak = 0
+    monkeypatch.setattr(services, "find_entity", lambda _, eid: FakeLight())
+    items = [{"entity_id": f"light.l{i}", "state": "on"} for i in range(6)]
+    call = ServiceCall(DOMAIN, SERVICE_APPLY_BATCH, {"items": items})
+    response = asyncio.run(services.async_apply_batch(hass, call))
+    assert all(r["success"] for r in response["results"])
+    assert FakeLight.peak == 2
+
+
+def test_batch_items_are_validated():
+    with pytest.raises(vol.Invalid):
+        services.APPLY_BATCH_SCHEMA({"items": [{"entity_id": "light.a", "state": 1}]})
+    data = services.APPLY_BATCH_SCHEMA({"items": {"entity_id": "climate.ac"}})
+    assert data["items"] == [{"entity_id": "climate.ac"}]
+
+
+def test_registered_batch_service_responds(tmp_path, monkeypatch):
+    monkeypatch.setattr(services, "find_entity", lambda _, eid: FakeLight())
+
+    async def run() -> dict:
+        hass = HomeAssistant(str(tmp_path))
+        services.async_setup_services(hass)
+        return await hass.services.async_call(
+            DOMAIN,
+            SERVICE_APPLY_BATCH,
+            {"items": [{"entity_id": "light.a", "state": "on"}]},
+            blocking=True,
+            return_response=True,
+        )
+
+    response = asyncio.run(run())
+    assert response == {"results": [{"entity_id": "light.a", "success": True}]}
@@ -0,0 +1,135 @@
+"""Tests for applying several AC settings with a single command"""
+
+import asyncio
+
+import pytest
+
+import homeassistant.components.climate as Climate
+from homeassistant.const import UnitOfTemperature
+from homeassistant.core import HomeAssistant
+
+from custom_components.nature_remo.api import build_ac_payload
+from custom_components.nature_remo.climate import AirConditioner
+from custom_components.nature_remo.const import (
+    AC,
+    Appliances,
+    InvalidACState,
+    ModeSpec,
+    SwingModePair,
+)
+from custom_components.nature_remo.coordinator import ApplianceCoordinator
+
+COOL = Climate.const.HVACMode.COOL
+HEAT = Climate.const.HVACMode.HEAT
+OFF = Climate.const.HVACMode.OFF
+
+
+def mode_spec(temps: list[float]) -> ModeSpec:
+    return ModeSpec(
+        [str(t) for t in temps],
+        temps,
+        min(temps),
+        max(temps),
+        1.0,
+        ["auto", "1", "2"],
+        ["swing"],
+        [""],
+        [SwingModePair("swing", ""), SwingModePair("1", "")],
+    )
+
+
+class RecordingAPI:
+    """API recording the aircon_settings payloads it sends"""
+
+    def __init__(self) -> None:
+        self.sent: list[dict] = []
+
+    async def fetch_appliance(self) -> Appliances:
+        return Appliances([], [], [], [])
+
+    async def send_ac_signal(self, ac, force: bool = False):
+        self.sent.append(build_ac_payload(ac))
+        return {}
+
+
+def run_with_ac(tmp_path, test) -> RecordingAPI:
+    api = RecordingAPI()
+
+    async def run() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        data = AC(
+            "ac",
+            "AC",
+            UnitOfTemperature.CELSIUS,
+            Climate.const.ClimateEntityFeature.TARGET_TEMPERATURE,
+            None,
+            None,
+            None,
+            {
+                COOL: mode_spec([24.0, 25.0, 26.0]),
+                HEAT: mode_spec([20.0, 21.0]),
+                OFF: None,
+            },
+        )
+        coordinator = ApplianceCoordinator(hass, api, Appliances([], [], [], []))
+        entity = AirConditioner(data, api, coordinator)
+        entity.hass, entity.entity_id = hass, "climate.ac"
+        entity.async_write_ha_state = lambda: None
+        await test(entity)
+
+    asyncio.run(run())
+    return api
+
+
+def test_every_setting_goes_in_one_command(tmp_path):
+    async def test(entity: AirConditioner) -> None:
+        await entity.async_set_ac_state(
+            hvac_mode=COOL, temperature=25.2, fan_mode="2", swing_mode="⥮1"
+        )
+        assert entity.hvac_mode == COOL
+        assert entity.target_temperature == 25.0
+        assert entity.fan_mode == "2"
+        assert entity.swing_mode == "⥮1"
+
+    api = run_with_ac(tmp_path, test)
+    assert api.sent == [
+        {
+            "button": "",
+            "air_direction": "1",
+            "air_direction_h": "",
+            "operation_mode": "cool",
+            "temperature": "25.0",
+            "air_volume": "2",
+            "temperature_unit": "c",
+        }
+    ]
+
+
+def test_invalid_setting_changes_nothing(tmp_path):
+    async def test(entity: AirConditioner) -> None:
+        await entity.async_set_ac_state(hvac_mode=COOL)
+        with pytest.raises(InvalidACState):
+            await entity.async_set_ac_state(temperature=24.0, fan_mode="turbo")
+        with pytest.raises(InvalidACState):
+            await entity.async_set_ac_state(hvac_mode=Climate.const.HVACMode.DRY)
+        assert entity.target_temperature == 25.0
+
+    api = run_with_ac(tmp_path, test)
+    assert len(api.sent) == 1
+
+
+def test_settings_sent_with_off_are_kept_for_the_last_mode(tmp_path):
+    async def test(entity: AirConditioner) -> None:
+        await entity.async_set_ac_state(hvac_mode=HEAT)
+        await entity.async_set_ac_state(hvac_mode=OFF, temperature=20.0)
+        assert entity.hvac_mode == OFF
+        await entity.async_turn_on()
+        assert (entity.hvac_mode, entity.target_temperature) == (HEAT, 20.0)
+
+    api = run_with_ac(tmp_path, test)
+    assert [(p["button"], p["operation_mode"]) for p in api.sent] == [
+        ("", "warm"),
+        ("power-off", "warm"),
+        ("", "warm"),
+    ]
+    assert api.sent[1]["temperature"] == "20.0"
@@ -0,0 +1,77 @@
+"""Tests for the platforms set up for a config entry"""
+
+import asyncio
+
+import pytest
+import requests
+
+from homeassistant.const import Platform
+
+from custom_components.nature_remo import required_platforms, setup_waves
+from custom_components.nature_remo.api import RemoAPI
+from custom_components.nature_remo.const import Appliances, SensorData
+
+NO_APPLIANCES = Appliances([], [], [], [])
+READINGS = {"mac": SensorData(25.0, 50, 100, None)}
+
+
+@pytest.mark.parametrize(
+    ("appliances", "sensor_data", "expected"),
+    [
+        (NO_APPLIANCES, {}, set()),
+        (NO_APPLIANCES, READINGS, {Platform.SENSOR}),
+        (
+            Appliances([], [{}], [], []),
+            {},
+            {Platform.LIGHT, Platform.SELECT, Platform.BUTTON},
+        ),
+        (Appliances([], [], [], [{}]), {}, {Platform.SELECT, Platform.BUTTON}),
+        # climate pulls in the sensor platform even without readings
+        (Appliances([{}], [], [], []), {}, {Platform.CLIMATE, Platform.SENSOR}),
+        (Appliances([], [], [{}], []), {}, {Platform.SENSOR}),
+    ],
+)
+def test_only_platforms_with_entities_are_required(appliances, sensor_data, expected):
+    assert required_platforms(appliances, sensor_data) == expected
+
+
+def test_waves_follow_dependencies():
+    platforms = {
+        Platform.BUTTON,
+        Platform.CLIMATE,
+        Platform.LIGHT,
+        Platform.SELECT,
+        Platform.SENSOR,
+    }
+    assert setup_waves(platforms) == [
+        [Platform.LIGHT, Platform.SELECT, Platform.SENSOR],
+        [Platform.BUTTON, Platform.CLIMATE],
+    ]
+    assert setup_waves(set()) == []
+
+
+class DevicesSession(requests.Session):
+    """Session answering /1/devices and counting the requests"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.urls: list[str] = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = (  # pylint: disable=protected-access
+            b'[{"name": "Living", "mac_address": "mac",'
+            b' "newest_events": {"te": {"val": 25.0}, "hu": {"val": 50}}}]'
+        )
+        return response
+
+
+def test_devices_are_fetched_once_for_readings_and_names():
+    api = RemoAPI("token")
+    api.session = DevicesSession()
+    sensor_data, names = asyncio.run(api.fetch_devices())
+    assert sensor_data == {"mac": SensorData(25.0, 50, None, None)}
+    assert names == {"mac": "Living"}
+    assert api.session.urls == [api.base_url + api.apis["devices"].url]
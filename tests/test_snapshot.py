@@ -0,0 +1,62 @@
+"""Tests for the bulk state snapshot"""
+
+from types import SimpleNamespace
+
+from custom_components.nature_remo.const import (
+    DOMAIN,
+    Appliance,
+    Appliances,
+    SensorData,
+    Signal,
+)
+from custom_components.nature_remo.index import SignalIndex
+from custom_components.nature_remo.snapshot import build_snapshot
+
+METER = {
+    "device": {"mac_address": "meter"},
+    "smart_meter": {"echonetlite_properties": [{"epc": 231, "val": "500"}]},
+}
+
+
+def snapshot_hass() -> SimpleNamespace:
+    store = {
+        "sensor_coordinator": SimpleNamespace(
+            revision=3, data={"mac": SensorData(25.0, 50, 100, None)}
+        ),
+        "appliance_coordinator": SimpleNamespace(
+            revision=5,
+            data=Appliances(
+                [{"id": "ac", "settings": {"temp": "25"}}], [], [METER], []
+            ),
+        ),
+        "meter_coordinators": {
+            "local": SimpleNamespace(revision=7, data=None),
+        },
+        "signal_index": SignalIndex([Appliance("tv", "TV", [Signal("sig", "Power")])]),
+        "device_names": {"mac": "Living"},
+    }
+    return SimpleNamespace(data={DOMAIN: {"entry": store}})
+
+
+def test_full_snapshot_has_every_section():
+    snapshot = build_snapshot(snapshot_hass(), None)
+    assert snapshot["revision"] == 7
+    entry = snapshot["entries"]["entry"]
+    assert entry["devices"]["mac"]["name"] == "Living"
+    assert entry["devices"]["mac"]["temperature"] == 25.0
+    assert entry["ac"] == {"ac": {"temp": "25"}}
+    assert entry["meters"] == {"meter": {231: "500"}}
+    assert entry["signals"] == {"tv": {"name": "TV", "signals": ["Power"]}}
+
+
+def test_since_keeps_only_changed_sections():
+    hass = snapshot_hass()
+    assert set(build_snapshot(hass, 4)["entries"]["entry"]) == {"ac", "meters"}
+    # meters changed through a local meter coordinator
+    assert set(build_snapshot(hass, 5)["entries"]["entry"]) == {"meters"}
+    assert build_snapshot(hass, 7) == {"revision": 7, "entries": {"entry": {}}}
+
+
+def test_no_entries_give_an_empty_snapshot():
+    hass = SimpleNamespace(data={})
+    assert build_snapshot(hass, None) == {"revision": 0, "entries": {}}
@@ -0,0 +1,140 @@
+"""Tests for holding a local setpoint with the readings of the Remo"""
+
+import asyncio
+
+import pytest
+
+import homeassistant.components.climate as Climate
+from homeassistant.const import UnitOfTemperature
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import restore_state
+
+from custom_components.nature_remo import thermostat
+from custom_components.nature_remo.climate import AirConditioner
+from custom_components.nature_remo.const import (
+    AC,
+    Appliances,
+    ModeSpec,
+    SensorData,
+    SwingModePair,
+)
+from custom_components.nature_remo.coordinator import (
+    ApplianceCoordinator,
+    SensorCoordinator,
+)
+from custom_components.nature_remo.sensor import TemperatureSensor
+from custom_components.nature_remo.thermostat import HysteresisController
+
+COOL = Climate.const.HVACMode.COOL
+HEAT = Climate.const.HVACMode.HEAT
+OFF = Climate.const.HVACMode.OFF
+
+
+class Clock:
+    """Monotonic clock advanced by hand"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize(
+    ("hvac_mode", "reading", "expected"),
+    [
+        (COOL, 26.0, COOL),
+        (COOL, 25.5, None),
+        (COOL, 24.4, OFF),
+        (HEAT, 20.0, OFF),
+        (HEAT, 18.4, HEAT),
+        (COOL, None, None),
+    ],
+)
+def test_decide_switches_outside_the_hysteresis_band(hvac_mode, reading, expected):
+    setpoint = 25.0 if hvac_mode == COOL else 19.0
+    controller = HysteresisController(hvac_mode, setpoint, 0.5, 4)
+    assert controller.decide(reading) == expected
+
+
+def test_budget_recovers_after_an_hour(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(thermostat, "time", clock)
+    controller = HysteresisController(COOL, 25.0, 0.5, 2)
+    for _ in range(2):
+        assert controller.has_budget()
+        controller.record_command()
+        clock.now += 60
+    assert not controller.has_budget()
+    assert controller.commands_last_hour() == 2
+    clock.now = 3601
+    assert controller.has_budget()
+
+
+def test_settings_are_restored():
+    controller = HysteresisController(HEAT, 21.0, 1.0, 3)
+    assert HysteresisController(**controller.as_dict()).as_dict() == {
+        "hvac_mode": HEAT,
+        "setpoint": 21.0,
+        "hysteresis": 1.0,
+        "max_commands_per_hour": 3,
+    }
+
+
+class FakeAPI:
+    """API whose sensors read 28 °C"""
+
+    async def fecth_sensor_data(self) -> dict[str, SensorData]:
+        return {"mac": SensorData(28.0, 50, 100, None)}
+
+    async def fetch_appliance(self) -> Appliances:
+        return Appliances([], [], [], [])
+
+
+def test_controller_runs_on_new_readings(tmp_path):
+    async def run() -> list[float]:
+        hass = HomeAssistant(str(tmp_path))
+        await restore_state.async_load(hass)
+        api = FakeAPI()
+        sensors = SensorCoordinator(hass, api, {"mac": SensorData(25.0, 50, 100, None)})
+        sensor = TemperatureSensor(sensors, "mac", "Remo", 25.0)
+        spec = ModeSpec(
+            ["25"],
+            [25.0],
+            25.0,
+            25.0,
+            1.0,
+            ["auto"],
+            [],
+            [],
+            [SwingModePair(None, None)],
+        )
+        data = AC(
+            "id",
+            "AC",
+            UnitOfTemperature.CELSIUS,
+            Climate.const.ClimateEntityFeature.TARGET_TEMPERATURE,
+            sensor,
+            None,
+            None,
+            {COOL: spec, OFF: None},
+        )
+        appliances = ApplianceCoordinator(hass, api, Appliances([], [], [], []))
+        entity = AirConditioner(data, api, appliances)
+        entity.hass, entity.entity_id = hass, "climate.ac"
+        readings = []
+
+        async def async_run_controller() -> None:
+            readings.append(entity.current_temperature)
+
+        entity.async_run_controller = async_run_controller
+        entity.async_write_ha_state = lambda: None
+        await entity.async_added_to_hass()
+        entity.controller = HysteresisController(COOL, 25.0, 0.5, 4)
+        assert "temperature" in sensors.demand
+        # the appliances are not polled again, the readings are
+        await sensors.async_refresh()
+        await hass.async_block_till_done()
+        return readings
+
+    assert asyncio.run(run()) == [28.0]
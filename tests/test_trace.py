@@ -0,0 +1,57 @@
+"""Tests for the lazy, redacted tracing of API payloads"""
+
+import logging
+
+from custom_components.nature_remo.trace import (
+    MAX_CHARS,
+    MAX_ITEMS,
+    TRANSPORT,
+    Payload,
+    get_tracer,
+    redact,
+)
+
+
+def test_secrets_are_redacted_at_any_depth():
+    payload = {"Authorization": "Bearer x", "user": {"access_token": "y", "id": 1}}
+    assert redact(payload) == {
+        "Authorization": "**REDACTED**",
+        "user": {"access_token": "**REDACTED**", "id": 1},
+    }
+
+
+def test_long_lists_are_sampled():
+    assert redact(list(range(MAX_ITEMS + 2))) == [
+        *range(MAX_ITEMS),
+        "... 2 more",
+    ]
+    assert redact((1, 2)) == [1, 2]
+
+
+def test_long_payloads_are_truncated():
+    text = str(Payload("x" * (MAX_CHARS + 10)))
+    assert text.endswith("... (10 chars truncated)")
+    assert len(text) < MAX_CHARS + 30
+
+
+class Exploding:
+    """Object failing the test if it is ever formatted"""
+
+    def __repr__(self) -> str:
+        raise AssertionError("formatted while tracing is off")
+
+
+def test_payload_is_not_formatted_when_tracing_is_off(caplog):
+    tracer = get_tracer(TRANSPORT)
+    tracer.setLevel(logging.INFO)
+    try:
+        tracer.debug("response: %s", Payload([Exploding()]))
+    finally:
+        tracer.setLevel(logging.NOTSET)
+    assert not caplog.records
+
+
+def test_payload_is_formatted_when_tracing_is_on(caplog):
+    with caplog.at_level(logging.DEBUG, logger=get_tracer(TRANSPORT).name):
+        get_tracer(TRANSPORT).debug("response: %s", Payload({"token": "t"}))
+    assert caplog.messages == ["response: {'token': '**REDACTED**'}"]
@@ -0,0 +1,125 @@
+"""Tests for attributing event loop stalls to integration functions"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from custom_components.nature_remo import watchdog as watchdog_module
+from custom_components.nature_remo.watchdog import LoopWatchdog
+
+THRESHOLD = 0.05
+
+
+class Clock:
+    """Performance counter advanced by hand"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+def test_wrapped_callbacks_record_stalls_above_the_threshold(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(watchdog_module, "time", clock)
+    notified = []
+
+    def handle(duration: float) -> str:
+        clock.now += duration
+        return "done"
+
+    async def run() -> None:
+        watchdog = LoopWatchdog(
+            SimpleNamespace(loop=asyncio.get_running_loop()), THRESHOLD
+        )
+        watchdog.listeners.append(lambda: notified.append(True))
+        wrapped = watchdog.wrap(handle)
+        assert wrapped(0.01) == "done"
+        assert not watchdog.stats
+        wrapped(0.2)
+        wrapped(0.1)
+        await asyncio.sleep(0)
+        assert watchdog.report() == {
+            handle.__qualname__: {
+                "count": 2,
+                "max_duration": 0.2,
+                "last_duration": 0.1,
+            }
+        }
+
+    asyncio.run(run())
+    assert notified == [True, True]
+
+
+def test_each_step_of_a_coroutine_is_timed(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(watchdog_module, "time", clock)
+
+    async def refresh() -> int:
+        clock.now += 0.01
+        await asyncio.sleep(0)
+        clock.now += 0.01
+        await asyncio.sleep(0)
+        # only this step holds the loop for long
+        clock.now += 0.3
+        return 42
+
+    async def fail() -> None:
+        await asyncio.sleep(0)
+        raise ValueError
+
+    async def run() -> None:
+        watchdog = LoopWatchdog(
+            SimpleNamespace(loop=asyncio.get_running_loop()), THRESHOLD
+        )
+        assert await watchdog.run("refresh", refresh()) == 42
+        assert watchdog.stats["refresh"].count == 1
+        assert watchdog.stats["refresh"].last_duration == 0.3
+        try:
+            await watchdog.run("fail", fail())
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("the error of the coroutine was swallowed")
+        assert "fail" not in watchdog.stats
+
+    asyncio.run(run())
+
+
+def test_nested_steps_are_attributed_to_the_outer_function(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(watchdog_module, "time", clock)
+
+    async def run() -> None:
+        watchdog = LoopWatchdog(
+            SimpleNamespace(loop=asyncio.get_running_loop()), THRESHOLD
+        )
+        with watchdog.step("outer"):
+            with watchdog.step("inner"):
+                clock.now += 0.1
+        assert list(watchdog.stats) == ["outer"]
+
+    asyncio.run(run())
+
+
+def test_sampler_captures_the_blocking_call():
+    def block() -> None:
+        # busy wait: Home Assistant may forbid time.sleep on the loop
+        deadline = time.perf_counter() + THRESHOLD * 4
+        while time.perf_counter() < deadline:
+            pass
+
+    async def run() -> None:
+        watchdog = LoopWatchdog(
+            SimpleNamespace(loop=asyncio.get_running_loop()), THRESHOLD
+        )
+        watchdog.start()
+        try:
+            watchdog.wrap(block)()
+        finally:
+            watchdog.stop()
+        stack = watchdog.stats[block.__qualname__].last_stack
+        assert stack is not None and "in block" in stack
+
+    asyncio.run(run())